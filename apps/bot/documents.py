@@ -1,23 +1,108 @@
 # apps/bot/documents.py
-import os
-
+from django.conf import settings
 from django_elasticsearch_dsl import Document, fields
 from django_elasticsearch_dsl.registries import registry
-from tika import parser
+from elasticsearch_dsl import MetaField, analyzer, char_filter, normalizer, token_filter
+from apps.multiparser.indexing import build_index_body
 from apps.multiparser.models import Document as DocumentModel
-from django.conf import settings
+
+# --- Analiz zanjiri: o'zbek (lotin/kirill) va rus matnlari ---
+# Kirill harflari o'zbek lotin yozuviga o'giriladi, apostrof variantlari
+# (o‘, oʻ, o', g`) olib tashlanadi. Natijada "Ўзбекистон тарихи" va
+# "O'zbekiston tarixi" bir xil tokenlarga aylanadi.
+CYRILLIC_TO_LATIN = {
+    'а': 'a', 'б': 'b', 'в': 'v', 'г': 'g', 'д': 'd', 'е': 'e', 'ё': 'yo', 'ж': 'j',
+    'з': 'z', 'и': 'i', 'й': 'y', 'к': 'k', 'л': 'l', 'м': 'm', 'н': 'n', 'о': 'o',
+    'п': 'p', 'р': 'r', 'с': 's', 'т': 't', 'у': 'u', 'ф': 'f', 'х': 'x', 'ц': 'ts',
+    'ч': 'ch', 'ш': 'sh', 'щ': 'sh', 'ъ': '', 'ы': 'i', 'ь': '', 'э': 'e', 'ю': 'yu',
+    'я': 'ya', 'ў': 'o', 'қ': 'q', 'ғ': 'g', 'ҳ': 'h',
+}
+APOSTROPHES = ["'", "`", "‘", "’", "ʻ", "ʼ"]
+
+
+def transliteration_mappings():
+    mappings = []
+    for cyrillic, latin in CYRILLIC_TO_LATIN.items():
+        mappings.append(f"{cyrillic} => {latin}")
+        mappings.append(f"{cyrillic.upper()} => {latin.capitalize()}")
+    mappings += [f"{mark} => " for mark in APOSTROPHES]
+    return mappings
+
+
+uz_translit = char_filter('uz_translit', type='mapping', mappings=transliteration_mappings())
+
+# ICU plagini o'rnatilgan klasterlarda to'liq Unicode folding ishlatiladi,
+# aks holda ichki lowercase + asciifolding yetarli
+if getattr(settings, 'ES_ICU_ANALYSIS', False):
+    folding_filters = ['icu_folding']
+else:
+    folding_filters = ['lowercase', 'asciifolding']
+
+uz_ru_folded_analyzer = analyzer(
+    'uz_ru_folded',
+    char_filter=[uz_translit],
+    tokenizer='standard',
+    filter=folding_filters,
+)
+
+# Rus tilidagi (kirill) matn uchun alohida subfield: transliteratsiyasiz, stemmer bilan
+russian_stemmer = token_filter('russian_stemmer', type='stemmer', language='russian')
+russian_analyzer = analyzer(
+    'russian_stemmed',
+    tokenizer='standard',
+    filter=['lowercase', russian_stemmer],
+)
+
+# Sarlavha prefikslari uchun edge n-gram: "matem" -> "ma", "mat", ..., "matem"
+title_edge_ngram = token_filter('title_edge_ngram', type='edge_ngram', min_gram=2, max_gram=20)
+title_prefix_analyzer = analyzer(
+    'title_prefix',
+    char_filter=[uz_translit],
+    tokenizer='standard',
+    filter=folding_filters + [title_edge_ngram],
+)
+lowercase_normalizer = normalizer('lowercase_normalizer', char_filter=[uz_translit], filter=folding_filters)
+
 
 @registry.register_document
 class DocumentDocument(Document):
+    # Qidiruv natijasini bazaga murojaatsiz chizish uchun maydonlar
+    document_id = fields.KeywordField()
+    is_available = fields.BooleanField()
+
     # Product modelidan olinadigan yangi maydonlar
-    product_title = fields.TextField(attr="product.title")
+    product_title = fields.TextField(
+        attr="product.title",
+        analyzer=uz_ru_folded_analyzer,
+        fields={
+            # Qisqa/qisman so'rovlar uchun - qidiruvda prefikslarga bo'linmaydi
+            'prefix': fields.TextField(analyzer=title_prefix_analyzer, search_analyzer=uz_ru_folded_analyzer),
+            # To'liq sarlavha bo'yicha aniq moslik
+            'raw': fields.KeywordField(normalizer=lowercase_normalizer, ignore_above=500),
+            'ru': fields.TextField(analyzer=russian_analyzer),
+        },
+    )
+    product_title_suggest = fields.SearchAsYouTypeField(max_shingle_size=3, analyzer=uz_ru_folded_analyzer)
     product_slug = fields.TextField(attr="product.slug")
 
-    # Fayl ichidagi matn uchun maydon
-    content = fields.TextField(analyzer="standard")
+    # Fayl ichidagi matn uchun maydonlar (DocumentContent'dan olinadi).
+    # content - cheklangan uzunlikdagi butun matn, content_head - boshidagi
+    # bir necha KB, deep qidiruvda yuqoriroq og'irlik bilan ishlatiladi.
+    content = fields.TextField(
+        analyzer=uz_ru_folded_analyzer,
+        fields={'ru': fields.TextField(analyzer=russian_analyzer)},
+    )
+    content_head = fields.TextField(
+        analyzer=uz_ru_folded_analyzer,
+        fields={'ru': fields.TextField(analyzer=russian_analyzer)},
+    )
     download_status = fields.TextField(attr='download_status')
     file_size_bytes = fields.LongField(attr='file_size_bytes')
 
+    class Meta:
+        # Katta matnlar faqat qidiriladi, _source'da saqlanmaydi va qaytarilmaydi
+        _source = MetaField(excludes=['content', 'content_head'])
+
     class Index:
         # Indeks nomi (sozlamalardan olinishi mumkin)
         name = 'documents'
@@ -30,39 +115,13 @@ class DocumentDocument(Document):
             'file_type',
             'created_at',
         ]
+        # search_index --rebuild hujjatlarni bazadan bo'laklab oqimda o'qiydi
+        queryset_pagination = 1000
 
-    def prepare_content(self, instance):
-        # Ruxsat etilgan fayl turlari (MIME + extension)
-        text_based_types = [
-            "application/pdf",
-            "application/msword",
-            "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-            "application/vnd.openxmlformats-officedocument.presentationml.presentation",  # pptx
-            "application/vnd.ms-powerpoint",  # ppt
-            "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",  # xlsx
-            "application/vnd.ms-excel",  # xls
-            "text/plain",
-            ".ppt",
-            ".pptx",
-            ".doc",
-            ".docx",
-            ".xls",
-            ".xlsx",
-            ".txt",
-            ".pdf"
-        ]
+    def get_queryset(self):
+        return super().get_queryset().select_related('product', 'content')
 
-        # Fayl turi extension yoki MIME ichida bo‘lishi kerak
-        if not any(text_type in instance.file_type for text_type in text_based_types):
-            return ""
-
-        if instance.file_path:
-            file_path = os.path.join(settings.MEDIA_ROOT, instance.file_path)
-            if os.path.exists(file_path) and os.path.getsize(file_path) > 0:
-                try:
-                    parsed = parser.from_file(file_path)
-                    if parsed and parsed.get("content"):
-                        return " ".join(str(parsed["content"]).split())
-                except Exception as e:
-                    print(f"Tika error reading file {instance.file_path}: {e}")
-        return ""
+    def prepare(self, instance):
+        # Indeks tanasi Celery indexer bilan bir xil builder orqali quriladi,
+        # shuning uchun rebuild vaqtida fayl qayta parse qilinmaydi.
+        return build_index_body(instance)
@@ -1,5 +1,6 @@
 # handler.py
 
+from django.conf import settings
 from telegram.ext import (
     Application, CommandHandler, MessageHandler, CallbackQueryHandler,
     filters, ConversationHandler,
@@ -29,7 +30,15 @@ telegram_applications = {}
 
 def get_application(token: str) -> Application:
     if token not in telegram_applications:
-        application = Application.builder().token(token).build()
+        # Bot API manzili sozlamalardan - local telegram-bot-api server ham bo'lishi mumkin
+        api_base = getattr(settings, "TELEGRAM_API_BASE_URL", "https://api.telegram.org")
+        application = (
+            Application.builder().token(token)
+            .base_url(f"{api_base}/bot")
+            .base_file_url(f"{api_base}/file/bot")
+            .local_mode(getattr(settings, "TELEGRAM_LOCAL_MODE", False))
+            .build()
+        )
 
         broadcast_conv = ConversationHandler(
             entry_points=[CommandHandler("broadcast", start_broadcast_conversation)],
@@ -208,19 +208,21 @@ def default_keyboard(lang, admin=False) -> ReplyKeyboardMarkup:
     return ReplyKeyboardMarkup(buttons, resize_keyboard=True, one_time_keyboard=False)
 
 
-def build_search_results_keyboard(page_obj, products_on_page, search_mode, language):
+def build_search_results_keyboard(page_obj, search_mode, language):
     """
     Qidiruv natijalari va sahifalash tugmalarini yaratadi.
-    callback_data uchun to'g'ri Document ID (UUID) ishlatiladi.
+    Tugmalar ES hitlaridan (``page_obj.object_list``) chiziladi,
+    callback_data uchun Document ID (UUID) ishlatiladi.
     """
     buttons = []
 
     # Fayllar ro'yxati uchun tugmalarni yaratamiz
-    for product in products_on_page:  # O'zgaruvchi nomi aniqlashtirildi
-        # --- ASOSIY O'ZGARISH: product.document.id ishlatilmoqda ---
-        callback_data = f"getfile_{product.document.id}"
+    for hit in page_obj.object_list:
+        callback_data = f"getfile_{hit['document_id']}"
 
-        button_text = f"📄 {product.title}"
+        # Telegram'ga hali yuborilmagan fayllar alohida belgi bilan ko'rsatiladi
+        icon = "📄" if hit.get('is_available') else "⏳"
+        button_text = f"{icon} {hit['product_title']}"
         buttons.append([InlineKeyboardButton(button_text, callback_data=callback_data)])
 
     # Sahifalash (pagination) tugmalari
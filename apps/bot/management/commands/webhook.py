@@ -4,13 +4,13 @@ from django.conf import settings
 
 
 def get_bot_webhook_info(bot_token):
-    url = f"https://api.telegram.org/bot{bot_token}/getWebhookInfo"
+    url = f"{settings.TELEGRAM_API_BASE_URL}/bot{bot_token}/getWebhookInfo"
     r = requests.post(url)
     return r.json()
 
 
 def get_bot_username(bot_token):
-    url = f"https://api.telegram.org/bot{bot_token}/getMe"
+    url = f"{settings.TELEGRAM_API_BASE_URL}/bot{bot_token}/getMe"
     response = requests.post(url)
     result = response.json().get("result") or {}
     return result.get("username"), response.status_code
@@ -19,12 +19,12 @@ def get_bot_username(bot_token):
 def set_webhook_single(bot_token, webhook_url):
     url_webhook = f"{webhook_url}/api/bot"
     print("url_webhook", url_webhook)
-    url = f"https://api.telegram.org/bot{bot_token}/setWebhook?url={url_webhook}"
+    url = f"{settings.TELEGRAM_API_BASE_URL}/bot{bot_token}/setWebhook?url={url_webhook}"
     response = requests.post(url)
     return response
 
 def delete_webhook_single(bot_token):
-    url = f"https://api.telegram.org/bot{bot_token}/deleteWebhook"
+    url = f"{settings.TELEGRAM_API_BASE_URL}/bot{bot_token}/deleteWebhook"
     response = requests.post(url)
     return response
 
@@ -0,0 +1,162 @@
+# apps/bot/search.py
+import asyncio
+import hashlib
+import logging
+import time
+import weakref
+
+from django.conf import settings
+from django.core.cache import cache
+from elasticsearch import AsyncElasticsearch
+from elasticsearch_dsl import Q
+
+from apps.multiparser.indexing import INDEX_GENERATION_KEY
+from .documents import DocumentDocument
+
+logger = logging.getLogger(__name__)
+
+# Bot API qabul qiladigan eng katta fayl (bulutda 50 MB, local serverda 2000 MB)
+TELEGRAM_MAX_UPLOAD_BYTES = getattr(settings, "TELEGRAM_MAX_UPLOAD_BYTES", 50 * 1024 * 1024)
+PAGE_SIZE = 10
+SEARCH_CACHE_TTL = getattr(settings, "SEARCH_CACHE_TTL", 300)
+# Birinchi sahifalar bitta so'rov bilan olinadi va sahifalar keshdan kesib beriladi
+SEARCH_CACHE_PAGES = getattr(settings, "SEARCH_CACHE_PAGES", 5)
+# Aniq son shu chegaragacha hisoblanadi - undan keyin ES sanashni to'xtatadi
+SEARCH_TRACK_TOTAL_HITS = getattr(settings, "SEARCH_TRACK_TOTAL_HITS", 1000)
+# Tugmalarni chizish uchun kerak bo'lgan maydonlargina qaytariladi
+SEARCH_SOURCE_FIELDS = ["document_id", "product_title", "is_available"]
+# Bundan qisqa so'rovlar uchun fuzzy clause qo'shilmaydi
+FUZZY_MIN_QUERY_LENGTH = 5
+
+# AsyncElasticsearch aiohttp sessiyasi event loop'ga bog'langan,
+# shuning uchun har bir loop uchun alohida klient saqlanadi
+_async_es_clients = weakref.WeakKeyDictionary()
+
+
+def get_async_es_client():
+    loop = asyncio.get_running_loop()
+    client = _async_es_clients.get(loop)
+    if client is None:
+        client = AsyncElasticsearch(
+            settings.ES_URL,
+            request_timeout=10,
+            retry_on_timeout=True,
+            max_retries=2
+        )
+        _async_es_clients[loop] = client
+    return client
+
+
+def normalize_query(text):
+    """Kesh kaliti uchun so'rov matnini bir xil ko'rinishga keltiradi."""
+    return " ".join(text.lower().split())
+
+
+def search_cache_key(text, search_mode, page_size, generation):
+    digest = hashlib.sha1(normalize_query(text).encode("utf-8")).hexdigest()
+    return f"search:{generation}:{search_mode}:{page_size}:{digest}"
+
+
+def build_title_query(text):
+    """
+    Normal rejim: sarlavha bo'yicha arzon term/prefix qidiruvlar.
+
+    To'liq sarlavha ``product_title.raw`` keyword'ida, qisman so'zlar
+    ``product_title.prefix`` (edge n-gram) va ``product_title_suggest``
+    (search_as_you_type) orqali topiladi. Fuzzy faqat uzunroq so'rovlarga
+    qo'shiladi, shunda qisqa so'rov butun lug'at bo'ylab kengaymaydi.
+    """
+    should = [
+        Q("term", **{"product_title.raw": {"value": normalize_query(text), "boost": 20}}),
+        Q("multi_match", query=text, type="phrase", boost=10,
+          fields=["product_title", "product_title.ru", "product_slug^0.8"]),
+        Q("multi_match", query=text, type="bool_prefix", boost=4,
+          fields=["product_title_suggest", "product_title_suggest._2gram", "product_title_suggest._3gram"]),
+        Q("match", **{"product_title.prefix": {"query": text, "operator": "and", "boost": 2}}),
+    ]
+    if len(normalize_query(text)) >= FUZZY_MIN_QUERY_LENGTH:
+        should.append(Q("multi_match", query=text, fields=["product_title", "product_slug^0.8"],
+                        fuzziness="AUTO", prefix_length=1, boost=1))
+    return Q('bool', should=should, minimum_should_match=1)
+
+
+def build_search(text, search_mode):
+    if search_mode == 'deep':
+        # Build a combined query: boosted exact phrase matches first, then fuzzy/similar matches.
+        # Exact phrase has higher boost so will appear earlier in results; fuzzy clause ensures
+        # we still return similar documents when exact phrase not present.
+        exact_fields = ["product_title^10", "product_title.ru^8", "product_slug^8",
+                        "content_head^8", "content_head.ru^6", "content^6", "content.ru^4"]
+        fuzzy_fields = ["product_title^5", "product_slug^4", "content_head^4", "content^3"]
+
+        exact_clause = Q("multi_match", query=text, fields=exact_fields, type="phrase", boost=5)
+        fuzzy_clause = Q("multi_match", query=text, fields=fuzzy_fields, fuzziness="AUTO", boost=1)
+
+        # Combine: at least one should match; exact matches get higher score due to boost
+        q = Q('bool', should=[exact_clause, fuzzy_clause], minimum_should_match=1)
+    else:
+        q = build_title_query(text)
+
+    return DocumentDocument.search().query(q).filter(build_search_filter())
+
+
+def build_search_filter():
+    # --- Filtrlash mantiqi ---
+    return Q(
+        'bool',
+        should=[
+            Q('range', file_size_bytes={'lte': TELEGRAM_MAX_UPLOAD_BYTES}),
+            Q('term', download_status='downloaded')
+        ],
+        minimum_should_match=1
+    )
+
+
+async def search_documents(text, search_mode, page_number, page_size=PAGE_SIZE):
+    """
+    Qidiruv natijasining bitta sahifasini qaytaradi: ``(hits, total)``.
+    Har bir hit ``document_id``, ``product_title`` va ``is_available``
+    maydonlariga ega - tugmalar shu ma'lumotdan bazaga murojaatsiz chiziladi.
+
+    Birinchi ``SEARCH_CACHE_PAGES`` sahifa bitta ES so'rovi bilan olinadi va
+    Redis keshida so'rov uchun bitta kalitda (normallashgan so'rov + rejim)
+    saqlanadi; sahifalar undan kesib beriladi. Undan keyingi sahifalar
+    to'g'ridan-to'g'ri so'raladi. Kalit indeks generatsiyasini ham o'z ichiga
+    oladi, indexer uni oshirganda eski natijalar avtomatik eskiradi.
+    """
+    start_index = (page_number - 1) * page_size
+    if page_number > SEARCH_CACHE_PAGES:
+        return await _fetch_hits(text, search_mode, start_index, page_size)
+
+    generation = await cache.aget(INDEX_GENERATION_KEY, 0)
+    key = search_cache_key(text, search_mode, page_size, generation)
+
+    cached = await cache.aget(key)
+    if cached is None:
+        hits, total = await _fetch_hits(text, search_mode, 0, SEARCH_CACHE_PAGES * page_size)
+        cached = {"hits": hits, "total": total}
+        await cache.aset(key, cached, SEARCH_CACHE_TTL)
+    return cached["hits"][start_index:start_index + page_size], cached["total"]
+
+
+async def _fetch_hits(text, search_mode, start_index, size):
+    """Bitta so'rov: ``size`` ta hit + hits.total (track_total_hits bilan cheklangan)."""
+    s = build_search(text, search_mode).extra(track_total_hits=SEARCH_TRACK_TOTAL_HITS)
+    s = s.source(SEARCH_SOURCE_FIELDS)[start_index:start_index + size]
+
+    started = time.perf_counter()
+    response = await get_async_es_client().search(index=DocumentDocument._index._name, body=s.to_dict())
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    total = response["hits"]["total"]["value"]
+    hits = [
+        {
+            "document_id": hit["_source"].get("document_id", hit["_id"]),
+            "product_title": hit["_source"].get("product_title", ""),
+            "is_available": hit["_source"].get("is_available", False),
+        }
+        for hit in response["hits"]["hits"]
+    ]
+    logger.info(f"[Search] mode={search_mode} from={start_index} size={size} total={total} "
+                f"es_took={response.get('took')}ms roundtrip={elapsed_ms:.1f}ms")
+    return hits, total
@@ -1,20 +1,17 @@
 # views.py
 import logging
 
-from asgiref.sync import sync_to_async
 from django.core.paginator import Paginator, Page
-from elasticsearch_dsl.query import QueryString
 from telegram import Update
 from telegram.constants import ParseMode
 from telegram.ext import ContextTypes
 
 logger = logging.getLogger(__name__)
 from . import translation
-from .documents import DocumentDocument
 from .keyboard import (build_search_results_keyboard, default_keyboard,
                        language_list_keyboard, restart_keyboard)
 from .models import SearchQuery, User
-from apps.multiparser.models import Document, Product
+from apps.multiparser.models import Document
 from .utils import (channel_subscribe, get_user,
                     update_or_create_user)
 from telegram.error import TelegramError
@@ -133,9 +130,8 @@ async def share_bot_handler(update: Update, context: ContextTypes.DEFAULT_TYPE,
 # apps/bot/views.py
 
 # ...importlar...
-from elasticsearch_dsl import Q  # <-- Q obyektini import qilamiz
+from .search import PAGE_SIZE, search_documents
 
-FIFTY_MB_IN_BYTES = 50 * 1024 * 1024
 
 @channel_subscribe
 @get_user
@@ -144,40 +140,11 @@ async def main_text_handler(update: Update, context: ContextTypes.DEFAULT_TYPE,
     print("text: ", text)
     search_mode = context.user_data.get('default_search_mode', 'normal')
     page_number = 1
-    page_size = 10
+    page_size = PAGE_SIZE
     print("search_mode: ", search_mode)
 
-    # 🔎 Deep yoki normal qidiruv
-    # Build a combined query: boosted exact phrase matches first, then fuzzy/similar matches.
-    # Exact phrase has higher boost so will appear earlier in results; fuzzy clause ensures
-    # we still return similar documents when exact phrase not present.
-    if search_mode == 'deep':
-        exact_fields = ["product_title^10", "product_slug^8", "content^6"]
-        fuzzy_fields = ["product_title^5", "product_slug^4", "content^3"]
-    else:
-        exact_fields = ["product_title^10", "product_slug^8"]
-        fuzzy_fields = ["product_title^5", "product_slug^4"]
-
-    exact_clause = Q("multi_match", query=text, fields=exact_fields, type="phrase", boost=5)
-    fuzzy_clause = Q("multi_match", query=text, fields=fuzzy_fields, fuzziness="AUTO", boost=1)
-
-    # Combine: at least one should match; exact matches get higher score due to boost
-    q = Q('bool', should=[exact_clause, fuzzy_clause], minimum_should_match=1)
-
-    s = DocumentDocument.search().query(q)
-
-    # --- Filtrlash mantiqi ---
-    filter_query = Q(
-        'bool',
-        should=[
-            Q('range', file_size_bytes={'lte': FIFTY_MB_IN_BYTES}),
-            Q('term', download_status='downloaded')
-        ],
-        minimum_should_match=1
-    )
-    s = s.filter(filter_query)
-
-    total_results = await sync_to_async(s.count)()
+    # 🔎 Deep yoki normal qidiruv (natijalar Redis keshidan olinishi mumkin)
+    hits, total_results = await search_documents(text, search_mode, page_number, page_size)
     if total_results == 0:
         await SearchQuery.objects.acreate(
             user=user, query_text=text, found_results=False, is_deep_search=(search_mode == 'deep')
@@ -185,13 +152,6 @@ async def main_text_handler(update: Update, context: ContextTypes.DEFAULT_TYPE,
         await update.message.reply_text(translation.search_no_results[language].format(query=text))
         return
 
-    # Paginatsiya
-    start_index = (page_number - 1) * page_size
-    end_index = start_index + page_size
-    search_results = await sync_to_async(lambda: s[start_index:end_index].execute())()
-
-    all_files_ids = [hit.meta.id for hit in search_results]
-
     await SearchQuery.objects.acreate(
         user=user, query_text=text, found_results=True, is_deep_search=(search_mode == 'deep')
     )
@@ -199,16 +159,10 @@ async def main_text_handler(update: Update, context: ContextTypes.DEFAULT_TYPE,
     context.user_data['last_search_query'] = text
 
     paginator = Paginator(range(total_results), page_size)
-    page_obj = Page(all_files_ids, page_number, paginator)
-
-    files_from_db = await sync_to_async(list)(
-        Product.objects.filter(document_id__in=page_obj.object_list).select_related('document')
-    )
-    files_map = {str(product.document.id): product for product in files_from_db}
-    products_on_page = [files_map[doc_id] for doc_id in all_files_ids if doc_id in files_map]
+    page_obj = Page(hits, page_number, paginator)
 
     response_text = translation.search_results_found[language].format(query=text, count=total_results)
-    reply_markup = build_search_results_keyboard(page_obj, products_on_page, search_mode, language)
+    reply_markup = build_search_results_keyboard(page_obj, search_mode, language)
     await update.message.reply_text(response_text, reply_markup=reply_markup)
 
 
@@ -216,7 +170,7 @@ async def main_text_handler(update: Update, context: ContextTypes.DEFAULT_TYPE,
 async def handle_search_pagination(update: Update, context: ContextTypes.DEFAULT_TYPE, user: User, language: str):
     query = update.callback_query
     await query.answer()
-    page_size = 10
+    page_size = PAGE_SIZE
 
     query_text = context.user_data.get('last_search_query')
     if not query_text:
@@ -226,53 +180,14 @@ async def handle_search_pagination(update: Update, context: ContextTypes.DEFAULT
     _, search_mode, page_number_str = query.data.split('_')
     page_number = int(page_number_str)
 
-    # 🔎 Deep yoki normal qidiruv
-    if search_mode == 'deep':
-        exact_fields = ["product_title^10", "product_slug^8", "content^6"]
-        fuzzy_fields = ["product_title^5", "product_slug^4", "content^3"]
-    else:
-        exact_fields = ["product_title^10", "product_slug^8"]
-        fuzzy_fields = ["product_title^5", "product_slug^4"]
-
-    exact_clause = Q("multi_match", query=query_text, fields=exact_fields, type="phrase", boost=5)
-    fuzzy_clause = Q("multi_match", query=query_text, fields=fuzzy_fields, fuzziness="AUTO", boost=1)
-
-    # Combine: at least one should match; exact matches get higher score due to boost
-    q = Q('bool', should=[exact_clause, fuzzy_clause], minimum_should_match=1)
-
-    s = DocumentDocument.search().query(q)
-
-    # --- Filtrlash mantiqi ---
-    filter_query = Q(
-        'bool',
-        should=[
-            Q('range', file_size_bytes={'lte': FIFTY_MB_IN_BYTES}),
-            Q('term', download_status='downloaded')
-        ],
-        minimum_should_match=1
-    )
-    s = s.filter(filter_query)
-
-    total_results = await sync_to_async(s.count)()
-
-    # Paginatsiya
-    start_index = (page_number - 1) * page_size
-    end_index = start_index + page_size
-    search_results = await sync_to_async(lambda: s[start_index:end_index].execute())()
-
-    all_files_ids = [hit.meta.id for hit in search_results]
+    # 🔎 Sahifa almashtirish odatda keshdan javob oladi
+    hits, total_results = await search_documents(query_text, search_mode, page_number, page_size)
 
     paginator = Paginator(range(total_results), page_size)
-    page_obj = Page(all_files_ids, page_number, paginator)
-
-    files_from_db = await sync_to_async(list)(
-        Product.objects.filter(document_id__in=page_obj.object_list).select_related('document')
-    )
-    files_map = {str(product.document.id): product for product in files_from_db}
-    products_on_page = [files_map[doc_id] for doc_id in all_files_ids if doc_id in files_map]
+    page_obj = Page(hits, page_number, paginator)
 
     response_text = translation.search_results_found[language].format(query=query_text, count=total_results)
-    reply_markup = build_search_results_keyboard(page_obj, products_on_page, search_mode, language)
+    reply_markup = build_search_results_keyboard(page_obj, search_mode, language)
     await query.edit_message_text(text=response_text, reply_markup=reply_markup)
 
 
@@ -4,7 +4,8 @@ from django.urls import reverse
 
 # Import bot models only
 from apps.bot.models import User, SubscribeChannel, Location, SearchQuery, Broadcast
-from apps.multiparser.models import Seller, Document, Product, ProductView
+from apps.multiparser.content import document_text
+from apps.multiparser.models import Seller, Document, Product, ProductView, PipelineState
 
 
 class CustomAdminSite(admin.AdminSite):
@@ -115,9 +116,10 @@ class DocumentAdmin(admin.ModelAdmin):
     readonly_fields = [
         'id', 'created_at', 'updated_at',
         'download_started_at', 'download_completed_at',
-        'telegram_file_id', 'file_id', 'sent_at'
+        'telegram_file_id', 'file_id', 'sent_at', 'blob', 'parsed_content_preview'
     ]
     inlines = [ProductInline]
+    actions = ['resend_skipped']
     list_per_page = 25
 
     fieldsets = (
@@ -132,8 +134,9 @@ class DocumentAdmin(admin.ModelAdmin):
             'fields': (
                 'download_status', 'download_started_at',
                 'download_completed_at', 'download_error',
-                'file_url', 'file_path', 'file_upload',
-                'short_content_url', 'content_duration','parsed_content'
+                'file_url', 'file_path', 'blob', 'file_upload',
+                'remote_etag', 'remote_content_length', 'remote_last_modified',
+                'short_content_url', 'content_duration', 'parsed_content_preview', 'content_truncated'
             ),
             'classes': ('collapse',)
         }),
@@ -193,6 +196,25 @@ class DocumentAdmin(admin.ModelAdmin):
         return format_html('<span style="color: #6c757d;">❌ Not Downloaded</span>')
     file_path_display.short_description = 'Local File'
 
+    def parsed_content_preview(self, obj):
+        """Matnning boshi - faqat tahrirlash sahifasida, alohida jadvaldan o'qiladi"""
+        text = document_text(obj)
+        if not text:
+            return format_html('<span style="color: #6c757d;">❌ Not Parsed</span>')
+        return format_html(
+            '<div style="white-space: pre-wrap; max-height: 300px; overflow: auto;">{}</div>'
+            '<small>{} chars</small>',
+            text[:5000], len(text)
+        )
+    parsed_content_preview.short_description = 'Parsed Content'
+
+    @admin.action(description="Resend skipped (oversized) files to Telegram")
+    def resend_skipped(self, request, queryset):
+        from apps.multiparser.tasks import resend_skipped_documents
+
+        queued, too_large = resend_skipped_documents(queryset)
+        self.message_user(request, f"{queued} documents were requeued, {too_large} are still over the upload limit.")
+
     def has_delete_permission(self, request, obj=None):
         """Prevent deletion if linked to product"""
         if obj and hasattr(obj, 'product'):
@@ -244,6 +266,27 @@ class ProductAdmin(admin.ModelAdmin):
     discount_percentage.short_description = 'Discount %'
 
 
+class PipelineStateAdmin(admin.ModelAdmin):
+    """Hujjatlarning pipeline bosqichi va lease holati"""
+    list_display = ['document', 'stage', 'attempts', 'lease_owner', 'lease_expires_at', 'heartbeat_at', 'updated_at']
+    list_filter = ['stage']
+    search_fields = ['document__id', 'lease_owner', 'last_error']
+    readonly_fields = ['document', 'attempts', 'lease_owner', 'lease_expires_at', 'heartbeat_at', 'last_error',
+                       'updated_at']
+    actions = ['resume_pipeline']
+    list_per_page = 25
+
+    @admin.action(description="Resume pipeline (failed documents restart from download)")
+    def resume_pipeline(self, request, queryset):
+        from apps.multiparser.tasks import process_document
+
+        resumed = 0
+        for document_id, stage in queryset.exclude(stage='done').values_list('document_id', 'stage'):
+            process_document(document_id, stage='download' if stage == 'failed' else stage)
+            resumed += 1
+        self.message_user(request, f"{resumed} documents were requeued.")
+
+
 class ProductViewAdmin(admin.ModelAdmin):
     """Admin interface for ProductView model"""
     list_display = ['id', 'product', 'ip_address', 'viewed_at']
@@ -305,3 +348,4 @@ admin.site.register(Seller, SellerAdmin)
 admin.site.register(Document, DocumentAdmin)
 admin.site.register(Product, ProductAdmin)
 admin.site.register(ProductView, ProductViewAdmin)
+admin.site.register(PipelineState, PipelineStateAdmin)
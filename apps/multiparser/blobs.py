@@ -0,0 +1,112 @@
+# apps/multiparser/blobs.py
+
+import logging
+import os
+from pathlib import Path
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from .content import copy_content
+from .models import Blob, Document
+
+# --- Logger ---
+logger = logging.getLogger(__name__)
+
+PARSE_FULL_TIER = getattr(settings, "PARSE_FULL_TIER", False)
+
+
+def blob_file_path(blob):
+    return Path(settings.MEDIA_ROOT) / blob.relative_path
+
+
+def attach_blob(document_id, result, file_type):
+    """
+    Yuklangan faylni SHA-256 bo'yicha blob omboriga joylaydi va hujjatga bog'laydi.
+
+    Xuddi shu baytlar avval saqlangan bo'lsa, yangi nusxa o'chiriladi va
+    mavjud blob fayli ishlatiladi. Blob qatori qulflanadi, shunda parallel
+    ``release_blob`` faylni ayni paytda o'chirib yubormaydi.
+    """
+    blob, created = Blob.objects.get_or_create(
+        sha256=result.sha256,
+        defaults={"size": result.size, "file_type": file_type}
+    )
+
+    with transaction.atomic():
+        blob = Blob.objects.select_for_update().get(sha256=blob.sha256)
+        Document.objects.filter(id=document_id).update(blob=blob, file_path=blob.relative_path)
+
+        target = blob_file_path(blob)
+        if target.exists():
+            os.remove(result.path)
+            logger.info(f"[Blob] Duplicate content for {document_id}, reusing {blob.sha256[:12]}")
+        else:
+            target.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(result.path, target)
+            logger.info(f"[Blob] Stored {blob.sha256[:12]} ({blob.size} bytes) for {document_id}")
+    return blob
+
+
+def reuse_processed_state(document_id, blob):
+    """
+    Shu blob'ga ega, allaqachon qayta ishlangan boshqa hujjatdan parse qilingan matn
+    va Telegram ``file_id`` ni ko'chiradi. Shundan keyin Parse va Telegram
+    bosqichlari hujjatni tayyor deb hisoblab o'tkazib yuboradi. Faqat qisman
+    matn topilsa, bu hujjat uchun ham to'liq parse navbatga qo'yiladi.
+    """
+    siblings = Document.objects.filter(blob=blob).exclude(id=document_id)
+    updates = {}
+
+    # To'liq matnli qo'shni birinchi tanlanadi
+    parsed = (siblings.filter(content__isnull=False).order_by("content_truncated")
+              .values("id", "content_truncated").first())
+    if parsed and copy_content(parsed["id"], document_id):
+        updates["content_truncated"] = parsed["content_truncated"]
+
+    sent = siblings.filter(telegram_status="sent", file_id__isnull=False).values("file_id", "sent_at").first()
+    if sent:
+        updates.update(
+            file_id=sent["file_id"],
+            telegram_file_id=sent["file_id"],
+            telegram_status="sent",
+            sent_at=sent["sent_at"],
+            sent_to_channel=True
+        )
+
+    if updates:
+        Document.objects.filter(id=document_id).update(**updates)
+        logger.info(f"[Blob] Reused {', '.join(sorted(updates))} for {document_id} from blob {blob.sha256[:12]}")
+        if updates.get("content_truncated") and PARSE_FULL_TIER:
+            from .tasks import enqueue_full_parse  # tasks blobs'ni import qiladi
+            enqueue_full_parse(document_id)
+    return updates
+
+
+def release_blob(document):
+    """
+    Hujjatning blob faylini, boshqa hech bir hujjatga kerak bo'lmasa, o'chiradi.
+
+    Blob hali Parse/Index/Telegram bosqichini yoki to'liq parse'ni tugatmagan
+    boshqa hujjatga kerak bo'lsa, fayl diskda qoldiriladi - oxirgi hujjat uni o'chiradi.
+    Qaytaradi: fayl o'chirildimi.
+    """
+    with transaction.atomic():
+        blob = Blob.objects.select_for_update().get(sha256=document.blob_id)
+        pending = ~Q(is_indexed=True, telegram_status="sent")
+        if PARSE_FULL_TIER:
+            # To'liq parse hali faylni o'qishi kerak
+            pending |= Q(content_truncated=True)
+        still_needed = (
+            Document.objects.filter(pending, blob=blob, delete_from_server=False)
+            .exclude(id=document.id)
+            .exists()
+        )
+        if still_needed:
+            logger.info(f"[Blob] Keeping {blob.sha256[:12]}, still needed by other documents")
+            return False
+
+        path = blob_file_path(blob)
+        if path.exists():
+            os.remove(path)
+    return True
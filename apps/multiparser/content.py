@@ -0,0 +1,96 @@
+# apps/multiparser/content.py
+
+import hashlib
+import logging
+import zlib
+
+from django.conf import settings
+
+from .models import Document, DocumentContent
+
+try:
+    import zstandard
+except ImportError:  # ixtiyoriy paket - yo'q bo'lsa zlib ishlatiladi
+    zstandard = None
+
+# --- Logger ---
+logger = logging.getLogger(__name__)
+
+CONTENT_COMPRESSION = getattr(settings, "CONTENT_COMPRESSION", "zlib")
+CONTENT_COMPRESSION_LEVEL = getattr(settings, "CONTENT_COMPRESSION_LEVEL", 6)
+
+if CONTENT_COMPRESSION == "zstd" and zstandard is None:
+    logger.warning("[Content] CONTENT_COMPRESSION=zstd but 'zstandard' is not installed, using zlib")
+    CONTENT_COMPRESSION = "zlib"
+
+
+def content_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def compress_text(text, codec=CONTENT_COMPRESSION):
+    raw = text.encode("utf-8")
+    if codec == "zstd":
+        return zstandard.ZstdCompressor(level=CONTENT_COMPRESSION_LEVEL).compress(raw)
+    return zlib.compress(raw, CONTENT_COMPRESSION_LEVEL)
+
+
+def decompress_text(data, codec):
+    data = bytes(data)
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstd-compressed content requires the 'zstandard' package")
+        return zstandard.ZstdDecompressor().decompress(data).decode("utf-8")
+    return zlib.decompress(data).decode("utf-8")
+
+
+def document_text(document):
+    """
+    Hujjat matni yoki "". ``select_related("content")`` bilan olingan bo'lsa
+    qo'shimcha so'rov bo'lmaydi - indexer shunday o'qiydi.
+    """
+    try:
+        content = document.content
+    except DocumentContent.DoesNotExist:
+        return ""
+    return decompress_text(content.data, content.codec)
+
+
+def has_content(document_id):
+    return DocumentContent.objects.filter(document_id=document_id).exists()
+
+
+def save_content(document_id, text, truncated=False):
+    """
+    Matnni siqib saqlaydi va ``Document.content_truncated`` ni yangilaydi.
+    Matn o'zgarmagan bo'lsa (xesh bir xil) qayta yozilmaydi. O'zgarganini qaytaradi.
+    """
+    digest = content_hash(text)
+    Document.objects.filter(id=document_id).update(content_truncated=truncated)
+    if DocumentContent.objects.filter(document_id=document_id, content_hash=digest).exists():
+        return False
+
+    data = compress_text(text)
+    DocumentContent.objects.update_or_create(
+        document_id=document_id,
+        defaults={"codec": CONTENT_COMPRESSION, "data": data, "length": len(text), "content_hash": digest}
+    )
+    logger.info(f"[Content] Stored {len(text)} chars for {document_id} as {len(data)} bytes ({CONTENT_COMPRESSION})")
+    return True
+
+
+def copy_content(source_id, document_id):
+    """Siqilgan matnni boshqa hujjatdan qayta siqmasdan nusxalaydi. Topilsa True."""
+    source = DocumentContent.objects.filter(document_id=source_id).first()
+    if source is None:
+        return False
+    DocumentContent.objects.update_or_create(
+        document_id=document_id,
+        defaults={"codec": source.codec, "data": source.data, "length": source.length,
+                  "content_hash": source.content_hash}
+    )
+    return True
+
+
+def delete_content(document_id):
+    DocumentContent.objects.filter(document_id=document_id).delete()
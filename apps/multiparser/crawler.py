@@ -0,0 +1,251 @@
+# apps/multiparser/crawler.py
+
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from pathlib import Path
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# --- Logger ---
+logger = logging.getLogger(__name__)
+
+# --- Crawler sozlamalari ---
+CRAWLER_WORKERS = getattr(settings, "CRAWLER_WORKERS", 4)
+CRAWLER_RATE = getattr(settings, "CRAWLER_RATE", 2.0)  # sahifa/soniya
+CRAWLER_CHECKPOINT_PATH = getattr(settings, "CRAWLER_CHECKPOINT_PATH",
+                                  Path(settings.BASE_DIR) / "parser_checkpoint.json")
+
+# Fetcher katalog oxiriga yetganini bildiradi
+END_OF_CATALOG = object()
+
+
+class CrawlAborted(Exception):
+    """Davom etib bo'lmaydigan xato (masalan, API manzili eskirgan)."""
+
+
+class TokenBucket:
+    """
+    Oddiy thread-safe token bucket: o'rtacha ``rate`` so'rov/soniya,
+    ``capacity`` gacha portlash. Qat'iy sleep'lar o'rnida ishlatiladi.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(1.0, rate))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class CrawlCheckpoint:
+    """
+    Tugallangan sahifalarni JSON faylda saqlaydi. ``watermark`` - shu
+    sahifagacha hammasi tugallangan; undan keyingi tugallanganlar ``done``da.
+    Har yozuv vaqtinchalik faylga yozilib ``os.replace`` bilan almashtiriladi.
+    """
+
+    def __init__(self, path, start_page, end_page):
+        # path=None - holat faqat xotirada (masalan, incremental crawl uchun)
+        self.path = Path(path) if path else None
+        self.start_page = start_page
+        self.end_page = end_page
+        self.watermark = start_page - 1
+        self.done = set()
+        self.last_page = None
+        self.lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        checkpoint = cls(path, data["start_page"], data["end_page"])
+        checkpoint.watermark = data["watermark"]
+        checkpoint.done = set(data.get("done", []))
+        checkpoint.last_page = data.get("last_page")
+        return checkpoint
+
+    def pending_pages(self):
+        last = min(self.end_page, self.last_page) if self.last_page else self.end_page
+        return [page for page in range(self.watermark + 1, last + 1) if page not in self.done]
+
+    def mark_done(self, page):
+        with self.lock:
+            self.done.add(page)
+            while self.watermark + 1 in self.done:
+                self.watermark += 1
+                self.done.discard(self.watermark)
+            self._save()
+
+    def mark_end(self, page):
+        with self.lock:
+            self.last_page = page if self.last_page is None else min(self.last_page, page)
+            self._save()
+
+    def is_complete(self):
+        last = min(self.end_page, self.last_page) if self.last_page else self.end_page
+        return self.watermark >= last
+
+    def clear(self):
+        if self.path and self.path.exists():
+            self.path.unlink()
+
+    def _save(self):
+        if self.path is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "start_page": self.start_page,
+                "end_page": self.end_page,
+                "watermark": self.watermark,
+                "done": sorted(self.done),
+                "last_page": self.last_page,
+            }, f)
+        os.replace(tmp_path, self.path)
+
+
+def make_crawler_session(pool_size):
+    session = requests.Session()
+    retry = Retry(
+        total=5,
+        backoff_factor=1,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset(['GET'])
+    )
+    adapter = HTTPAdapter(max_retries=retry, pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+class CatalogCrawler:
+    """
+    Producer/consumer crawler.
+
+    ``workers`` ta fetcher thread sahifalarni token bucket tezligida yuklab,
+    cheklangan navbatga qo'yadi; chaqiruvchi thread (consumer) navbatdan olib
+    ``handle_page(page, items)`` ni chaqiradi - barcha DB yozuvlari shu
+    yagona stage'da bo'ladi. ``fetch_page(session, page)`` elementlar
+    ro'yxatini, katalog tugaganda esa bo'sh ro'yxat qaytaradi.
+    """
+
+    def __init__(self, fetch_page, handle_page, checkpoint, workers=CRAWLER_WORKERS, rate=CRAWLER_RATE):
+        self.fetch_page = fetch_page
+        self.handle_page = handle_page
+        self.checkpoint = checkpoint
+        self.workers = workers
+        self.bucket = TokenBucket(rate)
+        self.session = make_crawler_session(workers)
+        self.results = queue.Queue(maxsize=workers * 2)
+        self.stop = threading.Event()
+        self.no_more_pages = threading.Event()
+        self.failed_pages = []
+
+    def stop_fetching(self):
+        """Yangi sahifalar olinmaydi; allaqachon yuklanayotganlari oxirigacha qayta ishlanadi."""
+        self.no_more_pages.set()
+
+    def run(self):
+        pages = iter(self.checkpoint.pending_pages())
+        pages_lock = threading.Lock()
+
+        def next_page():
+            with pages_lock:
+                return next(pages, None)
+
+        fetchers = [
+            threading.Thread(target=self._fetch_loop, args=(next_page,), name=f"crawler-fetch-{n}", daemon=True)
+            for n in range(self.workers)
+        ]
+        for thread in fetchers:
+            thread.start()
+
+        try:
+            self._consume(fetchers)
+        finally:
+            self.stop.set()
+        return self.failed_pages
+
+    def _fetch_loop(self, next_page):
+        while not self.stop.is_set() and not self.no_more_pages.is_set():
+            page = next_page()
+            if page is None:
+                break
+            last_page = self.checkpoint.last_page
+            if last_page is not None and page > last_page:
+                break
+
+            self.bucket.acquire()
+            try:
+                items = self.fetch_page(self.session, page)
+            except CrawlAborted as e:
+                self.no_more_pages.set()
+                self._put((page, e))
+                break
+            except Exception as e:
+                self._put((page, e))
+                continue
+
+            if not items:
+                self.checkpoint.mark_end(page - 1)
+                self._put((page, END_OF_CATALOG))
+                break
+            self._put((page, items))
+
+    def _put(self, entry):
+        # Consumer to'xtaganda fetcher navbatda abadiy bloklanib qolmasligi uchun
+        while not self.stop.is_set():
+            try:
+                self.results.put(entry, timeout=1)
+                return
+            except queue.Full:
+                continue
+
+    def _consume(self, fetchers):
+        while any(thread.is_alive() for thread in fetchers) or not self.results.empty():
+            try:
+                page, payload = self.results.get(timeout=1)
+            except queue.Empty:
+                continue
+
+            if payload is END_OF_CATALOG:
+                logger.info(f"[Crawler] End of catalog at page {page}")
+                continue
+            if isinstance(payload, CrawlAborted):
+                raise payload
+            if isinstance(payload, Exception):
+                logger.error(f"[Crawler] Page {page} failed: {payload}")
+                self.failed_pages.append(page)
+                continue
+
+            last_page = self.checkpoint.last_page
+            if last_page is not None and page > last_page:
+                continue
+
+            try:
+                self.handle_page(page, payload)
+            except Exception as e:
+                logger.error(f"[Crawler] Page {page} could not be saved: {e}")
+                self.failed_pages.append(page)
+                continue
+            self.checkpoint.mark_done(page)
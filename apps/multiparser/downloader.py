@@ -0,0 +1,258 @@
+# apps/multiparser/downloader.py
+
+import hashlib
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# --- Logger ---
+logger = logging.getLogger(__name__)
+
+# --- Download engine sozlamalari ---
+DOWNLOAD_CHUNK_SIZE = getattr(settings, "DOWNLOAD_CHUNK_SIZE", 1024 * 1024)
+DOWNLOAD_POOL_SIZE = getattr(settings, "DOWNLOAD_POOL_SIZE", 16)
+DOWNLOAD_PER_HOST_LIMIT = getattr(settings, "DOWNLOAD_PER_HOST_LIMIT", 4)
+DOWNLOAD_RESUME_ATTEMPTS = getattr(settings, "DOWNLOAD_RESUME_ATTEMPTS", 5)
+# Bitta download_to_path chaqiruvining umumiy vaqti - threads/gevent pool Celery time limit'ini qo'llamaydi
+DOWNLOAD_TIME_LIMIT = getattr(settings, "DOWNLOAD_TIME_LIMIT", 1800)
+DOWNLOAD_TIMEOUT = (10, 180)  # (connect, read)
+
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+
+_host_semaphores = {}
+_host_lock = threading.Lock()
+
+
+class DownloadError(Exception):
+    pass
+
+
+@dataclass
+class DownloadResult:
+    path: Path
+    size: int
+    sha256: str
+    resumed_from: int
+    elapsed: float
+    etag: str = None
+    last_modified: datetime = None
+
+
+@dataclass
+class RemoteMetadata:
+    etag: str
+    content_length: int
+    last_modified: datetime
+
+
+def get_session():
+    """
+    One pooled ``requests.Session`` per worker process.
+
+    Celery prefork children inherit module state from the parent, so the
+    session is recreated when the pid changes instead of sharing sockets
+    across forks.
+    """
+    global _session, _session_pid
+    with _session_lock:
+        if _session is None or _session_pid != os.getpid():
+            session = requests.Session()
+            retry = Retry(
+                total=3,
+                connect=3,
+                read=3,
+                backoff_factor=0.5,
+                status_forcelist=(429, 500, 502, 503, 504),
+                allowed_methods=frozenset(['GET', 'HEAD'])
+            )
+            adapter = HTTPAdapter(max_retries=retry, pool_connections=DOWNLOAD_POOL_SIZE,
+                                  pool_maxsize=DOWNLOAD_POOL_SIZE)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _session, _session_pid = session, os.getpid()
+        return _session
+
+
+@contextmanager
+def host_slot(url, limit=DOWNLOAD_PER_HOST_LIMIT):
+    """Limit concurrent downloads per origin host inside this process."""
+    host = urlsplit(url).netloc
+    with _host_lock:
+        semaphore = _host_semaphores.setdefault(host, threading.BoundedSemaphore(limit))
+    with semaphore:
+        yield
+
+
+def _parse_http_date(value):
+    try:
+        return parsedate_to_datetime(value) if value else None
+    except (TypeError, ValueError):
+        return None
+
+
+def fetch_remote_metadata(url):
+    """
+    Arzon HEAD so'rovi: ETag, Content-Length va Last-Modified.
+    Fayl manbada bo'lmasa (403/404/410 - CloudFront/S3) None qaytaradi.
+    """
+    with host_slot(url):
+        response = get_session().head(url, allow_redirects=True, timeout=DOWNLOAD_TIMEOUT)
+    if response.status_code in (403, 404, 410):
+        return None
+    response.raise_for_status()
+    length = response.headers.get("Content-Length")
+    return RemoteMetadata(
+        etag=response.headers.get("ETag"),
+        content_length=int(length) if length and length.isdigit() else None,
+        last_modified=_parse_http_date(response.headers.get("Last-Modified")),
+    )
+
+
+def _content_total(response, offset):
+    """Total file size from Content-Range (206) or Content-Length (200)."""
+    content_range = response.headers.get("Content-Range", "")
+    if "/" in content_range:
+        total = content_range.rsplit("/", 1)[1]
+        return int(total) if total.isdigit() else None
+    length = response.headers.get("Content-Length")
+    return offset + int(length) if length and length.isdigit() else None
+
+
+def _hash_file(path, chunk_size=DOWNLOAD_CHUNK_SIZE):
+    """SHA-256 of an existing ``.part`` prefix, so a resumed download keeps one digest."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest
+
+
+def _range_validator(headers):
+    """``If-Range`` uchun validator: kuchli ETag, bo'lmasa Last-Modified."""
+    etag = headers.get("ETag")
+    if etag and not etag.startswith("W/"):
+        return etag
+    return headers.get("Last-Modified")
+
+
+def download_to_path(url, dest_path, chunk_size=DOWNLOAD_CHUNK_SIZE, attempts=DOWNLOAD_RESUME_ATTEMPTS,
+                     time_limit=DOWNLOAD_TIME_LIMIT):
+    """
+    Stream ``url`` into ``dest_path`` through a ``.part`` file.
+
+    An interrupted transfer keeps its ``.part`` file and continues with an
+    HTTP ``Range`` request, both within this call and on the next task
+    retry. The ETag (or Last-Modified) of the response that started the
+    ``.part`` is kept next to it and sent as ``If-Range``; if the remote file
+    has changed since, the ``.part`` is discarded and the download restarts.
+    The final file appears atomically via ``os.replace``. The SHA-256 digest
+    is computed from the streamed chunks. All attempts together get
+    ``time_limit`` seconds; past it ``DownloadError`` is raised and the
+    ``.part`` file is kept for the next retry.
+    """
+    dest_path = Path(dest_path)
+    part_path = dest_path.with_name(dest_path.name + ".part")
+    validator_path = dest_path.with_name(dest_path.name + ".part.validator")
+    dest_path.parent.mkdir(parents=True, exist_ok=True)
+
+    session = get_session()
+    started = time.monotonic()
+    deadline = started + time_limit
+    resumed_from = part_path.stat().st_size if part_path.exists() else 0
+    last_error = None
+    digest = None
+    headers = {}
+
+    for attempt in range(1, attempts + 1):
+        offset = part_path.stat().st_size if part_path.exists() else 0
+        validator = validator_path.read_text() if validator_path.exists() else None
+        if offset and not validator:
+            # Qaysi versiyadan ekanini bilmaymiz - eski prefiksga yangi baytlar qo'shilmasin
+            part_path.unlink()
+            offset = 0
+        request_headers = {"Range": f"bytes={offset}-", "If-Range": validator} if offset else {}
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise DownloadError(f"Download exceeded {time_limit}s at {offset} bytes: {last_error}")
+        timeout = (DOWNLOAD_TIMEOUT[0], min(DOWNLOAD_TIMEOUT[1], remaining))
+        try:
+            with host_slot(url), session.get(url, stream=True, timeout=timeout,
+                                             headers=request_headers) as r:
+                headers = r.headers
+                if r.status_code == 416 and offset:
+                    # So'ralgan diapazon fayl oxiridan keyin - .part allaqachon to'liq
+                    total = _content_total(r, offset)
+                    if total is None or total == offset:
+                        digest = None
+                        break
+                    part_path.unlink()
+                    continue
+                r.raise_for_status()
+
+                if offset and r.status_code == 206 and _range_validator(r.headers) not in (None, validator):
+                    # Server If-Range'ni e'tiborsiz qoldirdi, fayl esa o'zgargan - .part yaroqsiz
+                    logger.warning(f"[Download] Remote file changed for {url}, restarting from zero")
+                    part_path.unlink()
+                    continue
+                if offset and r.status_code != 206:
+                    # Server Range'ni qo'llab-quvvatlamadi yoki fayl o'zgargan (If-Range) - boshidan yozamiz
+                    offset = 0
+                if not offset:
+                    new_validator = _range_validator(r.headers)
+                    if new_validator:
+                        validator_path.write_text(new_validator)
+                    else:
+                        validator_path.unlink(missing_ok=True)
+                total = _content_total(r, offset)
+                digest = _hash_file(part_path) if offset else hashlib.sha256()
+
+                with open(part_path, "ab" if offset else "wb") as f:
+                    for chunk in r.iter_content(chunk_size=chunk_size):
+                        f.write(chunk)
+                        digest.update(chunk)
+                        if time.monotonic() > deadline:
+                            raise DownloadError(f"Download exceeded {time_limit}s")
+
+            size = part_path.stat().st_size
+            if total is not None and size != total:
+                raise DownloadError(f"Incomplete download: {size} of {total} bytes")
+            break
+        except (requests.ConnectionError, requests.Timeout,
+                requests.exceptions.ChunkedEncodingError, DownloadError) as e:
+            last_error = e
+            logger.warning(f"[Download] Attempt {attempt}/{attempts} interrupted for {url}: {e}")
+            if attempt < attempts:
+                time.sleep(max(0, min(2 ** attempt, 30, deadline - time.monotonic())))
+    else:
+        raise DownloadError(f"Download failed after {attempts} attempts: {last_error}")
+
+    if digest is None:
+        # .part avvalgi urinishda to'liq yuklangan (416) - xeshni fayldan hisoblaymiz
+        digest = _hash_file(part_path)
+
+    os.replace(part_path, dest_path)
+    validator_path.unlink(missing_ok=True)
+    return DownloadResult(
+        path=dest_path,
+        size=dest_path.stat().st_size,
+        sha256=digest.hexdigest(),
+        resumed_from=resumed_from,
+        elapsed=time.monotonic() - started,
+        etag=headers.get("ETag"),
+        last_modified=_parse_http_date(headers.get("Last-Modified")),
+    )
+
@@ -0,0 +1,220 @@
+# apps/multiparser/extractors.py
+
+import codecs
+import logging
+import re
+import zipfile
+from pathlib import Path
+from xml.etree.ElementTree import iterparse
+
+from django.conf import settings
+
+# --- Logger ---
+logger = logging.getLogger(__name__)
+
+# Bitta OOXML faylidan o'qiladigan XML'ning ochilgan (decompressed) umumiy hajmi - zip-bomb himoyasi
+EXTRACTOR_MAX_XML_BYTES = getattr(settings, "EXTRACTOR_MAX_XML_BYTES", 256 * 1024 * 1024)
+
+# OOXML nom fazolari
+W_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+A_NS = "{http://schemas.openxmlformats.org/drawingml/2006/main}"
+S_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+
+# Oddiy matndan faqat shuncha bayt o'qiladi: UTF-8'da bitta belgi 4 baytgacha,
+# +1 belgi esa cap_text matn kesilganini sezishi uchun
+PLAIN_TEXT_MAX_BYTES = (getattr(settings, "PARSE_MAX_CHARS", 200_000) + 1) * 4
+# Sahifa/slayd chegarasi - indeksatorda sarlavha/pastki qismlarni aniqlash uchun
+PAGE_BREAK = "\f"
+
+_registry = {}
+
+
+class ExtractionError(Exception):
+    pass
+
+
+class BoundedArchive:
+    """
+    OOXML arxivi: ``open()`` orqali o'qilgan a'zolarning ochilgan hajmi
+    birgalikda ``limit`` bilan cheklanadi. E'lon qilingan ``file_size``
+    oldindan tekshiriladi, haqiqiy hajm esa o'qish paytida sanaladi -
+    sarlavhasi yolg'on zip-bomb ham to'xtatiladi.
+    """
+
+    def __init__(self, path, limit=EXTRACTOR_MAX_XML_BYTES):
+        self.path = Path(path)
+        self.remaining = limit
+        self.archive = zipfile.ZipFile(path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.archive.close()
+
+    def namelist(self):
+        return self.archive.namelist()
+
+    def open(self, name):
+        info = self.archive.getinfo(name)
+        if info.file_size > self.remaining:
+            raise ExtractionError(f"{self.path.name}: {name} is {info.file_size} bytes uncompressed, over the limit")
+        return _BoundedStream(self, self.archive.open(info), name)
+
+
+class _BoundedStream:
+    def __init__(self, owner, stream, name):
+        self.owner = owner
+        self.stream = stream
+        self.name = name
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.stream.close()
+
+    def read(self, size=-1):
+        data = self.stream.read(size)
+        self.owner.remaining -= len(data)
+        if self.owner.remaining < 0:
+            raise ExtractionError(f"{self.owner.path.name}: {self.name} exceeds the uncompressed size limit")
+        return data
+
+
+def register(*extensions):
+    """Fayl kengaytmasi uchun mahalliy extractor'ni ro'yxatga oladi."""
+    def decorator(func):
+        for extension in extensions:
+            _registry[extension.lower()] = func
+        return func
+    return decorator
+
+
+def get_extractor(path):
+    return _registry.get(Path(path).suffix.lower())
+
+
+def _numbered_members(archive, pattern):
+    """slide2.xml < slide10.xml bo'lishi uchun raqam bo'yicha tartiblaydi."""
+    regex = re.compile(pattern)
+    members = [(int(match.group(1)), name) for name in archive.namelist() if (match := regex.fullmatch(name))]
+    return [name for _, name in sorted(members)]
+
+
+def _iter_paragraphs(stream, paragraph_tag, text_tag, extra=None):
+    """
+    Paragraf bo'yicha matn: ``text_tag`` bo'laklari yig'iladi, ``paragraph_tag``
+    yopilganda qator chiqariladi. Elementlar darhol tozalanadi.
+    """
+    parts = []
+    for _, elem in iterparse(stream, events=("end",)):
+        if elem.tag == text_tag:
+            parts.append(elem.text or "")
+        elif extra and elem.tag in extra:
+            parts.append(extra[elem.tag])
+        elif elem.tag == paragraph_tag:
+            yield "".join(parts)
+            parts = []
+            elem.clear()
+
+
+@register(".txt")
+def extract_plain_text(path, max_bytes=PLAIN_TEXT_MAX_BYTES):
+    """
+    Oddiy matn: faylning boshidan ``max_bytes`` bayt o'qiladi. Avval qat'iy
+    UTF-8 (BOM bilan yoki BOM'siz); u mos kelmasa Windows-1251 (kirill) -
+    unda faqat 0x98 bayti aniqlanmagan, u ``�`` bilan almashtiriladi.
+    """
+    with open(path, "rb") as f:
+        raw = f.read(max_bytes + 1)
+    truncated = len(raw) > max_bytes
+    raw = raw[:max_bytes]
+    try:
+        # Kesilgan faylda oxirgi to'liqmas UTF-8 ketma-ketligi tashlab yuboriladi
+        return codecs.getincrementaldecoder("utf-8-sig")().decode(raw, final=not truncated)
+    except UnicodeDecodeError:
+        return raw.decode("cp1251", errors="replace")
+
+
+@register(".docx")
+def extract_docx(path):
+    with BoundedArchive(path) as archive:
+        with archive.open("word/document.xml") as stream:
+            lines = _iter_paragraphs(stream, f"{W_NS}p", f"{W_NS}t",
+                                     extra={f"{W_NS}tab": "\t", f"{W_NS}br": "\n"})
+            return "\n".join(lines)
+
+
+@register(".pptx")
+def extract_pptx(path):
+    slides = []
+    with BoundedArchive(path) as archive:
+        for name in _numbered_members(archive, r"ppt/slides/slide(\d+)\.xml"):
+            with archive.open(name) as stream:
+                slides.append("\n".join(_iter_paragraphs(stream, f"{A_NS}p", f"{A_NS}t")))
+    return PAGE_BREAK.join(slides)
+
+
+def _shared_strings(archive):
+    try:
+        stream = archive.open("xl/sharedStrings.xml")
+    except KeyError:
+        return []
+    strings, parts = [], []
+    with stream:
+        for _, elem in iterparse(stream, events=("end",)):
+            if elem.tag == f"{S_NS}t":
+                parts.append(elem.text or "")
+            elif elem.tag == f"{S_NS}si":
+                strings.append("".join(parts))
+                parts = []
+                elem.clear()
+    return strings
+
+
+@register(".xlsx")
+def extract_xlsx(path):
+    sheets = []
+    with BoundedArchive(path) as archive:
+        shared = _shared_strings(archive)
+        for name in _numbered_members(archive, r"xl/worksheets/sheet(\d+)\.xml"):
+            rows, cells = [], []
+            with archive.open(name) as stream:
+                cell_type, value, inline = None, None, []
+                for event, elem in iterparse(stream, events=("start", "end")):
+                    if event == "start":
+                        if elem.tag == f"{S_NS}c":
+                            cell_type, value, inline = elem.get("t"), None, []
+                        continue
+                    if elem.tag == f"{S_NS}v":
+                        value = elem.text
+                    elif elem.tag == f"{S_NS}t":
+                        inline.append(elem.text or "")
+                    elif elem.tag == f"{S_NS}c":
+                        if cell_type == "s" and value is not None and value.isdigit() and int(value) < len(shared):
+                            cells.append(shared[int(value)])
+                        elif cell_type == "inlineStr":
+                            cells.append("".join(inline))
+                        elif value is not None:
+                            cells.append(value)
+                        elem.clear()
+                    elif elem.tag == f"{S_NS}row":
+                        if cells:
+                            rows.append("\t".join(cells))
+                        cells = []
+                        elem.clear()
+            sheets.append("\n".join(rows))
+    return "\n\n".join(sheets)
+
+
+def run_extractor(extractor, path):
+    """
+    Extractor'ni joriy jarayonda ishga tushiradi va har qanday xatoni
+    ``ExtractionError`` ga o'raydi (chaqiruvchi Tika'ga o'tadi). Izolyatsiya
+    va vaqt chegarasi parse vazifasining prefork jarayoni va time limit'idan.
+    """
+    try:
+        return extractor(str(path))
+    except Exception as e:
+        raise ExtractionError(f"{extractor.__name__} failed for {Path(path).name}: {e}") from e
@@ -0,0 +1,279 @@
+# apps/multiparser/indexing.py
+
+import logging
+import re
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from elasticsearch.helpers import streaming_bulk
+
+from .content import document_text
+from .extractors import PAGE_BREAK
+from .models import Document
+from .pipeline import advance_indexed, fail
+
+# --- Logger ---
+logger = logging.getLogger(__name__)
+
+INDEX_NAME = getattr(settings, "ES_INDEX", "documents")
+
+# --- Bulk indexer sozlamalari ---
+INDEX_BUFFER_KEY = "index:buffer"
+INDEX_ATTEMPTS_KEY = "index:attempts"
+INDEX_DUAL_WRITE_KEY = "index:dual_write"
+INDEX_BATCH_SIZE = getattr(settings, "ES_BULK_BATCH_SIZE", 500)
+INDEX_MAX_ATTEMPTS = getattr(settings, "ES_BULK_MAX_ATTEMPTS", 5)
+# Bitta flush'ning umumiy vaqti - threads/gevent pool Celery time limit'ini qo'llamaydi
+INDEX_FLUSH_TIME_LIMIT = getattr(settings, "ES_BULK_FLUSH_TIME_LIMIT", 120)
+
+# --- Indekslanadigan matn siyosati ---
+CONTENT_MAX_CHARS = getattr(settings, "ES_CONTENT_MAX_CHARS", 200_000)
+CONTENT_HEAD_CHARS = getattr(settings, "ES_CONTENT_HEAD_CHARS", 8 * 1024)
+# Shuncha sahifada bir xil o'rinda (boshida/oxirida) turgan qisqa qator sarlavha/pastki qism deb hisoblanadi
+FURNITURE_MIN_REPEATS = getattr(settings, "ES_FURNITURE_MIN_REPEATS", 3)
+# Har sahifaning boshidan va oxiridan tekshiriladigan qatorlar soni
+FURNITURE_EDGE_LINES = 2
+FURNITURE_MAX_LINE_LENGTH = 120
+DIGITS_RE = re.compile(r"\d+")
+
+# Indeks o'zgarganda oshiriladi - bot qidiruv keshi shu raqamga bog'langan
+INDEX_GENERATION_KEY = "search:index_generation"
+INDEX_GENERATION_THROTTLE_KEY = "search:index_generation:throttle"
+# Keshdagi natija baribir shu muddatda eskiradi - flush'lar generatsiyani undan tez-tez oshirmaydi
+SEARCH_CACHE_TTL = getattr(settings, "SEARCH_CACHE_TTL", 300)
+
+
+def bump_index_generation(min_interval=None):
+    """
+    Invalidate every cached search result by moving to a new generation.
+
+    With ``min_interval`` the bump is skipped if another one happened within
+    that many seconds; the skipped changes still show up once the cached
+    entries expire.
+    """
+    if min_interval and not cache.add(INDEX_GENERATION_THROTTLE_KEY, 1, timeout=min_interval):
+        return None
+    try:
+        return cache.incr(INDEX_GENERATION_KEY)
+    except ValueError:
+        cache.set(INDEX_GENERATION_KEY, 1, timeout=None)
+        return 1
+
+
+def normalize_content(text):
+    """Collapse whitespace in parsed text before it is indexed."""
+    return " ".join(str(text).split()) if text else ""
+
+
+def _edge_positions(lines):
+    """Sahifa boshidagi va oxiridagi qatorlar: ``(o'rin, qator indeksi)``."""
+    edge = min(FURNITURE_EDGE_LINES, len(lines))
+    return [(i, i) for i in range(edge)] + [(-1 - i, len(lines) - 1 - i) for i in range(edge)]
+
+
+def strip_page_furniture(text, min_repeats=FURNITURE_MIN_REPEATS):
+    """
+    Drop running headers, footers and page numbers. Pages are split on
+    ``PAGE_BREAK``; a short line is furniture only when the same line sits
+    in the same position (first or last lines of the page) on at least
+    ``min_repeats`` pages. Digits are ignored when comparing, so "Page 3 of
+    10" and "Page 4 of 10" match. Text without page breaks is kept as is.
+    """
+    pages = [[line.strip() for line in page.splitlines() if line.strip()] for page in str(text).split(PAGE_BREAK)]
+    pages = [lines for lines in pages if lines]
+
+    furniture = set()
+    if len(pages) >= min_repeats:
+        seen = Counter()
+        for lines in pages:
+            seen.update({
+                (position, DIGITS_RE.sub("#", lines[i])) for position, i in _edge_positions(lines)
+                if len(lines[i]) <= FURNITURE_MAX_LINE_LENGTH
+            })
+        for page_number, lines in enumerate(pages):
+            furniture.update(
+                (page_number, i) for position, i in _edge_positions(lines)
+                if seen[position, DIGITS_RE.sub("#", lines[i])] >= min_repeats
+            )
+
+    return "\n".join(
+        line for page_number, lines in enumerate(pages)
+        for i, line in enumerate(lines) if (page_number, i) not in furniture
+    )
+
+
+def truncate_words(text, limit):
+    if len(text) <= limit:
+        return text
+    return text[:limit].rsplit(" ", 1)[0]
+
+
+def prepare_content(text, max_chars=CONTENT_MAX_CHARS, head_chars=CONTENT_HEAD_CHARS):
+    """Return ``(content, content_head)`` following the index-time content policy."""
+    if not text:
+        return "", ""
+    content = truncate_words(normalize_content(strip_page_furniture(text)), max_chars)
+    return content, truncate_words(content, head_chars)
+
+
+def build_index_body(document):
+    """
+    Build the Elasticsearch body for a single Document row.
+
+    This is the only place the index document is assembled: both
+    ``DocumentDocument`` (search_index / signals) and the Celery bulk indexer
+    use it. The text comes from the compressed ``DocumentContent`` row, so
+    indexing never needs the local file or Tika. Callers should
+    ``select_related("content")`` to avoid a query per document.
+    """
+    product = getattr(document, "product", None)
+    content, content_head = prepare_content(document_text(document))
+    return {
+        "document_id": str(document.id),
+        "product_title": product.title if product else "",
+        "product_title_suggest": product.title if product else "",
+        "product_slug": product.slug if product else "",
+        "content": content,
+        "content_head": content_head,
+        "download_status": document.download_status,
+        "file_size_bytes": document.file_size_bytes,
+        "file_type": document.file_type,
+        "created_at": document.created_at,
+        # Bot tugmalari uchun: fayl Telegram orqali darhol yuborila oladimi
+        "is_available": bool(document.file_id),
+    }
+
+
+class IndexBuffer:
+    """
+    Redis-backed buffer of document ids waiting to be bulk indexed.
+
+    Ids live in a Redis set, so a document queued twice is indexed once, and
+    SPOP hands every flusher a disjoint batch without any extra locking.
+    """
+
+    def __init__(self, redis_client, key=INDEX_BUFFER_KEY):
+        self.redis = redis_client
+        self.key = key
+
+    def push(self, *document_ids):
+        if not document_ids:
+            return self.size()
+        pipe = self.redis.pipeline()
+        pipe.sadd(self.key, *[str(document_id) for document_id in document_ids])
+        pipe.scard(self.key)
+        return pipe.execute()[-1]
+
+    def pop(self, count=INDEX_BATCH_SIZE):
+        # Bitta atomar SPOP - parallel push() bilan poyga yo'q
+        return self.redis.spop(self.key, count) or []
+
+    def size(self):
+        return self.redis.scard(self.key)
+
+
+def bulk_index_documents(es_client, document_ids, index=INDEX_NAME, chunk_size=INDEX_BATCH_SIZE,
+                         extra_indices=()):
+    """
+    Index the given documents with one streaming bulk request per chunk.
+
+    Returns ``(indexed_ids, failed)`` where ``failed`` maps a document id to
+    its per-item Elasticsearch error. Successful documents are marked with a
+    single ``UPDATE ... WHERE id IN (...)``; moving them out of the pipeline's
+    Index stage is left to the caller. ``extra_indices`` receive the
+    same bodies (used while a blue/green rebuild is running); their results
+    do not affect ``is_indexed``.
+    """
+    documents = Document.objects.filter(id__in=document_ids).select_related("product", "content")
+    actions = (
+        {"_index": target, "_id": str(document.id), "_source": body}
+        for document in documents.iterator(chunk_size=chunk_size)
+        for body in [build_index_body(document)]
+        for target in (index, *extra_indices)
+    )
+
+    indexed_ids, failed = [], {}
+    for ok, item in streaming_bulk(
+        es_client,
+        actions,
+        chunk_size=chunk_size,
+        max_retries=3,
+        raise_on_error=False,
+        raise_on_exception=False,
+    ):
+        info = next(iter(item.values()))
+        if info.get("_index") in extra_indices:
+            if not ok:
+                logger.warning(f"[Index] Dual write to {info.get('_index')} failed for {info.get('_id')}")
+            continue
+        if ok:
+            indexed_ids.append(info["_id"])
+        else:
+            failed[info.get("_id")] = info.get("error")
+
+    if indexed_ids:
+        Document.objects.filter(id__in=indexed_ids).update(is_indexed=True)
+    return indexed_ids, failed
+
+
+def flush_index_buffer(es_client, buffer, batch_size=INDEX_BATCH_SIZE, max_batches=10,
+                       max_attempts=INDEX_MAX_ATTEMPTS, time_limit=INDEX_FLUSH_TIME_LIMIT, on_advanced=None):
+    """
+    Drain up to ``max_batches`` batches from the buffer into Elasticsearch.
+
+    A failed document goes back into the buffer on its own until it runs out
+    of attempts; the rest of its batch is not retried. No new batch is taken
+    after ``time_limit`` seconds, and each bulk request's timeout is capped by
+    the time left. A document that runs out of attempts is marked failed in
+    the pipeline. After every batch, ``on_advanced`` receives the ids that
+    moved from the Index to the Telegram stage.
+    """
+    deadline = time.monotonic() + time_limit
+    stats = {"indexed": 0, "failed": 0, "dropped": 0}
+    # Blue/green rebuild vaqtida yangi indeksga ham yozamiz
+    dual_write_index = buffer.redis.get(INDEX_DUAL_WRITE_KEY)
+    extra_indices = (dual_write_index,) if dual_write_index else ()
+
+    for _ in range(max_batches):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            logger.info(f"[Index] Flush time limit ({time_limit}s) reached, leaving the rest for the next flush")
+            break
+        document_ids = buffer.pop(batch_size)
+        if not document_ids:
+            break
+
+        try:
+            client = es_client.options(request_timeout=remaining)
+            indexed_ids, failed = bulk_index_documents(client, document_ids, chunk_size=batch_size,
+                                                       extra_indices=extra_indices)
+        except Exception:
+            # Ulanish xatosi - butun paketni buferga qaytaramiz
+            buffer.push(*document_ids)
+            raise
+
+        stats["indexed"] += len(indexed_ids)
+        if indexed_ids:
+            buffer.redis.hdel(INDEX_ATTEMPTS_KEY, *indexed_ids)
+            advanced = advance_indexed(indexed_ids)
+            if advanced and on_advanced:
+                on_advanced(advanced)
+
+        for document_id, error in failed.items():
+            attempts = buffer.redis.hincrby(INDEX_ATTEMPTS_KEY, document_id, 1)
+            if attempts < max_attempts:
+                logger.warning(f"[Index] Bulk failed for {document_id} (attempt {attempts}): {error}")
+                buffer.push(document_id)
+                stats["failed"] += 1
+            else:
+                logger.error(f"[Index] Giving up on {document_id} after {attempts} attempts: {error}")
+                buffer.redis.hdel(INDEX_ATTEMPTS_KEY, document_id)
+                # Index bosqichida qolsa stalled sweeper uni cheksiz qayta navbatga qo'yadi
+                fail(document_id, "index", f"bulk failed after {attempts} attempts: {error}")
+                stats["dropped"] += 1
+
+    if stats["indexed"]:
+        bump_index_generation(min_interval=SEARCH_CACHE_TTL)
+    return stats
@@ -0,0 +1,221 @@
+# apps/multiparser/ingest.py
+
+import hashlib
+import json
+import logging
+import re
+from decimal import Decimal
+from functools import partial
+
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, OuterRef
+
+from .indexing import IndexBuffer
+from .models import Document, DocumentContent, Product, Seller
+from .tasks import check_remote_task, process_document, redis_client, schedule_document
+
+# --- Logger ---
+logger = logging.getLogger(__name__)
+
+# Mavjud mahsulot qayta crawl qilinganda yangilanadigan maydonlar
+PRODUCT_UPDATE_FIELDS = [
+    'title', 'slug', 'seller', 'price', 'poster_url', 'file_url_2',
+    'views_count', 'content_type', 'json_data', 'payload_hash', 'updated_at',
+]
+
+# Har crawl'da o'zgaradigan, mazmunga ta'sir qilmaydigan kalitlar xeshga kirmaydi
+VOLATILE_PAYLOAD_KEYS = {"views_count"}
+
+
+def payload_hash(item):
+    """Normallashgan upstream payload'ning SHA-256 xeshi (kalitlar tartiblangan)."""
+    stable = {key: value for key, value in item.items() if key not in VOLATILE_PAYLOAD_KEYS}
+    encoded = json.dumps(stable, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def empty_stats():
+    return {"created": 0, "updated": 0, "unchanged": 0, "scheduled": 0, "failed": 0}
+
+
+def extract_file_url(poster_url):
+    """
+    Extract the actual file URL from poster_url.
+    This function is specific to the old API structure.
+    """
+    if not poster_url:
+        return None
+    match = re.search(r'([0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12})', poster_url)
+    if match:
+        file_id = match.group(1)
+        file_ext_match = re.search(r'\.(pdf|docx|doc|pptx|ppt|xlsx|xls|txt|rtf|odt|ods|odp)(?:_page|$)', poster_url,
+                                   re.IGNORECASE)
+        if file_ext_match:
+            file_extension = file_ext_match.group(1).lower()
+            return f"https://d2co7bxjtnp5o.cloudfront.net/media/documents/{file_id}.{file_extension}"
+    return None
+
+
+def build_product(item, seller_id, document_id):
+    product_id = item["id"]
+    return Product(
+        id=product_id,
+        document_id=document_id,
+        title=item.get("title", ""),
+        slug=item.get("slug", f"product-{product_id}"),
+        seller_id=seller_id,
+        price=Decimal(str(item.get("price", 0))),
+        poster_url=item.get("poster_url", ""),
+        file_url_2=item.get("file_url", ""),
+        views_count=item.get("views_count", 0),
+        content_type=item.get("content_type", "file"),
+        json_data=item,
+        payload_hash=payload_hash(item)
+    )
+
+
+def build_document(item, file_url):
+    document_data = item.get("document", {})
+    return Document(
+        page_count=document_data.get("page_count", 0),
+        file_size=document_data.get("file_size", "0 MB"),
+        file_type=document_data.get("file_type", ""),
+        content_type=document_data.get("content_type", "file"),
+        file_url=file_url
+    )
+
+
+def ingest_page(items):
+    """
+    Bitta katalog sahifasini bulk upsert qiladi: bitta tranzaksiya, mavjud
+    sotuvchi/mahsulotlar uchun ikki so'rov va ``bulk_create(update_conflicts=True)``.
+    ``payload_hash`` o'zgarmagan mahsulotlar yozilmaydi. Pipeline vazifalari
+    tranzaksiya commit bo'lgandan keyin navbatga qo'yiladi.
+
+    Sahifa darajasida IntegrityError bo'lsa (masalan, boshqa mahsulotdagi
+    takroriy slug) elementlar birma-bir qayta yoziladi, shunda bitta yomon
+    element butun sahifani yo'qotmaydi.
+    """
+    valid = {}
+    for item in items:
+        if item.get("id") and (item.get("seller") or {}).get("id"):
+            valid[item["id"]] = item
+        else:
+            logger.warning(f"[Ingest] Skipping item without product/seller id: {item.get('id')}")
+
+    try:
+        return _ingest(list(valid.values()))
+    except IntegrityError as e:
+        logger.warning(f"[Ingest] Page upsert conflict ({e}), falling back to per-item upserts")
+
+    stats = empty_stats()
+    for item in valid.values():
+        try:
+            for key, value in _ingest([item]).items():
+                stats[key] += value
+        except Exception as e:
+            stats["failed"] += 1
+            logger.error(f"[Ingest] Error processing item ID {item['id']}: {e}")
+    return stats
+
+
+def _ingest(items):
+    stats = empty_stats()
+    if not items:
+        return stats
+
+    with transaction.atomic():
+        # 1. Sotuvchilar: faqat yangi yoki ismi o'zgarganlari yoziladi
+        seller_names = {
+            item["seller"]["id"]: item["seller"].get("fullname", "Noma'lum Sotuvchi") for item in items
+        }
+        existing_sellers = Seller.objects.in_bulk(list(seller_names))
+        sellers = [
+            Seller(id=seller_id, fullname=fullname)
+            for seller_id, fullname in seller_names.items()
+            if seller_id not in existing_sellers or existing_sellers[seller_id].fullname != fullname
+        ]
+        if sellers:
+            Seller.objects.bulk_create(sellers, update_conflicts=True, unique_fields=['id'],
+                                       update_fields=['fullname', 'updated_at'])
+
+        # 2. Mavjud mahsulotlar hujjati bilan, katta JSON'siz - bitta so'rov
+        has_content = Exists(DocumentContent.objects.filter(document_id=OuterRef('document_id')))
+        existing = (
+            Product.objects.filter(id__in=[item["id"] for item in items])
+            .select_related('document')
+            .defer('json_data')
+            .annotate(document_has_content=has_content)
+            .in_bulk()
+        )
+
+        new_documents, changed_documents, products = [], [], []
+        to_schedule, to_check, to_parse, to_reindex = [], [], [], []
+
+        for item in items:
+            file_url = extract_file_url(item.get("poster_url", ""))
+            product = existing.get(item["id"])
+
+            if product is None:
+                document = build_document(item, file_url)
+                new_documents.append(document)
+                products.append(build_product(item, item["seller"]["id"], document.id))
+                stats["created"] += 1
+                if document.file_url:
+                    to_schedule.append(document)
+                continue
+
+            # Payload o'zgarmagan bo'lsa mahsulot qatori umuman yozilmaydi
+            document = product.document
+            built = build_product(item, item["seller"]["id"], product.document_id)
+            if built.payload_hash == product.payload_hash:
+                stats["unchanged"] += 1
+            else:
+                products.append(built)
+                stats["updated"] += 1
+                if document.is_indexed:
+                    to_reindex.append(document.id)
+
+            # Hujjat holatini tekshirib, kerak bo'lsa vazifani qayta navbatga qo'yamiz
+            if file_url and file_url != document.file_url:
+                # Fayl havolasi o'zgardi - HEAD/ETag tekshiruvi o'zgarishni aniqlaydi
+                document.file_url = file_url
+                changed_documents.append(document)
+                if document.download_status == 'downloaded':
+                    to_check.append(document.id)
+
+            if not document.file_url:
+                continue
+            if document.download_status not in ['downloaded', 'downloading']:
+                to_schedule.append(document)
+            elif document.download_status == 'downloaded' and document.file_path \
+                    and not product.document_has_content:
+                to_parse.append(document.id)
+
+        # 3. Hujjatlar va mahsulotlar (hujjatlar avval - mahsulot ularga bog'langan)
+        if new_documents:
+            Document.objects.bulk_create(new_documents)
+        if changed_documents:
+            Document.objects.bulk_update(changed_documents, ['file_url'])
+        pending_ids = [document.id for document in to_schedule if document.download_status != 'pending']
+        if pending_ids:
+            Document.objects.filter(id__in=pending_ids).update(download_status='pending')
+
+        if products:
+            Product.objects.bulk_create(products, update_conflicts=True, unique_fields=['id'],
+                                        update_fields=PRODUCT_UPDATE_FIELDS)
+
+        # 4. Vazifalar faqat commit'dan keyin - worker hali ko'rinmagan qatorni o'qimasligi uchun
+        for document in to_schedule:
+            transaction.on_commit(partial(schedule_document, document))
+        for document_id in to_check:
+            transaction.on_commit(partial(check_remote_task.delay, document_id))
+        for document_id in to_parse:
+            transaction.on_commit(partial(process_document, document_id, download=False))
+        if to_reindex:
+            # content _source'da saqlanmaydi, shuning uchun partial update emas -
+            # o'zgargan mahsulot hujjatlari bulk indexer orqali to'liq qayta yoziladi
+            transaction.on_commit(partial(IndexBuffer(redis_client).push, *to_reindex))
+        stats["scheduled"] = len(to_schedule) + len(to_check) + len(to_parse)
+
+    return stats
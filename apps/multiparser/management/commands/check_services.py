@@ -6,9 +6,7 @@ from django.conf import settings
 from django.core.management.base import BaseCommand
 from elasticsearch import Elasticsearch
 
-# Tika serverining standart manzilini belgilaymiz.
-# Buni settings.py fayliga qo'shib, o'zgartirsa ham bo'ladi.
-TIKA_URL = getattr(settings, 'TIKA_URL', 'http://multiparser_tika:9998')
+from apps.multiparser.parsing import TIKA_URLS
 
 
 class Command(BaseCommand):
@@ -52,21 +50,27 @@ class Command(BaseCommand):
             return False
 
     def _check_tika(self):
-        """Apache Tika serverining holatini tekshiradi."""
+        """Apache Tika server(lar)ining holatini tekshiradi (TIKA_URLS dagi har biri)."""
         self.stdout.write("\n--- 2. Apache Tika tekshirilmoqda ---")
-        tika_status_url = f"{TIKA_URL}/tika"
-        try:
-            response = requests.get(tika_status_url, timeout=5)
-            response.raise_for_status()  # 200 bo'lmasa xatolik beradi
-            version_info = response.text.strip()
-            self.stdout.write(self.style.SUCCESS(f"✔ Tika serveri ishlamoqda (Versiya: {version_info})."))
-            return True
-        except requests.exceptions.ConnectionError:
-            self.stdout.write(self.style.ERROR(f"✖ Tika serveriga ulanib bo'lmadi ({TIKA_URL}). Server ishga tushirilganmi?"))
-            return False
-        except Exception as e:
-            self.stdout.write(self.style.ERROR(f"✖ Tika serverini tekshirishda xatolik: {e}"))
-            return False
+        healthy = 0
+        for tika_url in TIKA_URLS:
+            tika_status_url = f"{tika_url}/tika"
+            try:
+                response = requests.get(tika_status_url, timeout=5)
+                response.raise_for_status()  # 200 bo'lmasa xatolik beradi
+                version_info = response.text.strip()
+                self.stdout.write(self.style.SUCCESS(f"✔ Tika serveri ishlamoqda: {tika_url} (Versiya: {version_info})."))
+                healthy += 1
+            except requests.exceptions.ConnectionError:
+                self.stdout.write(self.style.ERROR(f"✖ Tika serveriga ulanib bo'lmadi ({tika_url}). Server ishga tushirilganmi?"))
+            except Exception as e:
+                self.stdout.write(self.style.ERROR(f"✖ Tika serverini ({tika_url}) tekshirishda xatolik: {e}"))
+
+        if healthy and healthy < len(TIKA_URLS):
+            self.stdout.write(self.style.WARNING(
+                f"{healthy}/{len(TIKA_URLS)} ta Tika serveri ishlamoqda - qolganlari failover'da chetlatiladi."
+            ))
+        return healthy > 0
 
     def _check_celery(self):
         """Celery worker'larining mavjudligini tekshiradi."""
@@ -26,7 +26,7 @@ class Command(BaseCommand):
                 "DIQQAT! Bu buyruq quyidagi amallarni bajaradi:\n"
                 "1. 'Product', 'Document', 'Seller', 'ProductView' jadvallaridagi BARCHA ma'lumotlarni o'chiradi.\n"
                 "2. Docker tashqarisidagi (bog'langan) 'media' papkasining BARCHA tarkibini o'chiradi.\n"
-                "3. Elasticsearch/OpenSearch dagi index'larni qayta quradi ('search_index --rebuild').\n"
+                "3. Elasticsearch/OpenSearch dagi index'larni qayta quradi ('rebuild_search_index').\n"
                 "4. Redis'dagi BARCHA keshlarni o'chiradi ('flushall').\n"
                 "\nBu amallarni orqaga qaytarib bo'lmaydi.\n"
                 "Davom etish uchun 'yes' deb yozing va Enter bosing: "
@@ -69,9 +69,9 @@ class Command(BaseCommand):
             self.stdout.write(self.style.WARNING(f"Media papkasi topilmadi yoki MEDIA_ROOT sozlanmagan."))
 
         # 3. SEARCH INDEX'NI QAYTA QURISH
-        self.stdout.write(self.style.NOTICE("\n3. Search index'ni qayta qurish ('search_index --rebuild')..."))
+        self.stdout.write(self.style.NOTICE("\n3. Search index'ni qayta qurish ('rebuild_search_index')..."))
         try:
-            call_command('search_index', '--rebuild', '-f')
+            call_command('rebuild_search_index', '--delete-old')
             self.stdout.write(self.style.SUCCESS("Search index muvaffaqiyatli qayta qurildi."))
         except Exception as e:
             self.stdout.write(self.style.ERROR(f"Search index'ni qayta qurishda xatolik: {e}"))
@@ -0,0 +1,97 @@
+# apps/multiparser/management/commands/compare_search.py
+
+import statistics
+
+from django.core.management.base import BaseCommand, CommandError
+from elasticsearch_dsl import Q
+
+from apps.bot.documents import DocumentDocument
+from apps.bot.search import build_search, build_search_filter
+from apps.multiparser.indexing import INDEX_NAME
+from apps.multiparser.tasks import es_client
+from ..utils import percentile
+
+
+def build_legacy_search(text, search_mode):
+    """Eski (fuzzy multi_match) so'rov, deep rejimi bilan birga - taqqoslash uchun saqlangan."""
+    if search_mode == 'deep':
+        exact_fields = ["product_title^10", "product_slug^8", "content^6"]
+        fuzzy_fields = ["product_title^5", "product_slug^4", "content^3"]
+    else:
+        exact_fields = ["product_title^10", "product_slug^8"]
+        fuzzy_fields = ["product_title^5", "product_slug^4"]
+    exact_clause = Q("multi_match", query=text, fields=exact_fields, type="phrase", boost=5)
+    fuzzy_clause = Q("multi_match", query=text, fields=fuzzy_fields, fuzziness="AUTO", boost=1)
+    q = Q('bool', should=[exact_clause, fuzzy_clause], minimum_should_match=1)
+    return DocumentDocument.search().query(q).filter(build_search_filter())
+
+
+class Command(BaseCommand):
+    """
+    Eski va yangi qidiruv so'rovlarini bir xil so'rovlar ro'yxatida ishga
+    tushirib, ES 'took' vaqti (p50/p99) va natijalar mosligini solishtiradi.
+    Eski so'rov eski mapping'li indeksda ishlaydi (rebuild_search_index
+    --delete-old'siz qoldirgan oldingi indeks, masalan 'documents_v1').
+    """
+    help = "Compares latency and top results of the legacy and current bot search queries."
+
+    def add_arguments(self, parser):
+        parser.add_argument('queries', nargs='*', help='Queries to run')
+        parser.add_argument('--file', help='Text file with one query per line')
+        parser.add_argument('--legacy-index', required=True,
+                            help='Index built with the pre-change mapping (e.g. the previous documents_vN)')
+        parser.add_argument('--index', default=INDEX_NAME, help='Index or alias for the current query')
+        parser.add_argument('--mode', choices=['normal', 'deep'], default='normal')
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per query and variant')
+        parser.add_argument('--top', type=int, default=10, help='Hits compared per query')
+
+    def handle(self, *args, **options):
+        queries = list(options['queries'])
+        if options['file']:
+            with open(options['file'], encoding='utf-8') as f:
+                queries += [line.strip() for line in f if line.strip()]
+        if not queries:
+            raise CommandError("Kamida bitta so'rov yoki --file kerak.")
+
+        mode, repeat, top = options['mode'], options['repeat'], options['top']
+        legacy_index = options['legacy_index']
+        if not es_client.indices.exists(index=legacy_index):
+            raise CommandError(f"'{legacy_index}' indeksi topilmadi.")
+        if legacy_index in (es_client.indices.get_alias(index=options['index']) or {}):
+            raise CommandError(f"'{legacy_index}' joriy '{options['index']}' bilan bir xil indeks.")
+        variants = {
+            'legacy': (build_legacy_search, legacy_index),
+            'current': (build_search, options['index']),
+        }
+        timings = {name: [] for name in variants}
+
+        for text in queries:
+            self.stdout.write(self.style.NOTICE(f"\n🔎 \"{text}\""))
+            results = {}
+            for name, (builder, index) in variants.items():
+                s = builder(text, mode).extra(track_total_hits=True).source(['product_title'])[:top]
+                body = s.to_dict()
+                took = []
+                for _ in range(repeat):
+                    # So'rov keshidan foydalanmaslik uchun request_cache o'chiriladi
+                    response = es_client.search(index=index, body=body, request_cache=False)
+                    took.append(response['took'])
+                timings[name].extend(took)
+                hits = response['hits']['hits']
+                results[name] = [hit['_id'] for hit in hits]
+                first = hits[0]['_source'].get('product_title', '') if hits else '-'
+                self.stdout.write(
+                    f"  {name:<8} took p50={statistics.median(took):.0f}ms "
+                    f"hits={response['hits']['total']['value']:<6} top1={first[:60]}"
+                )
+
+            legacy, current = set(results['legacy']), set(results['current'])
+            overlap = len(legacy & current) / max(len(legacy | current), 1) * 100
+            self.stdout.write(f"  top-{top} overlap: {overlap:.0f}%")
+
+        self.stdout.write(self.style.SUCCESS("\nUmumiy natija (ES took, ms):"))
+        for name, values in timings.items():
+            self.stdout.write(
+                f"  {name:<8} p50={percentile(values, 50)} p99={percentile(values, 99)} "
+                f"mean={statistics.mean(values):.1f} (n={len(values)})"
+            )
@@ -0,0 +1,254 @@
+# apps/multiparser/management/commands/rebuild_search_index.py
+
+import json
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from elasticsearch.helpers import streaming_bulk
+
+from apps.bot.documents import DocumentDocument
+from apps.multiparser.indexing import INDEX_DUAL_WRITE_KEY, INDEX_NAME, build_index_body, bump_index_generation
+from apps.multiparser.models import Document
+from apps.multiparser.tasks import es_client, redis_client
+
+class Command(BaseCommand):
+    """
+    Blue/green qayta indekslash: yangi ``documents_v{n}`` indeksini quradi,
+    hujjatlarni parallel bo'laklarda (slice) bulk yuklaydi, sonini tekshiradi
+    va ``documents`` alias'ini atomik ravishda yangi indeksga o'tkazadi.
+    Bot qidiruvi jarayon davomida eski indeksdan foydalanishda davom etadi.
+    """
+    help = "Rebuilds the search index into a new versioned index and atomically swaps the alias."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4, help='Parallel slice workers')
+        parser.add_argument('--slice-size', type=int, default=5000, help='Documents per slice')
+        parser.add_argument('--chunk-size', type=int, default=500, help='Bulk request / DB fetch size')
+        parser.add_argument('--resume', action='store_true',
+                            help='Resume the last unfinished rebuild, skipping completed slices')
+        parser.add_argument('--delete-old', action='store_true',
+                            help='Delete the previous index after the alias swap')
+        parser.add_argument('--abort', action='store_true',
+                            help='Abandon the last unfinished rebuild: stop dual writes and delete its index')
+
+    def handle(self, *args, **options):
+        alias = INDEX_NAME
+        self.chunk_size = options['chunk_size']
+
+        if options['abort']:
+            return self._abort(alias)
+
+        if options['resume']:
+            index_name = self._find_unfinished_index(alias)
+            state = self._load_state(index_name)
+            self.stdout.write(self.style.NOTICE(f"'{index_name}' indeksini qayta qurish davom ettirilmoqda..."))
+        else:
+            index_name = f"{alias}_v{self._next_version(alias)}"
+            self._create_index(index_name)
+            boundaries = self._slice_boundaries(options['slice_size'])
+            state = {'boundaries': boundaries}
+            redis_client.set(self._state_key(index_name), json.dumps(state))
+            self.stdout.write(self.style.NOTICE(
+                f"Yangi '{index_name}' indeksi yaratildi ({len(boundaries) + 1} ta slice)."
+            ))
+
+        # Bulk indexer yangi indeksga ham yozadi. Kalit muddatsiz: buyruq yiqilsa ham
+        # o'zgarishlar yo'qolmaydi va '--resume' eskirgan indeksni almashtirmaydi.
+        # Faqat alias almashgach yoki '--abort' bilan o'chiriladi.
+        redis_client.set(INDEX_DUAL_WRITE_KEY, index_name)
+        try:
+            self._load_slices(index_name, state['boundaries'], options['workers'])
+
+            # Bulk yuklash tugadi - sozlamalarni tiklaymiz va sonini tekshiramiz
+            es_client.indices.put_settings(index=index_name, settings=self._restored_settings())
+            es_client.indices.refresh(index=index_name)
+
+            expected = sum(int(v) for v in redis_client.hvals(self._counts_key(index_name)))
+            actual = es_client.count(index=index_name)["count"]
+            # Dual-write orqali slice'lardan keyin qo'shilgan hujjatlar ham bo'lishi mumkin
+            if actual < expected:
+                raise CommandError(
+                    f"Hujjatlar soni mos emas: ES={actual}, yuborilgan={expected}. Alias o'zgartirilmadi."
+                )
+            self.stdout.write(self.style.SUCCESS(
+                f"✔ '{index_name}' indeksida {actual} ta hujjat (bazada {Document.objects.count()} ta)."
+            ))
+
+            old_indices = self._swap_alias(alias, index_name)
+        except Exception:
+            self.stdout.write(self.style.WARNING(
+                f"'{index_name}' ga dual-write yoqilgan holda qoldi - '--resume' yoki '--abort' bilan yakunlang."
+            ))
+            raise
+        self._stop_dual_write(index_name)
+        bump_index_generation()
+        self.stdout.write(self.style.SUCCESS(f"✔ '{alias}' alias'i '{index_name}' ga o'tkazildi."))
+
+        if options['delete_old']:
+            for old_index in old_indices:
+                es_client.indices.delete(index=old_index)
+                self.stdout.write(f"Eski '{old_index}' indeksi o'chirildi.")
+
+        redis_client.delete(self._state_key(index_name), self._done_key(index_name), self._counts_key(index_name))
+        self.stdout.write(self.style.SUCCESS("\nQidiruv indeksi muvaffaqiyatli qayta qurildi! ✅"))
+
+    @staticmethod
+    def _stop_dual_write(index_name):
+        """Dual-write kalitini, u hali shu indeksga tegishli bo'lsa, o'chiradi."""
+        if redis_client.get(INDEX_DUAL_WRITE_KEY) == index_name:
+            redis_client.delete(INDEX_DUAL_WRITE_KEY)
+
+    def _abort(self, alias):
+        index_name = self._find_unfinished_index(alias)
+        self._stop_dual_write(index_name)
+        redis_client.delete(self._state_key(index_name), self._done_key(index_name), self._counts_key(index_name))
+        es_client.indices.delete(index=index_name, ignore_unavailable=True)
+        self.stdout.write(self.style.SUCCESS(f"✔ Tugallanmagan '{index_name}' rebuild bekor qilindi va o'chirildi."))
+
+    # --- Redis'dagi holat kalitlari ---
+    @staticmethod
+    def _state_key(index_name):
+        return f"reindex:{index_name}"
+
+    @staticmethod
+    def _done_key(index_name):
+        return f"reindex:{index_name}:done"
+
+    @staticmethod
+    def _counts_key(index_name):
+        return f"reindex:{index_name}:counts"
+
+    def _load_state(self, index_name):
+        raw = redis_client.get(self._state_key(index_name))
+        if not raw:
+            raise CommandError(f"'{index_name}' uchun saqlangan holat topilmadi.")
+        return json.loads(raw)
+
+    # --- Indeks versiyalari ---
+    def _versioned_indices(self, alias):
+        pattern = re.compile(rf"^{re.escape(alias)}_v(\d+)$")
+        names = es_client.indices.get(index=f"{alias}_v*", allow_no_indices=True, expand_wildcards="all")
+        return {name: int(match.group(1)) for name in names if (match := pattern.match(name))}
+
+    def _next_version(self, alias):
+        versions = self._versioned_indices(alias).values()
+        return max(versions, default=0) + 1
+
+    def _aliased_indices(self, alias):
+        if not es_client.indices.exists_alias(name=alias):
+            return []
+        return list(es_client.indices.get_alias(name=alias).keys())
+
+    def _find_unfinished_index(self, alias):
+        aliased = set(self._aliased_indices(alias))
+        candidates = sorted(
+            (version, name) for name, version in self._versioned_indices(alias).items()
+            if name not in aliased and redis_client.exists(self._state_key(name))
+        )
+        if not candidates:
+            raise CommandError("Davom ettirish uchun tugallanmagan rebuild topilmadi.")
+        return candidates[-1][1]
+
+    def _create_index(self, index_name):
+        index = DocumentDocument._index.clone(name=index_name)
+        # Bulk yuklash vaqtida refresh va replikalar o'chiriladi
+        index.settings(refresh_interval="-1", number_of_replicas=0)
+        index.create(using=es_client)
+
+    def _restored_settings(self):
+        configured = DocumentDocument._index._settings
+        return {
+            "index": {
+                "refresh_interval": configured.get("refresh_interval", "1s"),
+                "number_of_replicas": configured.get("number_of_replicas", 1),
+            }
+        }
+
+    # --- Slice'lar ---
+    def _slice_boundaries(self, slice_size):
+        """Har ``slice_size``-chi id chegarani bildiradi; oxirgi slice yuqoridan ochiq."""
+        boundaries = []
+        ids = Document.objects.order_by('id').values_list('id', flat=True)
+        for position, document_id in enumerate(ids.iterator(chunk_size=self.chunk_size), start=1):
+            if position % slice_size == 0:
+                boundaries.append(str(document_id))
+        return boundaries
+
+    def _load_slices(self, index_name, boundaries, workers):
+        done = {int(number) for number in redis_client.smembers(self._done_key(index_name))}
+        ranges = list(zip([None] + boundaries, boundaries + [None]))
+        pending = [number for number in range(len(ranges)) if number not in done]
+
+        if done:
+            self.stdout.write(f"{len(done)} ta slice avval tugallangan, {len(pending)} ta qoldi.")
+
+        failed_slices = []
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(self._load_slice, index_name, number, *ranges[number]): number
+                for number in pending
+            }
+            for future in as_completed(futures):
+                number = futures[future]
+                try:
+                    indexed, failed = future.result()
+                except Exception as e:
+                    self.stdout.write(self.style.ERROR(f"✖ Slice {number} xatolik bilan tugadi: {e}"))
+                    failed_slices.append(number)
+                    continue
+
+                if failed:
+                    self.stdout.write(self.style.ERROR(
+                        f"✖ Slice {number}: {indexed} ta indekslandi, {failed} ta xatolik."
+                    ))
+                    failed_slices.append(number)
+                else:
+                    self.stdout.write(f"✔ Slice {number}: {indexed} ta hujjat.")
+
+        if failed_slices:
+            raise CommandError(
+                f"{len(failed_slices)} ta slice tugallanmadi. '--resume' bilan qayta ishga tushiring."
+            )
+
+    def _load_slice(self, index_name, number, lower, upper):
+        try:
+            queryset = Document.objects.select_related('product', 'content').order_by('id')
+            if lower is not None:
+                queryset = queryset.filter(id__gt=lower)
+            if upper is not None:
+                queryset = queryset.filter(id__lte=upper)
+
+            actions = (
+                {"_index": index_name, "_id": str(document.id), "_source": build_index_body(document)}
+                for document in queryset.iterator(chunk_size=self.chunk_size)
+            )
+            indexed, failed = 0, 0
+            for ok, _ in streaming_bulk(es_client, actions, chunk_size=self.chunk_size,
+                                        max_retries=3, raise_on_error=False):
+                if ok:
+                    indexed += 1
+                else:
+                    failed += 1
+
+            redis_client.hset(self._counts_key(index_name), number, indexed)
+            if not failed:
+                redis_client.sadd(self._done_key(index_name), number)
+            return indexed, failed
+        finally:
+            # Har bir thread o'z DB ulanishini yopadi
+            connection.close()
+
+    # --- Alias ---
+    def _swap_alias(self, alias, index_name):
+        old_indices = [name for name in self._aliased_indices(alias) if name != index_name]
+        actions = [{"add": {"index": index_name, "alias": alias}}]
+        actions += [{"remove": {"index": name, "alias": alias}} for name in old_indices]
+
+        # Alias emas, oddiy 'documents' indeksi mavjud bo'lsa, uni shu amalda olib tashlaymiz
+        if not old_indices and es_client.indices.exists(index=alias):
+            actions.append({"remove_index": {"index": alias}})
+
+        es_client.indices.update_aliases(actions=actions)
+        return old_indices
@@ -2,16 +2,17 @@
 
 from django.core.management.base import BaseCommand
 from tqdm import tqdm
+from apps.multiparser.indexing import IndexBuffer, INDEX_BATCH_SIZE
 from apps.multiparser.models import Document
-from apps.multiparser.tasks import index_document_task
+from apps.multiparser.tasks import flush_index_buffer_task, redis_client
 
 
 class Command(BaseCommand):
     """
-    Statusi 'downloaded' bo'lgan barcha hujjatlar uchun
-    qayta indekslash vazifasini Celery navbatiga qo'shadi.
+    Statusi 'downloaded' bo'lgan barcha hujjatlarni bulk indekslash
+    buferiga qo'shadi va flush vazifasini navbatga qo'yadi.
     """
-    help = "Schedules a re-indexing task for all documents with 'downloaded' status."
+    help = "Pushes all documents with 'downloaded' status into the bulk indexing buffer."
 
     def handle(self, *args, **options):
         self.stdout.write(self.style.NOTICE(
@@ -30,15 +31,27 @@ class Command(BaseCommand):
             f"Jami {count} ta hujjat qayta indekslash uchun navbatga qo'shiladi."
         ))
 
+        buffer = IndexBuffer(redis_client)
+        document_ids = documents_to_reindex.values_list('id', flat=True)
+
         # Jarayonni chiroyli ko'rsatish uchun tqdm'dan foydalanamiz
-        with tqdm(total=count, desc="Indekslash vazifalari yaratilmoqda") as pbar:
-            for document in documents_to_reindex.iterator():
-                # Har bir hujjat uchun indekslash vazifasini navbatga qo'shamiz
-                index_document_task.delay(document.id)
-                pbar.update(1)
+        with tqdm(total=count, desc="Hujjatlar buferga qo'shilmoqda") as pbar:
+            batch = []
+            for document_id in document_ids.iterator(chunk_size=INDEX_BATCH_SIZE):
+                batch.append(document_id)
+                if len(batch) >= INDEX_BATCH_SIZE:
+                    buffer.push(*batch)
+                    pbar.update(len(batch))
+                    batch = []
+            if batch:
+                buffer.push(*batch)
+                pbar.update(len(batch))
+
+        # Flush vazifasi bufer bo'shaguncha o'zini qayta navbatga qo'yadi
+        flush_index_buffer_task.delay()
 
         self.stdout.write(self.style.SUCCESS(
-            "\nBarcha qayta indekslash vazifalari Celery navbatiga muvaffaqiyatli qo'shildi! ✅"
+            "\nBarcha hujjatlar bulk indekslash buferiga muvaffaqiyatli qo'shildi! ✅"
         ))
         self.stdout.write(self.style.NOTICE(
             "Vazifalar bajarilishi uchun Celery worker'laringiz ishlab turganiga ishonch hosil qiling."
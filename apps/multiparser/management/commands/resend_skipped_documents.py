@@ -0,0 +1,28 @@
+# apps/multiparser/management/commands/resend_skipped_documents.py
+
+from django.core.management.base import BaseCommand
+
+from apps.multiparser.models import Document
+from apps.multiparser.telegram_api import TELEGRAM_LOCAL_MODE, TELEGRAM_MAX_UPLOAD_BYTES
+from apps.multiparser.tasks import resend_skipped_documents
+
+
+class Command(BaseCommand):
+    """
+    Hajmi sababli Telegram'ga yuborilmagan ("skipped") hujjatlarni qayta
+    yuboradi. Odatda TELEGRAM_LOCAL_MODE yoqilgandan keyin ishga tushiriladi -
+    local Bot API server 2000 MB gacha fayllarni qabul qiladi.
+    """
+    help = "Re-queues documents skipped as too large for Telegram (e.g. after enabling TELEGRAM_LOCAL_MODE)."
+
+    def handle(self, *args, **options):
+        limit_mb = TELEGRAM_MAX_UPLOAD_BYTES // (1024 * 1024)
+        if not TELEGRAM_LOCAL_MODE:
+            self.stdout.write(self.style.NOTICE(
+                f"TELEGRAM_LOCAL_MODE o'chiq - faqat {limit_mb} MB gacha fayllar yuboriladi."
+            ))
+
+        queued, too_large = resend_skipped_documents(Document.objects.all())
+        self.stdout.write(self.style.SUCCESS(f"✔ {queued} ta hujjat Telegram'ga qayta navbatga qo'yildi."))
+        if too_large:
+            self.stdout.write(self.style.WARNING(f"{too_large} ta hujjat hali ham {limit_mb} MB limitidan katta."))
@@ -0,0 +1,113 @@
+# apps/multiparser/management/commands/search_index_report.py
+
+import statistics
+
+from django.core.management.base import BaseCommand
+from django.db.models import Avg, Count, Max, Q, Sum
+from django.db.models.functions import Length
+
+from apps.bot.models import SearchQuery
+from apps.bot.search import SEARCH_TRACK_TOTAL_HITS, build_search
+from apps.multiparser.indexing import CONTENT_HEAD_CHARS, CONTENT_MAX_CHARS, INDEX_NAME
+from apps.multiparser.models import DocumentContent
+from apps.multiparser.tasks import es_client
+from ..utils import percentile
+
+
+def human_size(num_bytes):
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if num_bytes < 1024:
+            return f"{num_bytes:.1f} {unit}"
+        num_bytes /= 1024
+    return f"{num_bytes:.1f} TB"
+
+
+class Command(BaseCommand):
+    """
+    Indeks hajmi, matn uzunligi taqsimoti va deep qidiruv kechikishi
+    haqida hisobot - ES_CONTENT_MAX_CHARS chegarasini sozlash uchun.
+    """
+    help = "Reports search index size, parsed content lengths and deep-search latency."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--queries', nargs='*', help='Deep-search queries to time')
+        parser.add_argument('--sample', type=int, default=20,
+                            help='Recent deep-search queries to time when --queries is not given')
+        parser.add_argument('--repeat', type=int, default=3, help='Runs per query')
+        parser.add_argument('--disk-usage', action='store_true',
+                            help='Include per-field disk usage (expensive on large indices)')
+
+    def handle(self, *args, **options):
+        self._report_index_size(options['disk_usage'])
+        self._report_content_lengths()
+        self._report_latency(options)
+
+    def _report_index_size(self, disk_usage):
+        self.stdout.write(self.style.NOTICE(f"\n--- 1. '{INDEX_NAME}' indeksi hajmi ---"))
+        stats = es_client.indices.stats(index=INDEX_NAME, metric=['docs', 'store'])
+        primaries = stats['_all']['primaries']
+        docs = primaries['docs']['count']
+        size = primaries['store']['size_in_bytes']
+        self.stdout.write(f"Hujjatlar: {docs}, hajm: {human_size(size)}, "
+                          f"o'rtacha: {human_size(size / docs if docs else 0)}/hujjat")
+
+        if disk_usage:
+            usage = es_client.indices.disk_usage(index=INDEX_NAME, run_expensive_tasks=True)
+            for index_name, info in usage.items():
+                if not isinstance(info, dict) or 'fields' not in info:
+                    continue
+                fields = sorted(info['fields'].items(), key=lambda item: -item[1]['total_in_bytes'])
+                self.stdout.write(f"{index_name} maydonlari bo'yicha:")
+                for field, field_info in fields[:12]:
+                    self.stdout.write(f"  {field:<32} {human_size(field_info['total_in_bytes'])}")
+
+    def _report_content_lengths(self):
+        self.stdout.write(self.style.NOTICE("\n--- 2. Parse qilingan matn uzunligi ---"))
+        summary = (
+            DocumentContent.objects.aggregate(
+                total=Count('document_id'),
+                over_cap=Count('document_id', filter=Q(length__gt=CONTENT_MAX_CHARS)),
+                average=Avg('length'),
+                longest=Max('length'),
+                chars=Sum('length'),
+                stored=Sum(Length('data')),
+            )
+        )
+        self.stdout.write(
+            f"Hujjatlar: {summary['total']}, o'rtacha: {summary['average'] or 0:.0f} belgi, "
+            f"eng uzun: {summary['longest'] or 0} belgi"
+        )
+        self.stdout.write(
+            f"ES_CONTENT_MAX_CHARS={CONTENT_MAX_CHARS} dan uzun: {summary['over_cap']} ta; "
+            f"ES_CONTENT_HEAD_CHARS={CONTENT_HEAD_CHARS}"
+        )
+        self.stdout.write(
+            f"Bazada siqilgan holda: {human_size(summary['stored'] or 0)} "
+            f"({summary['chars'] or 0} belgi)"
+        )
+
+    def _report_latency(self, options):
+        self.stdout.write(self.style.NOTICE("\n--- 3. Deep qidiruv kechikishi ---"))
+        queries = options['queries']
+        if not queries:
+            recent = (
+                SearchQuery.objects.filter(is_deep_search=True, found_results=True)
+                .order_by('-created_at').values_list('query_text', flat=True)[:options['sample'] * 5]
+            )
+            queries = list(dict.fromkeys(recent))[:options['sample']]
+        if not queries:
+            self.stdout.write(self.style.WARNING("O'lchash uchun so'rovlar topilmadi."))
+            return
+
+        took = []
+        for text in queries:
+            s = build_search(text, 'deep').extra(track_total_hits=SEARCH_TRACK_TOTAL_HITS)
+            s = s.source(['product_title'])[:10]
+            for _ in range(options['repeat']):
+                response = es_client.search(index=INDEX_NAME, body=s.to_dict(), request_cache=False)
+                took.append(response['took'])
+
+        self.stdout.write(
+            f"{len(queries)} ta so'rov x {options['repeat']}: p50={percentile(took, 50)}ms "
+            f"p99={percentile(took, 99)}ms mean={statistics.mean(took):.1f}ms"
+        )
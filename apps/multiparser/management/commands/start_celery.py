@@ -1,17 +1,17 @@
 import subprocess
 import sys
 import os
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 from django.conf import settings
 
 class Command(BaseCommand):
-    help = 'Start Celery worker and beat scheduler'
+    help = 'Start Celery worker(s) and beat scheduler'
 
     def add_arguments(self, parser):
         parser.add_argument(
             '--worker-only',
             action='store_true',
-            help='Start only Celery worker (not beat)'
+            help='Start only Celery worker(s) (not beat)'
         )
         parser.add_argument(
             '--beat-only',
@@ -22,13 +22,21 @@ class Command(BaseCommand):
             '--workers',
             type=int,
             default=10,
-            help='Number of worker processes (default: 10)'
+            help='Number of worker processes for the single all-queues worker (default: 10)'
+        )
+        parser.add_argument(
+            '--pools',
+            type=str,
+            default=None,
+            help=('Comma-separated CELERY_WORKER_POOLS to start as separate workers, '
+                  'e.g. "download,parse" or "all". Without it one worker consumes every queue.')
         )
 
     def handle(self, *args, **options):
         worker_only = options['worker_only']
         beat_only = options['beat_only']
-        workers = options['workers']
+        if worker_only and beat_only:
+            raise CommandError('--worker-only and --beat-only cannot be used together.')
 
         # Ensure environment is propagated to subprocesses
         env = os.environ.copy()
@@ -36,102 +44,83 @@ class Command(BaseCommand):
             # settings.SETTINGS_MODULE is defined by Django when configured
             env['DJANGO_SETTINGS_MODULE'] = getattr(settings, 'SETTINGS_MODULE', 'core.settings.develop')
 
+        commands = []
+        if not beat_only:
+            commands.extend(self._worker_commands(options))
+        if not worker_only:
+            commands.append(('beat', self._beat_command()))
+
+        if len(commands) == 1:
+            # Yagona jarayon - celery shu PID'ni egallaydi, SIGTERM to'g'ridan-to'g'ri unga boradi
+            name, cmd = commands[0]
+            self.stdout.write(self.style.SUCCESS(f'Starting Celery {name}...'))
+            sys.stdout.flush()
+            os.execve(sys.executable, cmd, env)
+
+        processes = []
+        for name, cmd in commands:
+            process = subprocess.Popen(cmd, env=env)
+            processes.append((name, process))
+            self.stdout.write(self.style.SUCCESS(f'Celery {name} started with PID: {process.pid}'))
+
+        try:
+            # Birortasi to'xtasa qolganlari ham to'xtatiladi
+            failed = None
+            while failed is None:
+                for name, process in processes:
+                    try:
+                        returncode = process.wait(timeout=1)
+                    except subprocess.TimeoutExpired:
+                        continue
+                    failed = (name, returncode)
+                    break
+            self.stderr.write(self.style.ERROR(f'Celery {failed[0]} exited (exit {failed[1]}), stopping the rest.'))
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.WARNING('\nStopping Celery processes...'))
+        finally:
+            for name, process in processes:
+                if process.poll() is None:
+                    process.terminate()
+            for name, process in processes:
+                process.wait()
+            self.stdout.write(self.style.SUCCESS('Celery processes stopped.'))
+
+    def _worker_commands(self, options):
+        pools = getattr(settings, 'CELERY_WORKER_POOLS', {})
+        if not options['pools']:
+            # Bitta worker barcha navbatlarni oladi (eski xatti-harakat)
+            queues = sorted({queue for pool in pools.values() for queue in pool['queues']}
+                            | {getattr(settings, 'CELERY_TASK_DEFAULT_QUEUE', 'celery')})
+            return [('worker', self._celery_command(
+                'worker', '--loglevel=info', f"--concurrency={options['workers']}", f"--queues={','.join(queues)}"
+            ))]
+
+        names = list(pools) if options['pools'] == 'all' else [
+            name.strip() for name in options['pools'].split(',') if name.strip()
+        ]
+        unknown = [name for name in names if name not in pools]
+        if unknown:
+            raise CommandError(f"Unknown pool(s): {', '.join(unknown)}. Available: {', '.join(pools)}")
+
+        commands = []
+        for name in names:
+            pool = pools[name]
+            commands.append((f'{name} worker', self._celery_command(
+                'worker', '--loglevel=info',
+                f'--hostname={name}@%h',
+                f"--queues={','.join(pool['queues'])}",
+                f"--pool={pool.get('pool', 'prefork')}",
+                f"--concurrency={pool.get('concurrency', 1)}",
+            )))
+        return commands
+
+    def _beat_command(self):
+        cmd = self._celery_command('beat', '--loglevel=info')
+        if 'django_celery_beat' in getattr(settings, 'INSTALLED_APPS', []):
+            cmd.extend(['--scheduler', 'django_celery_beat.schedulers:DatabaseScheduler'])
+        return cmd
+
+    @staticmethod
+    def _celery_command(*args):
         # Decide Celery app name (project-level celery app is typically "core")
-        celery_app = 'core'
-
-        if not worker_only and not beat_only:
-            # Start both worker and beat
-            self.stdout.write(
-                self.style.SUCCESS('Starting Celery worker and beat scheduler...')
-            )
-
-            # Build beat command (conditionally add django_celery_beat scheduler)
-            beat_cmd = [
-                sys.executable, '-m', 'celery', '-A', celery_app, 'beat',
-                '--loglevel=info'
-            ]
-            if 'django_celery_beat' in getattr(settings, 'INSTALLED_APPS', []):
-                beat_cmd.extend(['--scheduler', 'django_celery_beat.schedulers:DatabaseScheduler'])
-
-            beat_process = subprocess.Popen(
-                beat_cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                env=env
-            )
-
-            self.stdout.write(
-                self.style.SUCCESS(f'Beat scheduler started with PID: {beat_process.pid}')
-            )
-
-            # Start worker
-            worker_cmd = [
-                sys.executable, '-m', 'celery', '-A', celery_app, 'worker',
-                '--loglevel=info', f'--concurrency={workers}'
-            ]
-
-            self.stdout.write(
-                self.style.SUCCESS(f'Starting worker with {workers} processes...')
-            )
-
-            try:
-                subprocess.run(worker_cmd, check=True, env=env)
-            except KeyboardInterrupt:
-                self.stdout.write(
-                    self.style.WARNING('\nStopping Celery processes...')
-                )
-                beat_process.terminate()
-                beat_process.wait()
-                self.stdout.write(
-                    self.style.SUCCESS('Celery processes stopped.')
-                )
-            except subprocess.CalledProcessError as e:
-                self.stderr.write(self.style.ERROR(f'Celery worker failed (exit {e.returncode}).'))
-                # Also terminate beat if worker fails to start
-                beat_process.terminate()
-                beat_process.wait()
-                raise
-
-        elif worker_only:
-            # Start only worker
-            self.stdout.write(
-                self.style.SUCCESS(f'Starting Celery worker with {workers} processes...')
-            )
-
-            worker_cmd = [
-                sys.executable, '-m', 'celery', '-A', celery_app, 'worker',
-                '--loglevel=info', f'--concurrency={workers}'
-            ]
-
-            try:
-                subprocess.run(worker_cmd, check=True, env=env)
-            except KeyboardInterrupt:
-                self.stdout.write(
-                    self.style.SUCCESS('\nWorker stopped.')
-                )
-            except subprocess.CalledProcessError as e:
-                self.stderr.write(self.style.ERROR(f'Celery worker failed (exit {e.returncode}).'))
-                raise
-
-        elif beat_only:
-            # Start only beat
-            self.stdout.write(
-                self.style.SUCCESS('Starting Celery beat scheduler...')
-            )
-
-            beat_cmd = [
-                sys.executable, '-m', 'celery', '-A', celery_app, 'beat',
-                '--loglevel=info'
-            ]
-            if 'django_celery_beat' in getattr(settings, 'INSTALLED_APPS', []):
-                beat_cmd.extend(['--scheduler', 'django_celery_beat.schedulers:DatabaseScheduler'])
-
-            try:
-                subprocess.run(beat_cmd, check=True, env=env)
-            except KeyboardInterrupt:
-                self.stdout.write(
-                    self.style.SUCCESS('\nBeat scheduler stopped.')
-                )
-            except subprocess.CalledProcessError as e:
-                self.stderr.write(self.style.ERROR(f'Celery beat failed (exit {e.returncode}).'))
-                raise
+        return [sys.executable, '-m', 'celery', '-A', 'core', *args]
@@ -0,0 +1,223 @@
+# apps/multiparser/management/commands/telegram_stub_server.py
+
+import hashlib
+import itertools
+import json
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, unquote, urlparse
+
+from django.core.management.base import BaseCommand
+
+PATH_RE = re.compile(r"^/bot(?P<token>[^/]+)/(?P<method>\w+)$")
+BOUNDARY_RE = re.compile(r'boundary="?([^";]+)"?')
+# "document" qismining sarlavhalari - bo'sh qatorgacha; undan keyin fayl baytlari
+FILE_PART_RE = re.compile(rb'name="document"; filename="([^"]*)"\r\n(?:[^\r\n]+\r\n)*\r\n')
+READ_CHUNK = 64 * 1024
+
+
+class FilePartReader:
+    """
+    Multipart oqimidan faqat ``document`` qismining baytlarini sanaydi va
+    xeshlaydi - boundary va boshqa maydonlar file_id'ga ta'sir qilmaydi,
+    shuning uchun bir xil fayl har safar bir xil file_id oladi.
+    """
+
+    def __init__(self, boundary):
+        self.delimiter = b"\r\n--" + boundary
+        self.digest = hashlib.sha256()
+        self.size = 0
+        self.filename = None
+        self.buffer = b""
+        self.state = "head"
+
+    def feed(self, chunk):
+        if self.state == "done":
+            return
+        self.buffer += chunk
+        if self.state == "head":
+            match = FILE_PART_RE.search(self.buffer)
+            if not match:
+                return
+            self.filename = match.group(1).decode("utf-8", "replace")
+            self.buffer = self.buffer[match.end():]
+            self.state = "file"
+
+        end = self.buffer.find(self.delimiter)
+        if end >= 0:
+            self._consume(self.buffer[:end])
+            self.buffer, self.state = b"", "done"
+        else:
+            # Keyingi bo'lak bilan qo'shilib delimiter bo'lishi mumkin bo'lgan dumni saqlaymiz
+            cut = max(0, len(self.buffer) - len(self.delimiter) + 1)
+            self._consume(self.buffer[:cut])
+            self.buffer = self.buffer[cut:]
+
+    def _consume(self, data):
+        self.digest.update(data)
+        self.size += len(data)
+
+
+class StubState:
+    def __init__(self, max_upload_bytes, local, rate_limit_every):
+        self.max_upload_bytes = max_upload_bytes
+        self.local = local
+        self.rate_limit_every = rate_limit_every
+        self.requests = itertools.count(1)
+        self.message_ids = itertools.count(1)
+        self.lock = threading.Lock()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """
+    Bot API'ning kichik qismi: sendDocument (multipart yoki local ``file://``),
+    getMe va webhook metodlari. Fayl baytlari o'qiladi va tashlab yuboriladi,
+    file_id sifatida faqat fayl qismining SHA-256 xeshi qaytariladi.
+    """
+    server_version = "TelegramStub/1.0"
+
+    def do_GET(self):
+        self._dispatch()
+
+    def do_POST(self):
+        self._dispatch()
+
+    def _dispatch(self):
+        state = self.server.state
+        match = PATH_RE.match(urlparse(self.path).path)
+        if not match:
+            return self._reply(404, {"ok": False, "error_code": 404, "description": "Not Found"})
+
+        with state.lock:
+            number = next(state.requests)
+        if state.rate_limit_every and number % state.rate_limit_every == 0:
+            self._drain()
+            return self._reply(429, {"ok": False, "error_code": 429, "description": "Too Many Requests: retry after 3",
+                                     "parameters": {"retry_after": 3}})
+
+        method = match.group("method")
+        if method == "sendDocument":
+            return self._send_document()
+        self._drain()
+        if method == "getMe":
+            return self._reply(200, {"ok": True, "result": {"id": 1, "is_bot": True, "username": "stub_bot"}})
+        if method == "getWebhookInfo":
+            return self._reply(200, {"ok": True, "result": {"url": "", "pending_update_count": 0}})
+        if method in ("setWebhook", "deleteWebhook", "logOut"):
+            return self._reply(200, {"ok": True, "result": True})
+        self._reply(404, {"ok": False, "error_code": 404, "description": f"Method {method} is not stubbed"})
+
+    def _send_document(self):
+        state = self.server.state
+        content_type = self.headers.get("Content-Type", "")
+        digest = hashlib.sha256()
+        size, filename = 0, None
+
+        if content_type.startswith("multipart/form-data"):
+            boundary = BOUNDARY_RE.search(content_type)
+            if not boundary:
+                self._drain()
+                return self._reply(400, {"ok": False, "error_code": 400, "description": "Bad Request: no boundary"})
+            reader = FilePartReader(boundary.group(1).encode("utf-8"))
+            for chunk in self._body_chunks():
+                reader.feed(chunk)
+            if reader.state != "done":
+                return self._reply(400, {"ok": False, "error_code": 400, "description": "Bad Request: no document"})
+            digest, size, filename = reader.digest, reader.size, reader.filename
+        else:
+            fields = parse_qs(b"".join(self._body_chunks()).decode("utf-8"))
+            document = (fields.get("document") or [""])[0]
+            if not document.startswith("file://"):
+                return self._reply(400, {"ok": False, "error_code": 400, "description": "Bad Request: no document"})
+            if not state.local:
+                return self._reply(400, {"ok": False, "error_code": 400,
+                                         "description": "Bad Request: file:// requires --local"})
+            path = Path(unquote(urlparse(document).path))
+            if not path.is_file():
+                return self._reply(400, {"ok": False, "error_code": 400,
+                                         "description": f"Bad Request: file {path} not found"})
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(READ_CHUNK), b""):
+                    digest.update(chunk)
+                    size += len(chunk)
+            filename = path.name
+
+        if size > state.max_upload_bytes:
+            return self._reply(413, {"ok": False, "error_code": 413, "description": "Request Entity Too Large"})
+
+        with state.lock:
+            message_id = next(state.message_ids)
+        file_id = f"stub-{digest.hexdigest()}"
+        self._reply(200, {"ok": True, "result": {
+            "message_id": message_id,
+            "document": {"file_id": file_id, "file_unique_id": file_id[:21], "file_name": filename, "file_size": size},
+        }})
+
+    def _body_chunks(self):
+        if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            while True:
+                length = int(self.rfile.readline().split(b";")[0].strip() or b"0", 16)
+                if not length:
+                    self.rfile.readline()
+                    return
+                yield self.rfile.read(length)
+                self.rfile.readline()
+        remaining = int(self.headers.get("Content-Length") or 0)
+        while remaining > 0:
+            chunk = self.rfile.read(min(READ_CHUNK, remaining))
+            if not chunk:
+                return
+            remaining -= len(chunk)
+            yield chunk
+
+    def _drain(self):
+        for _ in self._body_chunks():
+            pass
+
+    def _reply(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        self.server.command.stdout.write(f"[TelegramStub] {self.address_string()} {format % args}")
+
+
+class Command(BaseCommand):
+    """
+    CI va lokal sinov uchun Telegram Bot API o'rnini bosuvchi server.
+    TELEGRAM_API_BASE_URL=http://localhost:8081 qilib ishlatiladi.
+    """
+    help = 'Runs a stand-in Telegram Bot API server (sendDocument, getMe, webhooks) for tests.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8081)
+        parser.add_argument('--local', action='store_true',
+                            help='Accept file:// documents like telegram-bot-api --local (limit 2000 MB)')
+        parser.add_argument('--max-upload-mb', type=int, default=None,
+                            help='Upload size limit in MB (default: 50, or 2000 with --local)')
+        parser.add_argument('--rate-limit-every', type=int, default=0,
+                            help='Answer every Nth request with 429 retry_after=3')
+
+    def handle(self, *args, **options):
+        max_upload_mb = options['max_upload_mb'] or (2000 if options['local'] else 50)
+        server = ThreadingHTTPServer((options['host'], options['port']), StubHandler)
+        server.state = StubState(max_upload_mb * 1024 * 1024, options['local'], options['rate_limit_every'])
+        server.command = self
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Telegram stub server http://{options['host']}:{options['port']} "
+            f"(local={options['local']}, limit={max_upload_mb} MB)"
+        ))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.WARNING("\nStopping Telegram stub server..."))
+        finally:
+            server.server_close()
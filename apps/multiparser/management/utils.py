@@ -0,0 +1,10 @@
+# apps/multiparser/management/utils.py
+
+import math
+
+
+def percentile(values, pct):
+    """Nearest-rank persentil (boshqaruv buyruqlari hisobotlari uchun)."""
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
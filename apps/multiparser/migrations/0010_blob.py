@@ -0,0 +1,33 @@
+# Generated by Django 5.1.4 on 2026-10-17 11:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('multiparser', '0009_remove_product_content_document_parsed_content'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Blob',
+            fields=[
+                ('sha256', models.CharField(max_length=64, primary_key=True, serialize=False, verbose_name='SHA-256')),
+                ('size', models.BigIntegerField(default=0, verbose_name='Size (bytes)')),
+                ('file_type', models.CharField(blank=True, max_length=20, verbose_name='File Type')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created At')),
+            ],
+            options={
+                'verbose_name': 'Blob',
+                'verbose_name_plural': 'Blobs',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='document',
+            name='blob',
+            field=models.ForeignKey(blank=True, help_text='Content-addressed stored file (SHA-256)', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='documents', to='multiparser.blob', verbose_name='Blob'),
+        ),
+    ]
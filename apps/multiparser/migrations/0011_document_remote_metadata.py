@@ -0,0 +1,33 @@
+# Generated by Django 5.1.4 on 2026-10-17 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('multiparser', '0010_blob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='document',
+            name='remote_content_length',
+            field=models.BigIntegerField(blank=True, null=True, verbose_name='Remote Content-Length'),
+        ),
+        migrations.AddField(
+            model_name='document',
+            name='remote_etag',
+            field=models.CharField(blank=True, db_index=True, max_length=255, null=True, verbose_name='Remote ETag'),
+        ),
+        migrations.AddField(
+            model_name='document',
+            name='remote_last_modified',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Remote Last-Modified'),
+        ),
+        migrations.AlterField(
+            model_name='document',
+            name='file_url',
+            field=models.URLField(blank=True, db_index=True, help_text='Direct link to the document file', null=True, verbose_name='File URL'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.1.4 on 2026-10-17 12:03
+
+import hashlib
+import json
+
+from django.db import migrations, models
+
+# Migratsiya vaqtidagi nusxa - ingest.payload_hash bilan bir xil bo'lishi kerak
+VOLATILE_PAYLOAD_KEYS = {"views_count"}
+
+
+def payload_hash(item):
+    stable = {key: value for key, value in item.items() if key not in VOLATILE_PAYLOAD_KEYS}
+    encoded = json.dumps(stable, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def backfill_payload_hash(apps, schema_editor):
+    """Saqlangan json_data crawl qilingan elementning o'zi - xeshni undan hisoblaymiz."""
+    Product = apps.get_model('multiparser', 'Product')
+    batch = []
+    queryset = Product.objects.filter(json_data__isnull=False).only('id', 'json_data')
+    for product in queryset.iterator(chunk_size=1000):
+        if isinstance(product.json_data, dict):
+            product.payload_hash = payload_hash(product.json_data)
+            batch.append(product)
+        if len(batch) >= 1000:
+            Product.objects.bulk_update(batch, ['payload_hash'])
+            batch = []
+    if batch:
+        Product.objects.bulk_update(batch, ['payload_hash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('multiparser', '0011_document_remote_metadata'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='payload_hash',
+            field=models.CharField(blank=True, help_text='SHA-256 of the normalized upstream payload (volatile keys excluded)', max_length=64, null=True, verbose_name='Payload Hash'),
+        ),
+        migrations.RunPython(backfill_payload_hash, migrations.RunPython.noop),
+    ]
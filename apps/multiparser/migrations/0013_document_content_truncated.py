@@ -0,0 +1,18 @@
+# Generated by Django 5.1.4 on 2026-10-17 12:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('multiparser', '0012_product_payload_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='document',
+            name='content_truncated',
+            field=models.BooleanField(default=False, help_text='Only the first pages/characters were extracted', verbose_name='Content Truncated'),
+        ),
+    ]
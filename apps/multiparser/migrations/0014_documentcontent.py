@@ -0,0 +1,29 @@
+# Generated by Django 5.1.4 on 2026-10-17 12:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('multiparser', '0013_document_content_truncated'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentContent',
+            fields=[
+                ('document', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='content', serialize=False, to='multiparser.document', verbose_name='Document')),
+                ('codec', models.CharField(choices=[('zlib', 'zlib'), ('zstd', 'zstd')], default='zlib', max_length=10, verbose_name='Codec')),
+                ('data', models.BinaryField(verbose_name='Compressed Text')),
+                ('length', models.PositiveIntegerField(default=0, verbose_name='Length (chars)')),
+                ('content_hash', models.CharField(blank=True, help_text='SHA-256 of the uncompressed text', max_length=64, null=True, verbose_name='Content Hash')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Updated At')),
+            ],
+            options={
+                'verbose_name': 'Document Content',
+                'verbose_name_plural': 'Document Contents',
+            },
+        ),
+    ]
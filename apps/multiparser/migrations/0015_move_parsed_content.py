@@ -0,0 +1,84 @@
+# Generated by Django 5.1.4 on 2026-10-17 12:12
+
+import hashlib
+import zlib
+
+from django.db import migrations, transaction
+
+try:
+    import zstandard
+except ImportError:  # ixtiyoriy paket - zstd qatorlari bo'lsa orqaga qaytarish to'xtatiladi
+    zstandard = None
+
+CHUNK_SIZE = 500
+
+
+def move_parsed_content(apps, schema_editor):
+    """
+    Document.parsed_content -> DocumentContent (zlib). Bo'laklab, har bo'lak
+    alohida tranzaksiyada; to'xtab qolsa qayta ishga tushirish xavfsiz -
+    allaqachon ko'chirilganlari o'tkazib yuboriladi.
+    """
+    Document = apps.get_model('multiparser', 'Document')
+    DocumentContent = apps.get_model('multiparser', 'DocumentContent')
+    queryset = (
+        Document.objects.exclude(parsed_content__isnull=True).exclude(parsed_content='')
+        .filter(content__isnull=True).order_by('pk')
+    )
+    last_pk = None
+    while True:
+        chunk = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+        rows = list(chunk.values_list('pk', 'parsed_content')[:CHUNK_SIZE])
+        if not rows:
+            break
+        with transaction.atomic():
+            DocumentContent.objects.bulk_create([
+                DocumentContent(
+                    document_id=pk,
+                    codec='zlib',
+                    data=zlib.compress(text.encode('utf-8'), 6),
+                    length=len(text),
+                    content_hash=hashlib.sha256(text.encode('utf-8')).hexdigest(),
+                )
+                for pk, text in rows
+            ], ignore_conflicts=True)
+        last_pk = rows[-1][0]
+
+
+def decompress(data, codec):
+    if codec == 'zstd':
+        return zstandard.ZstdDecompressor().decompress(bytes(data)).decode('utf-8')
+    return zlib.decompress(bytes(data)).decode('utf-8')
+
+
+def restore_parsed_content(apps, schema_editor):
+    """
+    DocumentContent -> Document.parsed_content, ikkala codec (zlib va zstd) uchun.
+    zstd qatorlari bor-u, "zstandard" o'rnatilmagan bo'lsa hech narsa yozilmaydi.
+    """
+    Document = apps.get_model('multiparser', 'Document')
+    DocumentContent = apps.get_model('multiparser', 'DocumentContent')
+    if zstandard is None and DocumentContent.objects.filter(codec='zstd').exists():
+        raise RuntimeError("zstd-compressed content exists; install 'zstandard' before reversing this migration")
+
+    batch = []
+    for content in DocumentContent.objects.iterator(chunk_size=CHUNK_SIZE):
+        batch.append(Document(pk=content.document_id, parsed_content=decompress(content.data, content.codec)))
+        if len(batch) >= CHUNK_SIZE:
+            Document.objects.bulk_update(batch, ['parsed_content'])
+            batch = []
+    if batch:
+        Document.objects.bulk_update(batch, ['parsed_content'])
+
+
+class Migration(migrations.Migration):
+    # Har bo'lak o'z tranzaksiyasida commit qilinadi
+    atomic = False
+
+    dependencies = [
+        ('multiparser', '0014_documentcontent'),
+    ]
+
+    operations = [
+        migrations.RunPython(move_parsed_content, restore_parsed_content),
+    ]
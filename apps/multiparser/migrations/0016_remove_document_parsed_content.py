@@ -0,0 +1,17 @@
+# Generated by Django 5.1.4 on 2026-10-17 12:11
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('multiparser', '0015_move_parsed_content'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='document',
+            name='parsed_content',
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.1.4 on 2026-10-17 12:24
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('multiparser', '0016_remove_document_parsed_content'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PipelineState',
+            fields=[
+                ('document', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='pipeline', serialize=False, to='multiparser.document', verbose_name='Document')),
+                ('stage', models.CharField(choices=[('download', 'Download'), ('parse', 'Parse'), ('index', 'Index'), ('telegram', 'Telegram'), ('delete', 'Delete'), ('done', 'Done'), ('failed', 'Failed')], default='download', max_length=20, verbose_name='Stage')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, help_text='Claims of the current stage', verbose_name='Attempts')),
+                ('lease_owner', models.CharField(blank=True, help_text='Celery task id holding the stage', max_length=255, null=True, verbose_name='Lease Owner')),
+                ('lease_expires_at', models.DateTimeField(blank=True, null=True, verbose_name='Lease Expires At')),
+                ('heartbeat_at', models.DateTimeField(blank=True, null=True, verbose_name='Heartbeat At')),
+                ('last_error', models.TextField(blank=True, null=True, verbose_name='Last Error')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Updated At')),
+            ],
+            options={
+                'verbose_name': 'Pipeline State',
+                'verbose_name_plural': 'Pipeline States',
+                'indexes': [models.Index(condition=models.Q(('stage__in', ['done', 'failed']), _negated=True), fields=['stage', 'lease_expires_at'], name='pipeline_actionable_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 5.1.4 on 2026-10-17 12:25
+
+from django.db import migrations, transaction
+from django.db.models import Exists, OuterRef
+
+CHUNK_SIZE = 500
+
+
+def stage_for(row):
+    """Eski holat ustunlaridan hujjatning joriy pipeline bosqichi."""
+    if row['download_status'] == 'failed':
+        return 'failed'
+    if row['download_status'] != 'downloaded':
+        return 'download'
+    if not row['has_content']:
+        return 'parse'
+    if not row['is_indexed']:
+        return 'index'
+    if row['telegram_status'] == 'skipped':
+        return 'done'
+    if row['telegram_status'] != 'sent':
+        return 'telegram'
+    if not row['delete_from_server']:
+        return 'delete'
+    return 'done'
+
+
+def backfill_pipeline_state(apps, schema_editor):
+    """
+    Har hujjat uchun PipelineState qatori. Bo'laklab, har bo'lak alohida
+    tranzaksiyada; qayta ishga tushirish xavfsiz - mavjud qatorlar o'zgarmaydi.
+    """
+    Document = apps.get_model('multiparser', 'Document')
+    DocumentContent = apps.get_model('multiparser', 'DocumentContent')
+    PipelineState = apps.get_model('multiparser', 'PipelineState')
+    queryset = (
+        Document.objects.filter(pipeline__isnull=True)
+        .annotate(has_content=Exists(DocumentContent.objects.filter(document_id=OuterRef('pk'))))
+        .order_by('pk')
+    )
+    fields = ('pk', 'download_status', 'has_content', 'is_indexed', 'telegram_status', 'delete_from_server')
+    last_pk = None
+    while True:
+        chunk = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+        rows = list(chunk.values(*fields)[:CHUNK_SIZE])
+        if not rows:
+            break
+        with transaction.atomic():
+            PipelineState.objects.bulk_create(
+                [PipelineState(document_id=row['pk'], stage=stage_for(row)) for row in rows],
+                ignore_conflicts=True
+            )
+        last_pk = rows[-1]['pk']
+
+
+class Migration(migrations.Migration):
+    # Har bo'lak o'z tranzaksiyasida commit qilinadi
+    atomic = False
+
+    dependencies = [
+        ('multiparser', '0017_pipelinestate'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_pipeline_state, migrations.RunPython.noop),
+    ]
@@ -28,6 +28,27 @@ class Seller(models.Model):
         return reverse('admin:multiparser_seller_change', args=[str(self.id)])
 
 
+class Blob(models.Model):
+    """Content-addressed stored file: bir xil baytli fayllar bitta blob'ga tushadi"""
+    sha256 = models.CharField(max_length=64, primary_key=True, verbose_name="SHA-256")
+    size = models.BigIntegerField(default=0, verbose_name="Size (bytes)")
+    file_type = models.CharField(max_length=20, blank=True, verbose_name="File Type")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Created At")
+
+    class Meta:
+        verbose_name = "Blob"
+        verbose_name_plural = "Blobs"
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.sha256[:12]}{self.file_type} ({self.size} bytes)"
+
+    @property
+    def relative_path(self):
+        """MEDIA_ROOT ichidagi yo'l: blobs/ab/cd/<sha256><ext>"""
+        return f"blobs/{self.sha256[:2]}/{self.sha256[2:4]}/{self.sha256}{self.file_type}"
+
+
 class Document(models.Model):
     """Document model for file information"""
     CONTENT_TYPE_CHOICES = [
@@ -68,7 +89,7 @@ class Document(models.Model):
         default='file',
         verbose_name="Content Type"
     )
-    file_url = models.URLField(blank=True, null=True, verbose_name="File URL",
+    file_url = models.URLField(blank=True, null=True, db_index=True, verbose_name="File URL",
                                help_text="Direct link to the document file")
     file_path = models.CharField(max_length=500, blank=True, null=True, verbose_name="Local File Path",
                                  help_text="Path where file is saved locally")
@@ -84,6 +105,12 @@ class Document(models.Model):
     download_started_at = models.DateTimeField(blank=True, null=True, verbose_name="Download Started At")
     download_completed_at = models.DateTimeField(blank=True, null=True, verbose_name="Download Completed At")
     download_error = models.TextField(blank=True, null=True, verbose_name="Download Error")
+    remote_etag = models.CharField(max_length=255, blank=True, null=True, db_index=True,
+                                   verbose_name="Remote ETag")
+    remote_content_length = models.BigIntegerField(blank=True, null=True, verbose_name="Remote Content-Length")
+    remote_last_modified = models.DateTimeField(blank=True, null=True, verbose_name="Remote Last-Modified")
+    blob = models.ForeignKey(Blob, on_delete=models.SET_NULL, blank=True, null=True, related_name='documents',
+                             verbose_name="Blob", help_text="Content-addressed stored file (SHA-256)")
 
     # Telegram integration
     telegram_status = models.CharField(max_length=255, choices=TELEGRAM_STATUS_CHOICES, default='pending',
@@ -98,7 +125,8 @@ class Document(models.Model):
 
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Created At")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Updated At")
-    parsed_content = models.TextField(blank=True, null=True, verbose_name="Parsed Content")
+    content_truncated = models.BooleanField(default=False, verbose_name="Content Truncated",
+                                            help_text="Only the first pages/characters were extracted")
 
     class Meta:
         verbose_name = "Document"
@@ -122,6 +150,67 @@ class Document(models.Model):
         return bool(self.file_url)
 
 
+class DocumentContent(models.Model):
+    """Parse qilingan matn: Document qatoridan alohida, siqilgan holda (faqat indexer o'qiydi)"""
+    CODEC_CHOICES = [
+        ('zlib', 'zlib'),
+        ('zstd', 'zstd'),
+    ]
+
+    document = models.OneToOneField(Document, on_delete=models.CASCADE, primary_key=True,
+                                    related_name='content', verbose_name="Document")
+    codec = models.CharField(max_length=10, choices=CODEC_CHOICES, default='zlib', verbose_name="Codec")
+    data = models.BinaryField(verbose_name="Compressed Text")
+    length = models.PositiveIntegerField(default=0, verbose_name="Length (chars)")
+    content_hash = models.CharField(max_length=64, blank=True, null=True, verbose_name="Content Hash",
+                                    help_text="SHA-256 of the uncompressed text")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Updated At")
+
+    class Meta:
+        verbose_name = "Document Content"
+        verbose_name_plural = "Document Contents"
+
+    def __str__(self):
+        return f"{self.document_id} ({self.length} chars, {self.codec})"
+
+
+class PipelineState(models.Model):
+    """Hujjatning pipeline'dagi joriy bosqichi va uni bajarayotgan worker'ning lease'i"""
+    STAGE_CHOICES = [
+        ('download', 'Download'),
+        ('parse', 'Parse'),
+        ('index', 'Index'),
+        ('telegram', 'Telegram'),
+        ('delete', 'Delete'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    document = models.OneToOneField(Document, on_delete=models.CASCADE, primary_key=True,
+                                    related_name='pipeline', verbose_name="Document")
+    stage = models.CharField(max_length=20, choices=STAGE_CHOICES, default='download', verbose_name="Stage")
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name="Attempts",
+                                                help_text="Claims of the current stage")
+    lease_owner = models.CharField(max_length=255, blank=True, null=True, verbose_name="Lease Owner",
+                                   help_text="Celery task id holding the stage")
+    lease_expires_at = models.DateTimeField(blank=True, null=True, verbose_name="Lease Expires At")
+    heartbeat_at = models.DateTimeField(blank=True, null=True, verbose_name="Heartbeat At")
+    last_error = models.TextField(blank=True, null=True, verbose_name="Last Error")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Updated At")
+
+    class Meta:
+        verbose_name = "Pipeline State"
+        verbose_name_plural = "Pipeline States"
+        indexes = [
+            # Faqat ishlanadigan qatorlar - tugagan hujjatlar indeksga tushmaydi
+            models.Index(fields=['stage', 'lease_expires_at'], name='pipeline_actionable_idx',
+                         condition=~models.Q(stage__in=['done', 'failed'])),
+        ]
+
+    def __str__(self):
+        return f"{self.document_id} ({self.stage}, attempts={self.attempts})"
+
+
 class Product(models.Model):
     """Product model for digital products"""
     id = models.IntegerField(primary_key=True, verbose_name="Product ID")
@@ -146,6 +235,8 @@ class Product(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Created At")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Updated At")
     json_data = models.JSONField(blank=True, null=True, verbose_name="JSON Data")
+    payload_hash = models.CharField(max_length=64, blank=True, null=True, verbose_name="Payload Hash",
+                                    help_text="SHA-256 of the normalized upstream payload (volatile keys excluded)")
 
 
     class Meta:
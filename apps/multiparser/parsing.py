@@ -0,0 +1,251 @@
+# apps/multiparser/parsing.py
+
+import itertools
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from html.parser import HTMLParser
+from pathlib import Path
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+from .extractors import PAGE_BREAK, ExtractionError, extract_plain_text, get_extractor, run_extractor
+
+# --- Logger ---
+logger = logging.getLogger(__name__)
+
+# --- Tika sozlamalari ---
+TIKA_URLS = [url.rstrip("/") for url in getattr(settings, "TIKA_URLS", None) or [settings.TIKA_URL]]
+TIKA_TIMEOUT_BASE = getattr(settings, "TIKA_TIMEOUT_BASE", 30)
+TIKA_TIMEOUT_PER_MB = getattr(settings, "TIKA_TIMEOUT_PER_MB", 5)
+TIKA_TIMEOUT_MAX = getattr(settings, "TIKA_TIMEOUT_MAX", 480)
+TIKA_ENDPOINT_COOLDOWN = getattr(settings, "TIKA_ENDPOINT_COOLDOWN", 30)
+
+# --- Qisman parse siyosati (kengaytma bo'yicha, "default" - qolganlari) ---
+PARSE_POLICIES = getattr(settings, "PARSE_POLICIES", {"default": {}})
+TIKA_STREAM_CHUNK = 64 * 1024
+
+
+class ParseError(Exception):
+    pass
+
+
+@dataclass
+class ParseLimits:
+    max_pages: int = None
+    max_chars: int = None
+
+
+@dataclass
+class Extraction:
+    text: str
+    truncated: bool = False
+
+
+def parse_limits(path):
+    """Fayl kengaytmasiga mos qisman parse chegaralari (``PARSE_POLICIES``)."""
+    policy = PARSE_POLICIES.get(Path(path).suffix.lower(), PARSE_POLICIES.get("default", {}))
+    return ParseLimits(max_pages=policy.get("max_pages"), max_chars=policy.get("max_chars"))
+
+
+def cap_text(text, max_chars):
+    if max_chars and len(text) > max_chars:
+        return Extraction(text[:max_chars], truncated=True)
+    return Extraction(text)
+
+
+class PageTextParser(HTMLParser):
+    """
+    Tika XHTML oqimidan matn yig'adi va ``<div class="page">`` sahifalarni
+    sanaydi. Har sahifa ``PAGE_BREAK`` bilan boshlanadi. ``max_pages``
+    berilsa, undan keyingi sahifa boshlanganda ``done`` bo'ladi.
+    """
+    BLOCK_TAGS = {"p", "div", "br", "li", "tr", "h1", "h2", "h3", "h4", "h5", "h6"}
+
+    def __init__(self, max_pages=None):
+        super().__init__()
+        self.max_pages = max_pages
+        self.pages = 0
+        self.length = 0
+        self.done = False
+        self.in_head = False
+        self.parts = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "head":
+            self.in_head = True
+        elif tag == "div" and "page" in (dict(attrs).get("class") or "").split():
+            self.pages += 1
+            if self.max_pages and self.pages > self.max_pages:
+                self.done = True
+            elif self.pages > 1:
+                self._append(PAGE_BREAK)
+        if tag in self.BLOCK_TAGS and not self.done:
+            self._append("\n")
+
+    def handle_endtag(self, tag):
+        if tag == "head":
+            self.in_head = False
+
+    def handle_data(self, data):
+        if not self.done and not self.in_head:
+            self._append(data)
+
+    def _append(self, text):
+        self.parts.append(text)
+        self.length += len(text)
+
+    def text(self):
+        return "".join(self.parts)
+
+
+def parse_timeout(size_bytes):
+    """Fayl hajmiga qarab o'qish timeout'i: bazaviy + har MB uchun, yuqoridan cheklangan."""
+    return min(TIKA_TIMEOUT_MAX, TIKA_TIMEOUT_BASE + TIKA_TIMEOUT_PER_MB * size_bytes / (1024 * 1024))
+
+
+class TikaClient:
+    """
+    Bir yoki bir nechta Tika serveriga pooled HTTP klient.
+
+    Endpoint'lar round-robin tartibida tanlanadi. Ulanib bo'lmagan yoki 5xx
+    javob bergan endpoint ``cooldown`` soniyaga chetlatiladi va so'rov
+    keyingisiga o'tadi. Sessiya har worker jarayoni uchun alohida yaratiladi.
+    """
+
+    def __init__(self, urls, cooldown=TIKA_ENDPOINT_COOLDOWN):
+        self.urls = list(urls)
+        self.cooldown = cooldown
+        self._cycle = itertools.cycle(range(len(self.urls)))
+        self._down_until = {}
+        self._lock = threading.Lock()
+        self._session = None
+        self._session_pid = None
+
+    @property
+    def session(self):
+        with self._lock:
+            if self._session is None or self._session_pid != os.getpid():
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=len(self.urls), pool_maxsize=4)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                self._session, self._session_pid = session, os.getpid()
+            return self._session
+
+    def endpoints(self):
+        """Navbatdagi endpoint'dan boshlab, sog'lomlari avval, chetlatilganlari oxirida."""
+        with self._lock:
+            start = next(self._cycle)
+            now = time.monotonic()
+            ordered = self.urls[start:] + self.urls[:start]
+            healthy = [url for url in ordered if self._down_until.get(url, 0) <= now]
+            return healthy + [url for url in ordered if url not in healthy]
+
+    def mark_down(self, url):
+        with self._lock:
+            self._down_until[url] = time.monotonic() + self.cooldown
+
+    def extract(self, path, content_type=None, limits=None, timeout=None):
+        """
+        Faylni ``PUT /tika`` ga diskdan oqim bilan yuboradi. Javob XHTML oqimi
+        sifatida o'qiladi (sahifa div'lari ``PAGE_BREAK`` bo'ladi) va chegaralar
+        berilsa, chegaraga yetganda ulanish yopiladi.
+
+        ``timeout`` - barcha endpoint'lar uchun umumiy vaqt (standart: hajmga
+        qarab ``parse_timeout``). Keyingi endpoint'ga faqat ulanish xatosi yoki
+        5xx javobda o'tiladi; o'qish timeout'i (Tika faylni parse qilib
+        ulgurmadi) darhol ``ParseError`` - boshqa server ham shu faylda qotadi.
+        """
+        path = Path(path)
+        limits = limits or ParseLimits()
+        size = path.stat().st_size
+        deadline = time.monotonic() + (timeout or parse_timeout(size))
+        headers = {"Accept": "text/html; charset=UTF-8"}
+        if content_type:
+            headers["Content-Type"] = content_type
+
+        last_error = None
+        for url in self.endpoints():
+            started = time.monotonic()
+            remaining = deadline - started
+            if remaining <= 0:
+                raise ParseError(f"Tika time budget exhausted for {path.name}: {last_error}")
+            try:
+                with open(path, "rb") as f:
+                    response = self.session.put(f"{url}/tika", data=f, headers=headers,
+                                                timeout=(min(5, remaining), remaining), stream=True)
+            except requests.ConnectionError as e:
+                # ConnectTimeout ham shu yerga tushadi
+                last_error = e
+                self.mark_down(url)
+                logger.warning(f"[Parse] Tika endpoint {url} failed, trying next: {e}")
+                continue
+            except requests.Timeout as e:
+                raise ParseError(f"Tika {url} timed out parsing {path.name} after "
+                                 f"{time.monotonic() - started:.0f}s") from e
+
+            with response:
+                if response.status_code >= 500:
+                    last_error = ParseError(f"Tika {url} returned {response.status_code}")
+                    self.mark_down(url)
+                    logger.warning(f"[Parse] Tika endpoint {url} returned {response.status_code}, trying next")
+                    continue
+                if response.status_code != 200:
+                    # 415/422 - fayl turi qo'llab-quvvatlanmaydi yoki shifrlangan; boshqa server ham yordam bermaydi
+                    raise ParseError(f"Tika {url} rejected {path.name}: HTTP {response.status_code}")
+
+                response.encoding = "utf-8"
+                result = self._read(response, limits, deadline)
+
+            logger.info(f"[Parse] Tika {url} parsed {path.name} ({size} bytes) "
+                        f"in {time.monotonic() - started:.1f}s" + (", truncated" if result.truncated else ""))
+            return result
+
+        raise ParseError(f"All Tika endpoints failed for {path.name}: {last_error}")
+
+    @staticmethod
+    def _read(response, limits, deadline):
+        parser = PageTextParser(limits.max_pages)
+        for chunk in response.iter_content(chunk_size=TIKA_STREAM_CHUNK, decode_unicode=True):
+            parser.feed(chunk)
+            if parser.done or (limits.max_chars and parser.length > limits.max_chars):
+                break
+            if time.monotonic() > deadline:
+                raise ParseError("Tika response did not finish within the time budget")
+        parser.close()
+        result = cap_text(parser.text(), limits.max_chars)
+        return Extraction(result.text, truncated=result.truncated or parser.done)
+
+
+tika_client = TikaClient(TIKA_URLS)
+
+
+def extract_text(path, content_type=None, limits=None, timeout=None):
+    """
+    Fayldan matn ajratadi va ``Extraction`` qaytaradi. Ro'yxatdagi mahalliy
+    extractor (``.txt``, OOXML) bo'lsa avval u ishlatiladi; u xato bersa yoki
+    bo'sh matn qaytarsa, shuningdek PDF va eski binar formatlar uchun Tika.
+    ``limits`` berilmasa fayl to'liq parse qilinadi; ``timeout`` - Tika uchun
+    umumiy vaqt (standart: fayl hajmiga qarab).
+    """
+    path = Path(path)
+    limits = limits or ParseLimits()
+    extractor = extract_plain_text if content_type == "text/plain" else get_extractor(path)
+    if extractor is not None:
+        started = time.monotonic()
+        try:
+            text = run_extractor(extractor, path)
+        except ExtractionError as e:
+            logger.warning(f"[Parse] {e}, falling back to Tika")
+        else:
+            if text and text.strip():
+                logger.info(f"[Parse] {extractor.__name__} parsed {path.name} "
+                            f"in {time.monotonic() - started:.2f}s")
+                return cap_text(text, limits.max_chars)
+            logger.info(f"[Parse] {extractor.__name__} returned no text for {path.name}, falling back to Tika")
+    return tika_client.extract(path, content_type=content_type, limits=limits, timeout=timeout)
@@ -0,0 +1,219 @@
+# apps/multiparser/pipeline.py
+
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import F, Q
+from django.utils import timezone
+from .models import PipelineState
+
+# --- Logger ---
+logger = logging.getLogger(__name__)
+
+# Bosqichlar tartibi: hujjat faqat oldinga siljiydi ("failed" - tashqarida)
+STAGES = ["download", "parse", "index", "telegram", "delete", "done"]
+ACTIVE_STAGES = STAGES[:-1]
+
+# Worker shu muddat ichida heartbeat yubormasa bosqichni boshqa worker oladi
+PIPELINE_LEASE_SECONDS = getattr(settings, "PIPELINE_LEASE_SECONDS", 900)
+
+
+class StageNotReady(Exception):
+    """Oldingi bosqich hali tugamagan - vazifa autoretry bilan keyinroq qayta uriniladi."""
+
+
+def is_past(current, stage):
+    """``current`` bosqich ``stage`` dan keyinmi (ya'ni ``stage`` allaqachon bajarilgan)."""
+    return current in STAGES and STAGES.index(current) > STAGES.index(stage)
+
+
+def next_stage(stage):
+    return STAGES[STAGES.index(stage) + 1]
+
+
+def get_stage(document_id):
+    return PipelineState.objects.filter(document_id=document_id).values_list("stage", flat=True).first()
+
+
+def _claimable(now, owner):
+    # Lease yo'q, muddati o'tgan yoki shu task'ning o'zi (retry / acks_late qayta yetkazish)
+    return Q(lease_expires_at__isnull=True) | Q(lease_expires_at__lt=now) | Q(lease_owner=owner)
+
+
+def claim(document_id, stage, owner, lease_seconds=PIPELINE_LEASE_SECONDS):
+    """
+    Hujjat ``stage`` bosqichida va bo'sh bo'lsa, uni ``owner`` uchun lease qiladi.
+
+    Qulflash va tekshirish bitta atomar ``UPDATE ... RETURNING`` - qatorni
+    boshqa worker band qilgan bo'lsa, kutish yoki istisno yo'q, shunchaki
+    ``None`` qaytadi. Muvaffaqiyatda bosqichning urinishlar sonini qaytaradi.
+    """
+    now = timezone.now()
+    expires_at = now + timedelta(seconds=lease_seconds)
+
+    if connection.vendor not in ("postgresql", "sqlite"):
+        # RETURNING'siz backend'lar: shartli UPDATE, so'ng o'qish
+        updated = PipelineState.objects.filter(_claimable(now, owner), document_id=document_id, stage=stage).update(
+            lease_owner=owner, lease_expires_at=expires_at, heartbeat_at=now, updated_at=now,
+            attempts=F("attempts") + 1
+        )
+        if not updated:
+            return None
+        return PipelineState.objects.filter(document_id=document_id).values_list("attempts", flat=True).first()
+
+    ops = connection.ops
+    pk_field = PipelineState._meta.pk
+    sql = (
+        f"UPDATE {ops.quote_name(PipelineState._meta.db_table)} "
+        "SET lease_owner = %s, lease_expires_at = %s, heartbeat_at = %s, updated_at = %s, attempts = attempts + 1 "
+        "WHERE document_id = %s AND stage = %s "
+        "AND (lease_expires_at IS NULL OR lease_expires_at < %s OR lease_owner = %s) "
+        "RETURNING attempts"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [
+            owner,
+            ops.adapt_datetimefield_value(expires_at),
+            ops.adapt_datetimefield_value(now),
+            ops.adapt_datetimefield_value(now),
+            pk_field.get_db_prep_value(document_id, connection),
+            stage,
+            ops.adapt_datetimefield_value(now),
+            owner,
+        ])
+        row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def heartbeat(owner, lease_seconds=PIPELINE_LEASE_SECONDS):
+    """``owner`` ushlab turgan barcha lease'larni uzaytiradi. ``0`` - lease boshqa worker'ga o'tib ketgan."""
+    now = timezone.now()
+    return PipelineState.objects.filter(lease_owner=owner).update(
+        heartbeat_at=now, lease_expires_at=now + timedelta(seconds=lease_seconds), updated_at=now
+    )
+
+
+@contextmanager
+def keep_alive(owner, lease_seconds=PIPELINE_LEASE_SECONDS):
+    """
+    Uzoq bosqich (katta yuklash, parse, Telegram upload) davomida lease'ni fon
+    oqimida har ``lease_seconds / 3`` soniyada uzaytirib turadi.
+    """
+    stop = threading.Event()
+
+    def beat():
+        try:
+            while not stop.wait(lease_seconds / 3):
+                if not heartbeat(owner, lease_seconds):
+                    logger.warning(f"[Pipeline] Lease lost by {owner}")
+                    return
+        except Exception as e:
+            logger.error(f"[Pipeline] Heartbeat failed for {owner}: {e}")
+        finally:
+            # Oqimning o'z DB ulanishi
+            connection.close()
+
+    thread = threading.Thread(target=beat, name=f"pipeline-heartbeat-{owner}", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join(timeout=5)
+
+
+def advance(document_id, stage, to_stage=None, owner=None):
+    """
+    ``stage`` -> ``to_stage`` (standart: keyingi bosqich): lease bo'shatiladi, urinishlar nolga tushadi.
+    ``owner`` berilsa faqat lease egasi siljita oladi. Qaytaradi: siljidimi.
+    """
+    to_stage = to_stage or next_stage(stage)
+    queryset = PipelineState.objects.filter(document_id=document_id, stage=stage)
+    if owner is not None:
+        queryset = queryset.filter(lease_owner=owner)
+    advanced = queryset.update(stage=to_stage, attempts=0, lease_owner=None, lease_expires_at=None,
+                               last_error=None, updated_at=timezone.now())
+    if advanced:
+        logger.info(f"[Pipeline] {document_id}: {stage} -> {to_stage}")
+    return bool(advanced)
+
+
+def release(document_id, owner, error=None):
+    """Lease'ni bosqichni o'zgartirmasdan bo'shatadi (qayta rejalashtirish yoki kutish uchun)."""
+    updates = {"lease_owner": None, "lease_expires_at": None, "updated_at": timezone.now()}
+    if error:
+        updates["last_error"] = str(error)[:1000]
+    PipelineState.objects.filter(document_id=document_id, lease_owner=owner).update(**updates)
+
+
+def fail(document_id, stage, error):
+    """Retry'lar tugadi - hujjat ``failed`` bosqichiga o'tadi (qaysi bosqichda - xatoda)."""
+    failed = PipelineState.objects.filter(document_id=document_id, stage=stage).update(
+        stage="failed", lease_owner=None, lease_expires_at=None,
+        last_error=f"[{stage}] {error}"[:1000], updated_at=timezone.now()
+    )
+    if failed:
+        logger.error(f"[Pipeline] {document_id} failed at {stage}: {error}")
+    return bool(failed)
+
+
+def ensure(document_id, stage="download"):
+    """
+    Navbatga qo'yishdan oldin: qator bo'lmasa ``stage`` da yaratiladi, ``failed``
+    hujjat qayta tiriladi. Ishlayotgan yoki oldinroq borgan hujjat o'zgarmaydi.
+    """
+    state, created = PipelineState.objects.get_or_create(document_id=document_id, defaults={"stage": stage})
+    if not created and state.stage == "failed":
+        PipelineState.objects.filter(document_id=document_id, stage="failed").update(
+            stage=stage, attempts=0, lease_owner=None, lease_expires_at=None, updated_at=timezone.now()
+        )
+
+
+def reset(document_id, stage="download"):
+    """Hujjatni majburan ``stage`` ga qaytaradi (manbadagi fayl o'zgargan yoki natija ko'chirilgan)."""
+    PipelineState.objects.update_or_create(document_id=document_id, defaults={
+        "stage": stage, "attempts": 0, "lease_owner": None, "lease_expires_at": None, "last_error": None,
+    })
+
+
+def advance_indexed(document_ids):
+    """
+    Bulk indexer muvaffaqiyatli yozgan hujjatlar Index bosqichidan chiqadi.
+    Faylga egalik qilmaydigan (natijasi ko'chirilgan) hujjatlar uchun pipeline shu yerda tugaydi.
+    Telegram bosqichiga o'tgan hujjatlar id'larini qaytaradi - ular uchun zanjir navbatga qo'yiladi.
+    """
+    now = timezone.now()
+    cleared = {"attempts": 0, "lease_owner": None, "lease_expires_at": None, "last_error": None, "updated_at": now}
+    states = PipelineState.objects.filter(document_id__in=document_ids, stage="index")
+    states.filter(document__delete_from_server=True).update(stage="done", **cleared)
+    to_telegram = list(states.values_list("document_id", flat=True))
+    states.filter(document_id__in=to_telegram).update(stage="telegram", **cleared)
+    return to_telegram
+
+
+def stalled(older_than, limit=500):
+    """
+    Ishlanadigan, lekin hech kim ushlab turmagan hujjatlar: lease muddati o'tgan
+    (worker o'lgan) yoki lease'siz ``older_than`` soniyadan beri turgan (xabar yo'qolgan).
+    Partial indeks (``pipeline_actionable_idx``) faqat shu qatorlarni qamraydi.
+    """
+    now = timezone.now()
+    return list(
+        PipelineState.objects.filter(stage__in=ACTIVE_STAGES)
+        .filter(Q(lease_expires_at__lt=now)
+                | Q(lease_expires_at__isnull=True, updated_at__lt=now - timedelta(seconds=older_than)))
+        .order_by("updated_at")
+        .values_list("document_id", "stage")[:limit]
+    )
+
+
+def touch(document_ids):
+    """Qayta navbatga qo'yilgan hujjatlar: muddati o'tgan lease tozalanadi, keyingi tekshiruv soati qayta boshlanadi."""
+    now = timezone.now()
+    return PipelineState.objects.filter(document_id__in=document_ids).filter(
+        Q(lease_expires_at__isnull=True) | Q(lease_expires_at__lt=now)
+    ).update(lease_owner=None, lease_expires_at=None, updated_at=now)
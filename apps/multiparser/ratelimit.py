@@ -0,0 +1,105 @@
+# apps/multiparser/ratelimit.py
+
+import hashlib
+import logging
+
+from django.conf import settings
+
+# --- Logger ---
+logger = logging.getLogger(__name__)
+
+# --- Telegram limitlari (barcha worker'lar uchun umumiy, Redis'da) ---
+TELEGRAM_CHAT_RATE_PER_MINUTE = getattr(settings, "TELEGRAM_CHAT_RATE_PER_MINUTE", 20)
+TELEGRAM_BOT_RATE_PER_SECOND = getattr(settings, "TELEGRAM_BOT_RATE_PER_SECOND", 30)
+TELEGRAM_RESERVE_AHEAD = getattr(settings, "TELEGRAM_RESERVE_AHEAD", 60)  # soniya
+
+# GCRA (token bucket'ning "keyingi bo'sh vaqt" ko'rinishi): har kalitda keyingi
+# slot vaqti (ms) saqlanadi. Slot barcha kalitlar bo'yicha hisoblanadi va
+# ``max_wait`` dan uzoq bo'lmasa hammasida birdaniga band qilinadi.
+# ARGV: max_wait_ms, so'ng har kalit uchun interval_ms va burst.
+# Natija: 0 - hozir yuborish mumkin, >0 - shuncha ms'dan keyin slot band
+# qilindi, <0 - slot juda uzoqda, hech narsa band qilinmadi.
+RESERVE_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local max_wait = tonumber(ARGV[1])
+local start = now
+local tats = {}
+for i, key in ipairs(KEYS) do
+    local interval = tonumber(ARGV[2 * i])
+    local burst = tonumber(ARGV[2 * i + 1])
+    local tat = tonumber(redis.call('GET', key) or now)
+    if tat < now then tat = now end
+    tats[i] = tat
+    local earliest = tat - interval * (burst - 1)
+    if earliest > start then start = earliest end
+end
+local wait = start - now
+if wait > max_wait then
+    return -wait
+end
+for i, key in ipairs(KEYS) do
+    local tat = math.max(tats[i], start) + tonumber(ARGV[2 * i])
+    redis.call('SET', key, tat, 'PX', tat - now + 1000)
+end
+return wait
+"""
+
+# 429 dan keyin kalitni ``retry_after`` tugaguncha yopadi (mavjud band qilingan vaqtni qisqartirmaydi)
+PENALIZE_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local blocked_until = now + tonumber(ARGV[1])
+local tat = tonumber(redis.call('GET', KEYS[1]) or 0)
+if blocked_until > tat then
+    redis.call('SET', KEYS[1], blocked_until, 'PX', blocked_until - now + 1000)
+end
+return blocked_until - now
+"""
+
+
+class TelegramRateLimiter:
+    """
+    Bot token va chat bo'yicha taqsimlangan rate limiter.
+
+    Ikki chelak bir vaqtda tekshiriladi: bot bo'yicha umumiy (soniyasiga
+    ``bot_rate``) va har chat uchun (daqiqasiga ``chat_rate``). Vazifa
+    yuborishdan oldin slot band qiladi; slot kelajakda bo'lsa, worker
+    kutmaydi - vazifa aynan shu vaqtga qayta rejalashtiriladi.
+    """
+
+    def __init__(self, redis_client, chat_rate=TELEGRAM_CHAT_RATE_PER_MINUTE, bot_rate=TELEGRAM_BOT_RATE_PER_SECOND,
+                 reserve_ahead=TELEGRAM_RESERVE_AHEAD):
+        self.redis = redis_client
+        self.chat_interval_ms = int(60_000 / chat_rate)
+        self.bot_interval_ms = int(1000 / bot_rate)
+        self.bot_burst = max(1, int(bot_rate))
+        self.reserve_ahead_ms = int(reserve_ahead * 1000)
+        self._reserve = redis_client.register_script(RESERVE_SCRIPT)
+        self._penalize = redis_client.register_script(PENALIZE_SCRIPT)
+
+    @staticmethod
+    def _keys(bot_token, chat_id):
+        # Token Redis kalitida ochiq saqlanmaydi
+        bot = hashlib.sha256(str(bot_token).encode("utf-8")).hexdigest()[:16]
+        return f"telegram:rate:{bot}", f"telegram:rate:{bot}:{chat_id}"
+
+    def reserve(self, bot_token, chat_id):
+        """
+        Yuborish slotini band qiladi. ``(reserved, delay)`` qaytaradi:
+        ``(True, 0)`` - hozir yuborish, ``(True, d)`` - slot ``d`` soniyadan keyin
+        band qilindi, ``(False, d)`` - slot ``reserve_ahead`` dan uzoqda, ``d``
+        soniyadan keyin qayta urinish kerak.
+        """
+        bot_key, chat_key = self._keys(bot_token, chat_id)
+        # Chat chelagi burst'siz - kanalga yuklash aynan limit tezligida boradi
+        result = int(self._reserve(
+            keys=[bot_key, chat_key],
+            args=[self.reserve_ahead_ms, self.bot_interval_ms, self.bot_burst, self.chat_interval_ms, 1]
+        ))
+        return result >= 0, abs(result) / 1000
+
+    def penalize(self, bot_token, chat_id, retry_after):
+        """Telegram 429 qaytardi - chat ``retry_after`` soniya davomida barcha worker'lar uchun yopiladi."""
+        _, chat_key = self._keys(bot_token, chat_id)
+        self._penalize(keys=[chat_key], args=[int(retry_after * 1000)])
@@ -0,0 +1,114 @@
+# apps/multiparser/remote.py
+
+import logging
+
+from django.db.models import Q
+
+from . import pipeline
+from .content import copy_content, delete_content
+from .models import Document
+
+# --- Logger ---
+logger = logging.getLogger(__name__)
+
+# Boshqa hujjat natijalarini ko'chirish uchun u to'liq qayta ishlangan bo'lishi kerak
+PROCESSED_FILTER = (
+    Q(download_status="downloaded", telegram_status="sent", file_id__isnull=False)
+    & Q(content__isnull=False)
+)
+
+
+def find_processed_duplicate(document, metadata=None):
+    """
+    Shu faylni allaqachon qayta ishlagan boshqa hujjatni topadi: avval ``file_url``
+    bo'yicha (indekslangan), so'ng HEAD'dan olingan ETag + Content-Length bo'yicha.
+    """
+    candidates = Document.objects.filter(PROCESSED_FILTER).exclude(id=document.id)
+
+    if document.file_url:
+        source = candidates.filter(file_url=document.file_url).order_by("created_at").first()
+        if source:
+            return source
+
+    if metadata and metadata.etag and metadata.content_length:
+        return candidates.filter(
+            remote_etag=metadata.etag,
+            remote_content_length=metadata.content_length
+        ).order_by("created_at").first()
+    return None
+
+
+def copy_processed_state(source, document_id):
+    """
+    ``source`` natijalarini (blob, matn, Telegram file_id) hujjatga ko'chiradi.
+    Hujjat faylga egalik qilmaydi, shuning uchun Delete bosqichi kerak emas -
+    faqat o'z indeks yozuvi qoladi.
+    """
+    Document.objects.filter(id=document_id).update(
+        blob=source.blob_id,
+        file_path=None,
+        file_size_bytes=source.file_size_bytes,
+        content_truncated=source.content_truncated,
+        download_status="downloaded",
+        download_completed_at=source.download_completed_at,
+        download_error=None,
+        file_id=source.file_id,
+        telegram_file_id=source.telegram_file_id,
+        telegram_status="sent",
+        sent_to_channel=True,
+        sent_at=source.sent_at,
+        delete_from_server=True,
+        is_indexed=False,
+        remote_etag=source.remote_etag,
+        remote_content_length=source.remote_content_length,
+        remote_last_modified=source.remote_last_modified
+    )
+    copy_content(source.id, document_id)
+    # Faqat o'z indeks yozuvi qoladi - pipeline Index bosqichidan davom etadi
+    pipeline.reset(document_id, "index")
+    logger.info(f"[Remote] Copied processed state from {source.id} to {document_id}")
+
+
+def remote_changed(document, metadata):
+    """
+    Saqlangan va hozirgi metama'lumot farqlanadimi. ETag bo'lsa u hal qiladi,
+    aks holda Content-Length va Last-Modified solishtiriladi. Hech narsa
+    saqlanmagan bo'lsa o'zgarmagan deb hisoblanadi (yangi bazaviy qiymat).
+    """
+    if document.remote_etag and metadata.etag:
+        return document.remote_etag != metadata.etag
+
+    if document.remote_content_length and metadata.content_length:
+        if document.remote_content_length != metadata.content_length:
+            return True
+    if document.remote_last_modified and metadata.last_modified:
+        return document.remote_last_modified != metadata.last_modified
+    return False
+
+
+def store_remote_metadata(document_id, metadata):
+    Document.objects.filter(id=document_id).update(
+        remote_etag=metadata.etag,
+        remote_content_length=metadata.content_length,
+        remote_last_modified=metadata.last_modified
+    )
+
+
+def reset_document_state(document_id):
+    """Manbadagi fayl o'zgargan - hujjatni to'liq qayta ishlash uchun tozalaydi."""
+    Document.objects.filter(id=document_id).update(
+        blob=None,
+        file_path=None,
+        content_truncated=False,
+        download_status="pending",
+        download_error=None,
+        file_id=None,
+        telegram_file_id=None,
+        telegram_status="pending",
+        sent_to_channel=False,
+        sent_at=None,
+        delete_from_server=False,
+        is_indexed=False
+    )
+    delete_content(document_id)
+    pipeline.reset(document_id)
@@ -1,25 +1,43 @@
 # apps/multiparser/tasks.py
 
 import os
+import random
 import time
 import logging
 import requests
 from pathlib import Path
-from celery import shared_task, chain
+from celery import Task, shared_task, chain
+from celery.exceptions import Ignore, SoftTimeLimitExceeded
 from django.conf import settings
+from django.db.models import Q
 from django.utils import timezone
-from django.db import transaction
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
 from elasticsearch import Elasticsearch
 from redis import Redis
 from redis.exceptions import ConnectionError as RedisConnectionError
+from .blobs import attach_blob, release_blob, reuse_processed_state
+from .content import has_content, save_content
+from .downloader import download_to_path, fetch_remote_metadata
+from .indexing import IndexBuffer, INDEX_BATCH_SIZE, flush_index_buffer
+from . import pipeline
 from .models import Document
+from .parsing import extract_text, parse_limits
+from .ratelimit import TELEGRAM_RESERVE_AHEAD, TelegramRateLimiter
+from .telegram_api import TELEGRAM_MAX_UPLOAD_BYTES, send_document
+from .remote import (copy_processed_state, find_processed_duplicate, remote_changed, reset_document_state,
+                     store_remote_metadata)
 from core.celery import app as celery_app
 
 # --- Logger ---
 logger = logging.getLogger(__name__)
 
+PARSE_FULL_TIER = getattr(settings, "PARSE_FULL_TIER", False)
+PARSE_FULL_TIME_LIMIT = getattr(settings, "PARSE_FULL_TIME_LIMIT", 1800)
+# Lease'siz shuncha soniya turgan bosqich "yo'qolgan" hisoblanadi va qayta navbatga qo'yiladi
+PIPELINE_STALL_SECONDS = getattr(settings, "PIPELINE_STALL_SECONDS", 3600)
+# To'liq parse navbatda yoki ishlayotgan ekan shu kalit turadi - Delete kutadi, sweeper qayta qo'ymaydi
+PARSE_FULL_PENDING_KEY = "parse_full:pending:{}"
+PARSE_FULL_PENDING_TTL = max(PIPELINE_STALL_SECONDS, PARSE_FULL_TIME_LIMIT + 60)
+
 # --- Redis client ---
 redis_client = Redis(
     host=settings.REDIS_HOST,
@@ -32,6 +50,8 @@ redis_client = Redis(
     retry_on_error=[RedisConnectionError]
 )
 
+telegram_limiter = TelegramRateLimiter(redis_client)
+
 # --- Elasticsearch client (Elasticsearch 8.x uchun) ---
 es_client = Elasticsearch(
     settings.ES_URL,
@@ -41,38 +61,131 @@ es_client = Elasticsearch(
 )
 
 
-# --- Retry session helper (HTTP so‘rovlar uchun) ---
-def make_retry_session(total=5, backoff=0.5, pool_connections=3, pool_maxsize=3):
-    session = requests.Session()
-    retry = Retry(
-        total=total,
-        read=total,
-        connect=total,
-        backoff_factor=backoff,
-        status_forcelist=(429, 500, 502, 503, 504),
-        allowed_methods=frozenset(['GET', 'POST'])
-    )
-    adapter = HTTPAdapter(max_retries=retry, pool_connections=pool_connections, pool_maxsize=pool_maxsize)
-    session.mount("http://", adapter)
-    session.mount("https://", adapter)
-    return session
+# ======================
+# PIPELINE STATE
+# ======================
+class PipelineTask(Task):
+    """
+    Pipeline bosqichi vazifasi. Retry'lar tugagach hujjat ``failed`` bosqichiga
+    o'tadi va lease bo'shatiladi - muddati o'tishini kutib turmaydi.
+    """
+    pipeline_stage = None
+
+    def on_failure(self, exc, task_id, args, kwargs, einfo):
+        if self.pipeline_stage and args:
+            pipeline.fail(args[0], self.pipeline_stage, exc)
+
+
+def _lease_owner(task):
+    # Retry va acks_late qayta yetkazishda task id o'zgarmaydi - o'z lease'ini qayta oladi
+    return task.request.id or "local"
+
+
+def _claim_stage(task, document_id, stage, label, lease=True):
+    """
+    Bosqichni bitta atomar UPDATE bilan lease qiladi. ``True`` - bosqichni
+    bajarish kerak, ``False`` - u allaqachon o'tilgan (zanjir davom etadi).
+
+    Boshqa worker ushlab turgan yoki ``failed`` hujjat uchun zanjir to'xtatiladi
+    (``Ignore``); oldingi bosqich hali tugamagan bo'lsa vazifa retry qilinadi.
+    ``lease=False`` - bosqich idempotent, faqat joriy bosqich tekshiriladi.
+    """
+    if lease and pipeline.claim(document_id, stage, _lease_owner(task)) is not None:
+        return True
+
+    current = pipeline.get_stage(document_id)
+    if not lease and current == stage:
+        return True
+    if pipeline.is_past(current, stage):
+        logger.info(f"[{label}] Already done {document_id} (stage={current})")
+        return False
+    if current == stage:
+        logger.info(f"[{label}] {document_id} is leased by another worker, dropping duplicate")
+        raise Ignore()
+    if current is None or current == "failed":
+        logger.warning(f"[{label}] {document_id} is not in the pipeline (stage={current}), skipping")
+        raise Ignore()
+    raise pipeline.StageNotReady(f"[{label}] Document {document_id} is still at {current}")
 
 
 # ======================
-# PARSE DOCUMENT
+# REMOTE PRE-CHECK
 # ======================
-import tika
-from tika import parser
+@shared_task(
+    bind=True,
+    autoretry_for=(requests.RequestException,),
+    retry_backoff=True,
+    retry_jitter=True,
+    max_retries=5,
+    acks_late=True,
+    ignore_result=True
+)
+def check_remote_task(self, document_id):
+    """
+    Zanjirdan oldingi arzon HEAD tekshiruvi:
+    - fayl manbada yo'q bo'lsa hujjat 'failed' deb belgilanadi;
+    - yuklangan va o'zgarmagan fayl qayta ishlanmaydi;
+    - boshqa hujjat qayta ishlagan fayl (URL yoki ETag bo'yicha) ko'chiriladi
+      va faqat indekslanadi;
+    - qolgan holatlarda to'liq pipeline navbatga qo'yiladi.
+    """
+    document = Document.objects.filter(id=document_id).first()
+    if document is None or not document.file_url or document.download_status == "downloading":
+        return None
+
+    metadata = fetch_remote_metadata(document.file_url)
+    if metadata is None:
+        Document.objects.filter(id=document_id).update(download_status="failed",
+                                                       download_error="Remote file not found")
+        pipeline.fail(document_id, "download", "Remote file not found")
+        logger.warning(f"[Remote] File missing at origin for {document_id}: {document.file_url}")
+        return "missing"
+
+    if document.download_status == "downloaded":
+        if not remote_changed(document, metadata):
+            store_remote_metadata(document_id, metadata)
+            logger.info(f"[Remote] Unchanged {document_id}, skipping")
+            return "unchanged"
+        logger.info(f"[Remote] Remote file changed for {document_id}, reprocessing")
+        reset_document_state(document_id)
+        store_remote_metadata(document_id, metadata)
+        process_document(document_id)
+        return "changed"
+
+    source = find_processed_duplicate(document, metadata)
+    if source:
+        copy_processed_state(source, document_id)
+        index_document_task.delay(document_id)
+        return "duplicate"
+
+    store_remote_metadata(document_id, metadata)
+    process_document(document_id)
+    return "scheduled"
+
+
+def schedule_document(document):
+    """
+    Parser uchun kirish nuqtasi. ``file_url`` bo'yicha allaqachon qayta
+    ishlangan dublikat bo'lsa, hech qanday yuklash navbatga qo'yilmaydi -
+    natija ko'chiriladi va faqat indekslanadi. Aks holda HEAD tekshiruvi.
+    """
+    source = find_processed_duplicate(document)
+    if source:
+        copy_processed_state(source, document.id)
+        index_document_task.delay(document.id)
+        return "duplicate"
 
-# Configure Tika to use external server instead of starting local one
-TIKA_URL = getattr(settings, 'TIKA_URL', 'http://multiparser_tika:9998')
-tika.TikaClientOnly = True
-tika.TikaServerEndpoint = TIKA_URL
-tika.TikaJarPath = None  # Disable local Tika server
+    check_remote_task.delay(document.id)
+    return "check"
 
 
+# ======================
+# PARSE DOCUMENT
+# ======================
 @shared_task(
     bind=True,
+    base=PipelineTask,
+    pipeline_stage="parse",
     autoretry_for=(Exception,),
     retry_backoff=True,
     retry_jitter=True,
@@ -82,170 +195,321 @@ tika.TikaJarPath = None  # Disable local Tika server
 )
 def parse_document_task(self, document_id):
     logger.info(f"[Parse] Starting for document {document_id}")
+    owner = _lease_owner(self)
 
-    with transaction.atomic():
-        document = Document.objects.select_for_update(skip_locked=True).get(id=document_id)
+    if not _claim_stage(self, document_id, "parse", "Parse"):
+        return str(document_id)
 
-        if document.parsed_content:
-            logger.info(f"[Parse] Already parsed {document_id}")
-            return str(document_id)
+    document = Document.objects.get(id=document_id)
+    if has_content(document_id):
+        # Matn blob yoki dublikatdan ko'chirilgan
+        logger.info(f"[Parse] Already parsed {document_id}")
+        pipeline.advance(document_id, "parse", owner=owner)
+        return str(document_id)
 
-        if not document.file_path:
-            raise Exception(f"[Parse] No file found for document {document_id}")
+    if not document.file_path:
+        raise Exception(f"[Parse] No file found for document {document_id}")
 
     file_path = Path(settings.MEDIA_ROOT) / document.file_path
     if not file_path.exists():
         raise Exception(f"[Parse] File not found on disk: {file_path}")
 
+    started = time.monotonic()
     try:
-        # Use external Tika server directly
-        parsed = parser.from_file(str(file_path), serverEndpoint=TIKA_URL)
+        # Katta fayllar siyosat bo'yicha qisman parse qilinadi (PARSE_POLICIES)
+        with pipeline.keep_alive(owner):
+            result = extract_text(file_path, limits=parse_limits(file_path))
     except Exception as e:
-        logger.error(f"[Parse] Tika error for {document_id}: {e}")
+        logger.error(f"[Parse] Extraction error for {document_id}: {e}")
         raise
 
-    content = parsed.get("content", "")
-    metadata = parsed.get("metadata", {})
-
-    if not content or not content.strip():
+    if not result.text or not result.text.strip():
         # 🔥 Retry qilinsin
         raise Exception(f"[Parse] Empty content for {document_id}. "
-                        f"File type={metadata.get('Content-Type')}, path={file_path}")
+                        f"File type={document.file_type}, path={file_path}")
 
     # Normalize
-    content = content.strip()
-    Document.objects.filter(id=document_id).update(parsed_content=content)
+    content = result.text.strip()
+    save_content(document_id, content, truncated=result.truncated)
+    pipeline.advance(document_id, "parse", owner=owner)
+
+    if result.truncated and PARSE_FULL_TIER:
+        enqueue_full_parse(document_id)
 
     logger.info(f"[Parse] Completed {document_id}, length={len(content)} chars, "
-                f"type={metadata.get('Content-Type')}")
+                f"type={document.file_type}, took={time.monotonic() - started:.1f}s"
+                + (", truncated" if result.truncated else ""))
     return str(document_id)
 
 
+def enqueue_full_parse(document_id):
+    """Qisman parse qilingan hujjatni "parse_full" navbatiga qo'yadi va markerni o'rnatadi."""
+    redis_client.set(PARSE_FULL_PENDING_KEY.format(document_id), 1, ex=PARSE_FULL_PENDING_TTL)
+    full_parse_document_task.delay(document_id)
+
+
+def full_parse_pending(document_id):
+    """To'liq parse navbatda yoki ishlayaptimi (marker muddati o'tmagan)."""
+    return bool(redis_client.exists(PARSE_FULL_PENDING_KEY.format(document_id)))
+
+
+class FullParseTask(Task):
+    """To'liq parse retry'lari tugasa qisman matn qoladi va Delete bosqichi endi kutmaydi."""
+
+    def on_failure(self, exc, task_id, args, kwargs, einfo):
+        if args:
+            _finish_full_parse(args[0], reason=f"failed: {exc}")
+
+
+def _finish_full_parse(document_id, reason=None):
+    """
+    To'liq parse tugadi (``reason=None``) yoki undan voz kechildi: ikkinchi
+    holda ``content_truncated`` tozalanadi, shunda Delete bosqichi faylni
+    boshqa kutmaydi. Hujjat Delete bosqichida kutib turgan bo'lsa, fayl o'chiriladi.
+    """
+    redis_client.delete(PARSE_FULL_PENDING_KEY.format(document_id))
+    if reason:
+        Document.objects.filter(id=document_id).update(content_truncated=False)
+        logger.warning(f"[ParseFull] Giving up on {document_id} ({reason}), keeping partial content")
+    if pipeline.get_stage(document_id) == "delete":
+        delete_local_file_task.delay(document_id)
+
+
+@shared_task(
+    bind=True,
+    base=FullParseTask,
+    autoretry_for=(Exception,),
+    # Vaqt chegarasiga yetgan parse qayta urinishda ham yetadi
+    dont_autoretry_for=(SoftTimeLimitExceeded,),
+    retry_backoff=True,
+    retry_jitter=True,
+    max_retries=3,
+    acks_late=True,
+    ignore_result=True,
+    soft_time_limit=PARSE_FULL_TIME_LIMIT + 30,
+    time_limit=PARSE_FULL_TIME_LIMIT + 60
+)
+def full_parse_document_task(self, document_id):
+    """
+    Qisman parse qilingan hujjatni to'liq parse qiladi ("parse_full" navbati).
+    Hujjat qayta indekslanadi; Delete bosqichi shu paytgacha kutib turgan
+    bo'lsa, fayl endi o'chiriladi.
+    """
+    document = Document.objects.filter(id=document_id).first()
+    if document is None or not document.content_truncated:
+        redis_client.delete(PARSE_FULL_PENDING_KEY.format(document_id))
+        return None
+    # Navbatda kutgan vaqt hisobga olinmasin - marker ishlash davomida yangilanadi
+    redis_client.set(PARSE_FULL_PENDING_KEY.format(document_id), 1, ex=PARSE_FULL_PENDING_TTL)
+
+    file_path = Path(settings.MEDIA_ROOT) / (document.file_path or "")
+    if not document.file_path or not file_path.exists():
+        _finish_full_parse(document_id, reason="file no longer on disk")
+        return None
+
+    started = time.monotonic()
+    result = extract_text(file_path, timeout=PARSE_FULL_TIME_LIMIT)
+    content = result.text.strip()
+    if not content:
+        _finish_full_parse(document_id, reason="empty result")
+        return None
+
+    if save_content(document_id, content, truncated=False):
+        IndexBuffer(redis_client).push(document_id)
+    logger.info(f"[ParseFull] Completed {document_id}, length={len(content)} chars, "
+                f"took={time.monotonic() - started:.1f}s")
+    _finish_full_parse(document_id)
+    return None
+
+
 # ======================
 # DOWNLOAD FILE
 # ======================
+def _start_download(document_id):
+    """Lease olingan hujjatni 'downloading' deb belgilaydi (admin va HEAD tekshiruvi uchun)."""
+    Document.objects.filter(id=document_id).update(download_status="downloading",
+                                                   download_started_at=timezone.now())
+    return Document.objects.get(id=document_id)
+
+
+def _document_file_path(document):
+    return Path(settings.MEDIA_ROOT) / f"documents/{document.id}{document.file_type}"
+
+
+def _complete_download(document_id, file_type, result, owner):
+    """Faylni blob omboriga ko'chiradi va dublikat bo'lsa tayyor natijalarni qayta ishlatadi."""
+    blob = attach_blob(document_id, result, file_type)
+    Document.objects.filter(id=document_id).update(
+        file_size_bytes=result.size,
+        remote_etag=result.etag,
+        remote_content_length=result.size,
+        remote_last_modified=result.last_modified,
+        download_status="downloaded",
+        download_completed_at=timezone.now(),
+        download_error=None
+    )
+    reuse_processed_state(document_id, blob)
+    pipeline.advance(document_id, "download", owner=owner)
+    logger.info(f"[Download] Completed {document_id}: {result.size} bytes in {result.elapsed:.1f}s, "
+                f"sha256={result.sha256[:12]}"
+                + (f", resumed from {result.resumed_from}" if result.resumed_from else ""))
+
+
 @shared_task(
     bind=True,
+    base=PipelineTask,
+    pipeline_stage="download",
     autoretry_for=(requests.RequestException, Exception),
     retry_backoff=True,
     retry_jitter=True,
     max_retries=5,
-    acks_late=True,
-    rate_limit="10/m"
+    acks_late=True
 )
 def download_file_task(self, document_id):
     logger.info(f"[Download] Starting for document {document_id}")
+    owner = _lease_owner(self)
 
-    with transaction.atomic():
-        document = Document.objects.select_for_update(skip_locked=True).get(id=document_id)
-        if document.download_status == "downloaded" and document.file_path:
-            logger.info(f"[Download] Already downloaded {document_id}")
-            return str(document_id)
-
-        document.download_status = "downloading"
-        document.save(update_fields=["download_status"])
-
-    session = make_retry_session()
-    file_path = Path(settings.MEDIA_ROOT) / f"documents/{document_id}{document.file_type}"
-    file_path.parent.mkdir(parents=True, exist_ok=True)
+    if not _claim_stage(self, document_id, "download", "Download"):
+        return str(document_id)
 
+    document = _start_download(document_id)
     try:
-        with session.get(document.file_url, stream=True, timeout=180) as r:
-            r.raise_for_status()
-            with open(file_path, "wb") as f:
-                for chunk in r.iter_content(chunk_size=8192):
-                    f.write(chunk)
+        # Uzilgan yuklash .part faylida qoladi va keyingi retry Range bilan davom etadi
+        with pipeline.keep_alive(owner):
+            result = download_to_path(document.file_url, _document_file_path(document))
     except Exception as e:
         logger.error(f"[Download] Failed for {document_id}: {e}")
+        Document.objects.filter(id=document_id).update(download_error=str(e)[:1000])
         raise
 
-    Document.objects.filter(id=document_id).update(
-        file_path=str(file_path.relative_to(settings.MEDIA_ROOT)),
-        download_status="downloaded"
-    )
-    logger.info(f"[Download] Completed {document_id}")
+    _complete_download(document_id, document.file_type, result, owner)
     return str(document_id)
 
 
 # ======================
 # INDEX DOCUMENT
 # ======================
-# INDEX DOCUMENT
 @shared_task(
     bind=True,
+    base=PipelineTask,
+    pipeline_stage="index",
     autoretry_for=(Exception,),
     retry_backoff=True,
     retry_jitter=True,
     max_retries=5,
-    acks_late=True, rate_limit="60/m"
+    acks_late=True
 )
 def index_document_task(self, document_id):
-    logger.info(f"[Index] Starting for document {document_id}")
+    """
+    Hujjatni bulk indekslash buferiga qo'shadi - zanjirning oxirgi vazifasi.
+    Haqiqiy indekslash ``flush_index_buffer_task`` ichida paketlab bajariladi;
+    u hujjatni Telegram bosqichiga o'tkazib, Telegram -> Delete zanjirini
+    navbatga qo'yadi. Buferga qo'shish idempotent - lease kerak emas.
+    """
+    logger.info(f"[Index] Queueing document {document_id}")
 
-    with transaction.atomic():
-        document = Document.objects.select_for_update(skip_locked=True).get(id=document_id)
-        if document.is_indexed:
-            logger.info(f"[Index] Already indexed {document_id}")
-            return str(document_id)
+    if not _claim_stage(self, document_id, "index", "Index", lease=False):
+        return str(document_id)
 
-        if not document.file_path:
-            raise Exception(f"[Index] No file found for document {document_id}")
+    buffer = IndexBuffer(redis_client)
+    size = buffer.push(document_id)
+    if size >= INDEX_BATCH_SIZE:
+        flush_index_buffer_task.delay()
 
-    product = getattr(document, "product", None)
-    body = {
-        "document_id": str(document.id),
-        "parsed_content": document.parsed_content or "",
-    }
-
-    if product:
-        body.update({
-            "product_id": product.id,
-            "product_title": product.title,
-            "product_slug": product.slug,
-        })
-
-    # 🔥 ES 8.x da 'document' parametri ishlatiladi
-    es_client.index(index="documents", id=str(document.id), document=body)
-
-    Document.objects.filter(id=document_id).update(is_indexed=True)
-    logger.info(f"[Index] Completed {document_id}")
+    logger.info(f"[Index] Buffered {document_id}, buffer size={size}")
     return str(document_id)
 
 
+def _start_delivery(document_ids):
+    """Indekslangan hujjatlar uchun Telegram -> Delete zanjiri."""
+    for document_id in document_ids:
+        process_document(document_id, stage="telegram")
+
+
+@shared_task(bind=True, acks_late=True, ignore_result=True)
+def flush_index_buffer_task(self, max_batches=10):
+    """
+    Buferdagi hujjatlarni ``streaming_bulk`` orqali indekslaydi.
+    Hajm bo'yicha ``index_document_task``dan, vaqt bo'yicha beat'dan chaqiriladi.
+    """
+    buffer = IndexBuffer(redis_client)
+    if not buffer.size():
+        return None
+
+    stats = flush_index_buffer(es_client, buffer, max_batches=max_batches, on_advanced=_start_delivery)
+    logger.info(f"[Index] Bulk flush completed: {stats}")
+
+    # Bufer hali to'la bo'lsa keyingi flush'ni darhol navbatga qo'yamiz
+    if buffer.size() >= INDEX_BATCH_SIZE:
+        flush_index_buffer_task.delay(max_batches=max_batches)
+    return stats
+
+
 # ======================
 # SEND TO TELEGRAM
 # ======================
 @shared_task(
     bind=True,
+    base=PipelineTask,
+    pipeline_stage="telegram",
     autoretry_for=(requests.RequestException, Exception),
     retry_backoff=True,
     retry_jitter=True,
     max_retries=5,
-    acks_late=True,
-    rate_limit="5/m"
+    acks_late=True
 )
-def send_telegram_task(self, document_id):
+def send_telegram_task(self, document_id, reserved=False):
+    """
+    Hujjatni kanalga yuboradi. Tezlik ``TelegramRateLimiter`` orqali barcha
+    worker'lar uchun umumiy: slot kelajakda bo'lsa yoki Telegram 429 qaytarsa,
+    worker uxlamaydi - lease bo'shatiladi va vazifa kerakli ``countdown``
+    bilan qayta rejalashtiriladi.
+    ``reserved=True`` - slot oldingi urinishda band qilingan; u faqat shu
+    vazifaning birinchi urinishiga tegishli - retry'da slot qayta so'raladi.
+    """
     logger.info(f"[Telegram] Starting for document {document_id}")
-
-    with transaction.atomic():
-        document = Document.objects.select_for_update(skip_locked=True).get(id=document_id)
-
-        if document.telegram_status == "sent" and document.file_id:
-            logger.info(f"[Telegram] Already sent {document_id}")
-            return str(document_id)
-
-        if not document.file_path:
-            raise Exception(f"[Telegram] No file to send for {document_id}")
-
-        if not document.is_indexed:
-            raise Exception(f"[Telegram] Not indexed yet {document_id}")
-
-        document.telegram_status = "sending"
-        document.save(update_fields=["telegram_status"])
-
     bot_token = getattr(settings, "BOT_TOKEN", None)
     channel_id = getattr(settings, "FORCE_CHANNEL_USERNAME", None)
-    file_path = Path(settings.MEDIA_ROOT) / document.file_path
+    owner = _lease_owner(self)
+
+    # Zanjirni Index bosqichidan o'tkazgan flush vazifasi navbatga qo'yadi
+    if not _claim_stage(self, document_id, "telegram", "Telegram"):
+        return str(document_id)
+
+    document = Document.objects.get(id=document_id)
+    if document.telegram_status == "sent" and document.file_id:
+        # file_id blob yoki dublikatdan ko'chirilgan
+        logger.info(f"[Telegram] Already sent {document_id}")
+        pipeline.advance(document_id, "telegram", owner=owner)
+        return str(document_id)
+
+    if not document.file_path:
+        raise Exception(f"[Telegram] No file to send for {document_id}")
+
+    file_size = document.file_size_bytes or (Path(settings.MEDIA_ROOT) / document.file_path).stat().st_size
+    if file_size > TELEGRAM_MAX_UPLOAD_BYTES:
+        # Bot API bu hajmni qabul qilmaydi (bulutda 50 MB) - local server rejimida yuboriladi
+        Document.objects.filter(id=document_id).update(telegram_status="skipped")
+        pipeline.advance(document_id, "telegram", owner=owner)
+        logger.warning(f"[Telegram] Skipped {document_id}: {file_size} bytes > {TELEGRAM_MAX_UPLOAD_BYTES}")
+        return str(document_id)
+
+    # Band qilingan slot vaqti o'tgan bo'lishi mumkin (autoretry / self.retry) - qayta so'raymiz
+    if not reserved or self.request.retries:
+        slot_reserved, delay = telegram_limiter.reserve(bot_token, channel_id)
+        if delay:
+            if not slot_reserved:
+                # Slot juda uzoqda - keyinroq qayta so'raymiz, urinishlar vaqt bo'yicha yoyiladi
+                delay += random.uniform(0, TELEGRAM_RESERVE_AHEAD)
+            logger.info(f"[Telegram] Rate limited {document_id}, rescheduling in {delay:.1f}s")
+            # Yangi vazifa yangi id bilan keladi - lease'ni u o'zi oladi
+            pipeline.release(document_id, owner)
+            return self.replace(send_telegram_task.signature(
+                (document_id,), {"reserved": slot_reserved}, countdown=delay
+            ))
+
+    Document.objects.filter(id=document_id).update(telegram_status="sending")
+
     product = getattr(document, "product", None)
 
     caption = (
@@ -255,27 +519,29 @@ def send_telegram_task(self, document_id):
     )
     caption = caption[:1000]  # Telegram limit
 
-    url = f"https://api.telegram.org/bot{bot_token}/sendDocument"
-    session = make_retry_session()
-
     try:
-        with open(file_path, "rb") as f:
-            files = {"document": (file_path.name, f)}
-            data = {"chat_id": channel_id, "caption": caption, "parse_mode": "Markdown"}
-            response = session.post(url, files=files, data=data, timeout=180)
-
+        # Blob fayl nomi SHA-256 - kanalda hujjat id'si bilan ko'rsatiladi
+        with pipeline.keep_alive(owner):
+            response = send_document(bot_token, channel_id, document.file_path,
+                                     f"{document.id}{document.file_type}", caption)
         resp = response.json()
-        if response.status_code == 429:
-            retry_after = int(resp.get("parameters", {}).get("retry_after", 5))
-            time.sleep(retry_after)
-            raise Exception(f"[Telegram] 429 Too Many Requests, retry after {retry_after}s")
-
-        if not resp.get("ok"):
-            raise Exception(f"[Telegram] Error {resp}")
     except Exception as e:
         logger.error(f"[Telegram] Failed for {document_id}: {e}")
         raise
 
+    if response.status_code == 429:
+        # Boshqa worker'lar ham shu chatga retry_after tugaguncha yubormaydi
+        retry_after = int(resp.get("parameters", {}).get("retry_after", 5))
+        telegram_limiter.penalize(bot_token, channel_id, retry_after)
+        Document.objects.filter(id=document_id).update(telegram_status="pending")
+        pipeline.release(document_id, owner, error=f"429 retry_after={retry_after}")
+        logger.warning(f"[Telegram] 429 for {document_id}, rescheduling in {retry_after}s")
+        return self.replace(send_telegram_task.signature((document_id,), countdown=retry_after))
+
+    if not resp.get("ok"):
+        logger.error(f"[Telegram] Failed for {document_id}: {resp}")
+        raise Exception(f"[Telegram] Error {resp}")
+
     file_id = resp["result"]["document"]["file_id"]
     Document.objects.filter(id=document_id).update(
         file_id=file_id,
@@ -284,6 +550,9 @@ def send_telegram_task(self, document_id):
         sent_at=timezone.now(),
         sent_to_channel=True
     )
+    pipeline.advance(document_id, "telegram", owner=owner)
+    # Indeksdagi is_available bayrog'ini yangilash uchun qayta indekslaymiz
+    IndexBuffer(redis_client).push(document_id)
     logger.info(f"[Telegram] Completed {document_id}")
     return str(document_id)
 
@@ -293,6 +562,8 @@ def send_telegram_task(self, document_id):
 # ======================
 @shared_task(
     bind=True,
+    base=PipelineTask,
+    pipeline_stage="delete",
     autoretry_for=(Exception,),
     retry_backoff=True,
     retry_jitter=True,
@@ -301,50 +572,141 @@ def send_telegram_task(self, document_id):
 )
 def delete_local_file_task(self, document_id):
     logger.info(f"[Delete] Starting for document {document_id}")
-
-    with transaction.atomic():
-        document = Document.objects.select_for_update(skip_locked=True).get(id=document_id)
-
-        if document.delete_from_server:
-            logger.info(f"[Delete] Already deleted {document_id}")
-            return str(document_id)
-
-        if not (document.is_indexed and document.telegram_status == "sent"):
-            raise Exception(f"[Delete] Cannot delete {document_id}, not indexed or not sent")
-
-    file_path = Path(settings.MEDIA_ROOT) / document.file_path
-    if file_path.exists() and not getattr(settings, "KEEP_LOCAL_FILES", False):
-        try:
-            os.remove(file_path)
-        except Exception as e:
-            logger.error(f"[Delete] Failed to remove {file_path}: {e}")
-            raise
+    owner = _lease_owner(self)
+
+    if not _claim_stage(self, document_id, "delete", "Delete"):
+        return str(document_id)
+
+    document = Document.objects.get(id=document_id)
+    if document.delete_from_server:
+        logger.info(f"[Delete] Already deleted {document_id}")
+        pipeline.advance(document_id, "delete", owner=owner)
+        return str(document_id)
+
+    if document.telegram_status == "skipped":
+        # Telegram'ga sig'madi - fayl keyinroq (masalan, local Bot API bilan) yuborish uchun qoladi
+        logger.info(f"[Delete] Telegram skipped {document_id}, keeping file")
+        pipeline.advance(document_id, "delete", owner=owner)
+        return str(document_id)
+
+    if document.content_truncated and PARSE_FULL_TIER:
+        # Fayl to'liq parse uchun kerak - full_parse_document_task tugagach o'chiradi
+        logger.info(f"[Delete] Full parse pending for {document_id}, keeping file")
+        pipeline.release(document_id, owner)
+        return str(document_id)
+
+    keep_files = getattr(settings, "KEEP_LOCAL_FILES", False)
+    if document.blob_id and not keep_files:
+        # Blob boshqa hujjatlar bilan umumiy - oxirgi foydalanuvchi o'chiradi
+        release_blob(document)
+    elif document.file_path and not keep_files:
+        file_path = Path(settings.MEDIA_ROOT) / document.file_path
+        if file_path.exists():
+            try:
+                os.remove(file_path)
+            except Exception as e:
+                logger.error(f"[Delete] Failed to remove {file_path}: {e}")
+                raise
 
     Document.objects.filter(id=document_id).update(
         file_path=None,
         delete_from_server=True
     )
+    pipeline.advance(document_id, "delete", owner=owner)
     logger.info(f"[Delete] Completed {document_id}")
     return str(document_id)
 
 
+# ======================
+# RESEND SKIPPED
+# ======================
+def resend_skipped_documents(queryset):
+    """
+    Hajmi sababli Telegram'ga yuborilmagan ("skipped") va fayli saqlangan
+    hujjatlarni Telegram bosqichidan qayta navbatga qo'yadi - masalan,
+    TELEGRAM_LOCAL_MODE yoqilib limit 2000 MB gacha oshgach. Hali ham
+    limitdan katta fayllar o'zgarmaydi. ``(queued, too_large)`` qaytaradi.
+    """
+    skipped = queryset.filter(telegram_status="skipped", file_path__isnull=False, delete_from_server=False)
+    fits = Q(file_size_bytes__isnull=True) | Q(file_size_bytes__lte=TELEGRAM_MAX_UPLOAD_BYTES)
+    too_large = skipped.exclude(fits).count()
+
+    queued = 0
+    for document_id in skipped.filter(fits).values_list("id", flat=True).iterator():
+        Document.objects.filter(id=document_id, telegram_status="skipped").update(telegram_status="pending")
+        pipeline.reset(document_id, "telegram")
+        process_document(document_id, stage="telegram")
+        queued += 1
+    logger.info(f"[Telegram] Re-queued {queued} skipped documents, {too_large} still over the upload limit")
+    return queued, too_large
+
+
+# ======================
+# STALLED DOCUMENTS
+# ======================
+@shared_task(bind=True, acks_late=True, ignore_result=True)
+def resume_stalled_documents_task(self, limit=500):
+    """
+    Lease muddati o'tgan (worker o'lgan) yoki ``PIPELINE_STALL_SECONDS`` dan beri
+    hech kim olmagan hujjatlar zanjirini joriy bosqichidan qayta navbatga qo'yadi.
+    """
+    stalled = pipeline.stalled(PIPELINE_STALL_SECONDS, limit=limit)
+    if not stalled:
+        return 0
+
+    waiting, reparse = set(), []
+    if PARSE_FULL_TIER:
+        # To'liq parse kutayotgan Delete bosqichi: parse hali navbatda yoki ishlayotgan bo'lsa
+        # u o'zi davom ettiradi, aks holda (xabar yo'qolgan) to'liq parse qayta navbatga qo'yiladi
+        waiting = set(Document.objects.filter(
+            id__in=[document_id for document_id, stage in stalled if stage == "delete"], content_truncated=True
+        ).values_list("id", flat=True))
+        reparse = [document_id for document_id in waiting if not full_parse_pending(document_id)]
+
+    resumed = [(document_id, stage) for document_id, stage in stalled if document_id not in waiting]
+    pipeline.touch([document_id for document_id, stage in stalled])
+    for document_id, stage in resumed:
+        process_document(document_id, stage=stage)
+    for document_id in reparse:
+        enqueue_full_parse(document_id)
+
+    logger.info(f"[Pipeline] Resumed {len(resumed)} stalled documents, re-queued {len(reparse)} full parses")
+    return len(resumed) + len(reparse)
+
+
 # ======================
 # CHAIN RUNNER
 # ======================
+# Bosqich -> vazifa; zanjir hujjatning joriy bosqichidan boshlab quriladi.
+# Zanjir Index'da tugaydi: indekslash bulk flush'da bo'ladi va Telegram -> Delete
+# zanjirini flush vazifasi navbatga qo'yadi (Telegram Index'ni kutib retry qilmaydi).
+STAGE_TASKS = [
+    ("download", download_file_task),
+    ("parse", parse_document_task),
+    ("index", index_document_task),
+    ("telegram", send_telegram_task),
+    ("delete", delete_local_file_task),
+]
+
+
 # Process document chain helper
-def process_document(document_id):
+def process_document(document_id, download=True, stage=None):
     """
     To'liq pipeline:
-    Download -> Parse -> Index -> Telegram -> Delete
+    Download -> Parse -> Index | Telegram -> Delete
+
+    ``download=False`` fayl allaqachon yuklangan bo'lsa, zanjirni Parse
+    bosqichidan boshlaydi. ``stage`` - zanjir boshlanadigan bosqich (to'xtab
+    qolgan hujjatlarni davom ettirish uchun). Index'gacha bo'lgan zanjir
+    Index'da tugaydi, Telegram va Delete - flush'dan keyin alohida zanjir.
     """
+    stage = stage or ("download" if download else "parse")
     try:
-        task_chain = chain(
-            download_file_task.s(document_id),
-            parse_document_task.s(),
-            index_document_task.s(),
-            send_telegram_task.s(),
-            delete_local_file_task.s()
-        )
+        pipeline.ensure(document_id, stage)
+        delivery = pipeline.is_past(stage, "index")
+        tasks = [task for name, task in STAGE_TASKS
+                 if not pipeline.is_past(stage, name) and (delivery or not pipeline.is_past(name, "index"))]
+        task_chain = chain(tasks[0].s(document_id), *(task.s() for task in tasks[1:]))
         return task_chain.apply_async(
             app=celery_app,
             retry=True,
@@ -0,0 +1,236 @@
+# apps/multiparser/telegram_api.py
+
+import logging
+import mimetypes
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# --- Logger ---
+logger = logging.getLogger(__name__)
+
+# --- Bot API sozlamalari ---
+TELEGRAM_API_BASE_URL = getattr(settings, "TELEGRAM_API_BASE_URL", "https://api.telegram.org")
+TELEGRAM_LOCAL_MODE = getattr(settings, "TELEGRAM_LOCAL_MODE", False)
+TELEGRAM_LOCAL_MEDIA_ROOT = getattr(settings, "TELEGRAM_LOCAL_MEDIA_ROOT", str(settings.MEDIA_ROOT))
+TELEGRAM_MAX_UPLOAD_BYTES = getattr(settings, "TELEGRAM_MAX_UPLOAD_BYTES", 50 * 1024 * 1024)
+# Multipart oqimining o'qish buferi - yuklash xotirasi fayl hajmiga bog'liq emas
+TELEGRAM_UPLOAD_CHUNK_SIZE = getattr(settings, "TELEGRAM_UPLOAD_CHUNK_SIZE", 64 * 1024)
+# Bitta sendDocument'ning umumiy vaqti (yuklash + javob) - threads/gevent pool Celery time limit'ini qo'llamaydi
+TELEGRAM_UPLOAD_TIME_LIMIT = getattr(settings, "TELEGRAM_UPLOAD_TIME_LIMIT", 1800)
+UPLOAD_PROGRESS_INTERVAL = 10  # soniya
+
+# Local rejimda fayl shu papkada hujjat nomi bilan hardlink qilinadi
+# (blob nomi SHA-256, kanalda esa hujjat id'si ko'rinishi kerak)
+STAGING_DIR = "telegram"
+
+
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+
+
+def get_upload_session():
+    """
+    Worker jarayoni uchun bitta pooled sessiya. sendDocument idempotent emas:
+    faqat ulanish bosqichidagi xatolar qayta uriniladi (so'rov hali yetib
+    bormagan), o'qish xatosi va 429/5xx esa vazifaning o'ziga qaytariladi -
+    aks holda kanalda dublikat xabar yoki worker ichida kutish bo'ladi.
+    """
+    global _session, _session_pid
+    with _session_lock:
+        if _session is None or _session_pid != os.getpid():
+            session = requests.Session()
+            retry = Retry(total=3, connect=3, read=0, status=0, other=0, backoff_factor=0.5, allowed_methods=None)
+            adapter = HTTPAdapter(max_retries=retry, pool_connections=2, pool_maxsize=4)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _session, _session_pid = session, os.getpid()
+        return _session
+
+
+class UploadTimeout(OSError):
+    pass
+
+
+class UploadProgress:
+    """
+    Yuborilgan baytlarni sanaydi va katta yuklashlarda har ``interval``
+    soniyada log yozadi. ``time_limit`` o'tsa ``UploadTimeout`` - yuklash uziladi.
+    """
+
+    def __init__(self, label, total, interval=UPLOAD_PROGRESS_INTERVAL, time_limit=TELEGRAM_UPLOAD_TIME_LIMIT):
+        self.label = label
+        self.total = total
+        self.interval = interval
+        self.time_limit = time_limit
+        self.sent = 0
+        self.started = time.monotonic()
+        self.logged = self.started
+
+    def update(self, sent):
+        self.sent = sent
+        now = time.monotonic()
+        if now - self.started > self.time_limit:
+            raise UploadTimeout(f"Upload of {self.label} exceeded {self.time_limit}s at {sent}/{self.total} bytes")
+        if now - self.logged >= self.interval:
+            self.logged = now
+            logger.info(f"[Telegram] Uploading {self.label}: {self.sent * 100 / max(self.total, 1):.0f}% "
+                        f"({self.sent}/{self.total} bytes, {self.rate() / (1024 * 1024):.2f} MB/s)")
+
+    @property
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    def rate(self):
+        return self.sent / max(self.elapsed, 1e-6)
+
+
+class MultipartStream:
+    """
+    ``multipart/form-data`` tanasi fayl-o'xshash obyekt sifatida: oddiy
+    maydonlar va fayl sarlavhasi oldindan baytlarga aylantiriladi, fayl esa
+    ``read()`` chaqirilganda ``chunk_size`` dan oshmagan bo'laklarda o'qiladi.
+    ``len()`` ma'lum bo'lgani uchun requests uni Content-Length bilan oqimda
+    yuboradi; ``seek()`` ulanish qayta urinilganda tanani boshiga qaytaradi.
+    """
+
+    def __init__(self, fields, file_field, filename, file_obj, file_size, content_type=None,
+                 chunk_size=TELEGRAM_UPLOAD_CHUNK_SIZE, progress=None):
+        self.boundary = uuid.uuid4().hex
+        self.file_obj = file_obj
+        self.file_size = file_size
+        self.chunk_size = chunk_size
+        self.progress = progress
+        self.position = 0
+
+        content_type = content_type or mimetypes.guess_type(filename)[0] or "application/octet-stream"
+        head = b"".join(self._field(name, value) for name, value in fields.items())
+        head += (
+            f'--{self.boundary}\r\n'
+            f'Content-Disposition: form-data; name="{file_field}"; filename="{self._quote(filename)}"\r\n'
+            f'Content-Type: {content_type}\r\n\r\n'
+        ).encode("utf-8")
+        self.head = head
+        self.tail = f"\r\n--{self.boundary}--\r\n".encode("utf-8")
+        self.length = len(self.head) + file_size + len(self.tail)
+
+    @property
+    def content_type(self):
+        return f"multipart/form-data; boundary={self.boundary}"
+
+    @staticmethod
+    def _quote(value):
+        return str(value).replace('"', "%22").replace("\r", "%0D").replace("\n", "%0A")
+
+    def _field(self, name, value):
+        return (
+            f'--{self.boundary}\r\nContent-Disposition: form-data; name="{self._quote(name)}"\r\n\r\n{value}\r\n'
+        ).encode("utf-8")
+
+    def __len__(self):
+        return self.length
+
+    def tell(self):
+        return self.position
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        if whence != os.SEEK_SET:
+            raise OSError("MultipartStream supports absolute seeks only")
+        self.position = max(0, min(offset, self.length))
+        return self.position
+
+    def read(self, size=-1):
+        # Har doim cheklangan bo'lak - read(-1) ham butun faylni xotiraga o'qimaydi
+        if size is None or size < 0 or size > self.chunk_size:
+            size = self.chunk_size
+        file_start = len(self.head)
+        file_end = file_start + self.file_size
+
+        if self.position < file_start:
+            data = self.head[self.position:self.position + size]
+        elif self.position < file_end:
+            self.file_obj.seek(self.position - file_start)
+            data = self.file_obj.read(min(size, file_end - self.position))
+            if not data:
+                raise OSError(f"File shrank during upload at byte {self.position - file_start}")
+        else:
+            offset = self.position - file_end
+            data = self.tail[offset:offset + size]
+
+        self.position += len(data)
+        if self.progress:
+            self.progress.update(self.position)
+        return data
+
+
+def api_url(bot_token, method):
+    return f"{TELEGRAM_API_BASE_URL}/bot{bot_token}/{method}"
+
+
+def upload_timeout(size_bytes):
+    """Katta fayllar uchun o'qish timeout'i: kamida 180s, har MB uchun 2s."""
+    return max(180, 2 * size_bytes / (1024 * 1024))
+
+
+@contextmanager
+def staged_local_file(relative_path, filename):
+    """
+    Local Bot API server uchun ``file://`` URI. Fayl ``MEDIA_ROOT/telegram/``
+    ga ``filename`` nomi bilan hardlink qilinadi (nusxalanmaydi) va yuborilgach
+    o'chiriladi. Hardlink imkonsiz bo'lsa (boshqa fayl tizimi) asl yo'l ishlatiladi.
+    """
+    source = Path(settings.MEDIA_ROOT) / relative_path
+    staged = Path(settings.MEDIA_ROOT) / STAGING_DIR / filename
+    staged.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        if staged.exists():
+            staged.unlink()
+        os.link(source, staged)
+    except OSError as e:
+        logger.warning(f"[Telegram] Could not stage {relative_path} as {filename}: {e}")
+        yield (Path(TELEGRAM_LOCAL_MEDIA_ROOT) / relative_path).as_uri()
+        return
+    try:
+        yield (Path(TELEGRAM_LOCAL_MEDIA_ROOT) / STAGING_DIR / filename).as_uri()
+    finally:
+        staged.unlink(missing_ok=True)
+
+
+def send_document(bot_token, chat_id, relative_path, filename, caption, parse_mode="Markdown"):
+    """
+    ``sendDocument``. Local rejimda so'rov faqat ``file://`` yo'lni yuboradi -
+    fayl baytlari Python orqali o'tmaydi; aks holda ``MultipartStream`` bilan
+    oqimli yuklash. Davomiyligi va tezligi har hujjat uchun log qilinadi.
+    """
+    session = get_upload_session()
+    file_path = Path(settings.MEDIA_ROOT) / relative_path
+    size = file_path.stat().st_size
+    data = {"chat_id": chat_id, "caption": caption, "parse_mode": parse_mode}
+    progress = UploadProgress(filename, size)
+    # Javob kutish ham umumiy vaqt ichida
+    timeout = (10, min(upload_timeout(size), TELEGRAM_UPLOAD_TIME_LIMIT))
+
+    if TELEGRAM_LOCAL_MODE:
+        with staged_local_file(relative_path, filename) as uri:
+            response = session.post(api_url(bot_token, "sendDocument"), data={**data, "document": uri},
+                                    timeout=timeout)
+        logger.info(f"[Telegram] Sent {filename} ({size} bytes) via local file in {progress.elapsed:.1f}s, "
+                    f"HTTP {response.status_code}")
+        return response
+
+    with open(file_path, "rb") as f:
+        body = MultipartStream(data, "document", filename, f, size, progress=progress)
+        response = session.post(api_url(bot_token, "sendDocument"), data=body, timeout=timeout,
+                                headers={"Content-Type": body.content_type})
+    logger.info(f"[Telegram] Uploaded {filename}: {progress.sent} bytes in {progress.elapsed:.1f}s "
+                f"({progress.rate() / (1024 * 1024):.2f} MB/s), HTTP {response.status_code}")
+    return response
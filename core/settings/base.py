@@ -128,6 +128,12 @@ CACHES = {
     }
 }
 
+# Bot qidiruv natijalari keshi (sekundlarda)
+SEARCH_CACHE_TTL = env.int("SEARCH_CACHE_TTL", default=300)
+# Shuncha birinchi sahifa bitta ES so'rovi bilan olinib, bitta kalitda saqlanadi
+SEARCH_CACHE_PAGES = env.int("SEARCH_CACHE_PAGES", default=5)
+SEARCH_TRACK_TOTAL_HITS = env.int("SEARCH_TRACK_TOTAL_HITS", default=1000)
+
 # Redis settings
 REDIS_HOST = env.str("REDIS_HOST")
 REDIS_PORT = env.int("REDIS_PORT")
@@ -150,6 +156,55 @@ CELERY_CACHE_BACKEND = "django-cache"
 CELERY_BEAT_SCHEDULER = "django_celery_beat.schedulers:DatabaseScheduler"
 CELERY_RESULT_EXTENDED = True
 CELERY_RESULT_EXPIRES = env.int("CELERY_RESULT_EXPIRES", default=604800)
+# Har bir pipeline bosqichi o'z navbatida - sekin Telegram yuklashi parse'ni to'xtatmaydi.
+# Marshrutlanmagan vazifalar (masalan, bot broadcast) standart "celery" navbatida qoladi.
+CELERY_TASK_DEFAULT_QUEUE = "celery"
+CELERY_TASK_ROUTES = {
+    "apps.multiparser.tasks.check_remote_task": {"queue": "download"},
+    "apps.multiparser.tasks.download_file_task": {"queue": "download"},
+    "apps.multiparser.tasks.parse_document_task": {"queue": "parse"},
+    # To'liq (kesilmagan) parse past ustuvorlikdagi alohida navbatda
+    "apps.multiparser.tasks.full_parse_document_task": {"queue": "parse_full"},
+    "apps.multiparser.tasks.index_document_task": {"queue": "index"},
+    "apps.multiparser.tasks.flush_index_buffer_task": {"queue": "index"},
+    "apps.multiparser.tasks.send_telegram_task": {"queue": "telegram"},
+    "apps.multiparser.tasks.delete_local_file_task": {"queue": "housekeeping"},
+    "apps.multiparser.tasks.resume_stalled_documents_task": {"queue": "housekeeping"},
+}
+# start_celery --pools uchun: har pool qaysi navbatlarni, qanday pool turi va nechta slot bilan oladi.
+# I/O bosqichlari threads (yoki o'rnatilgan bo'lsa gevent), Tika/extractor'lar prefork.
+# threads/gevent CELERY_TASK_(SOFT_)TIME_LIMIT'ni qo'llamaydi - I/O vazifalari o'z muddatlariga ega:
+# DOWNLOAD_TIME_LIMIT, TELEGRAM_UPLOAD_TIME_LIMIT, ES_BULK_FLUSH_TIME_LIMIT.
+CELERY_IO_POOL = env.str("CELERY_IO_POOL", default="threads")
+CELERY_WORKER_POOLS = {
+    "download": {"queues": ["download"], "pool": CELERY_IO_POOL,
+                 "concurrency": env.int("CELERY_DOWNLOAD_CONCURRENCY", default=16)},
+    "parse": {"queues": ["parse"], "pool": "prefork",
+              "concurrency": env.int("CELERY_PARSE_CONCURRENCY", default=4)},
+    "parse_full": {"queues": ["parse_full"], "pool": "prefork",
+                   "concurrency": env.int("CELERY_PARSE_FULL_CONCURRENCY", default=1)},
+    "index": {"queues": ["index"], "pool": CELERY_IO_POOL,
+              "concurrency": env.int("CELERY_INDEX_CONCURRENCY", default=4)},
+    "telegram": {"queues": ["telegram"], "pool": CELERY_IO_POOL,
+                 "concurrency": env.int("CELERY_TELEGRAM_CONCURRENCY", default=2)},
+    "housekeeping": {"queues": ["housekeeping", "celery"], "pool": CELERY_IO_POOL,
+                     "concurrency": env.int("CELERY_HOUSEKEEPING_CONCURRENCY", default=4)},
+}
+CELERY_BEAT_SCHEDULE = {
+    "flush-index-buffer": {
+        "task": "apps.multiparser.tasks.flush_index_buffer_task",
+        "schedule": env.int("ES_BULK_FLUSH_INTERVAL", default=10),
+    },
+    "resume-stalled-documents": {
+        "task": "apps.multiparser.tasks.resume_stalled_documents_task",
+        "schedule": env.int("PIPELINE_RESUME_INTERVAL", default=300),
+    },
+}
+# Pipeline bosqichlari PipelineState jadvalidagi lease bilan olinadi: worker heartbeat'siz
+# PIPELINE_LEASE_SECONDS o'tsa bosqich boshqasiga o'tadi; lease'siz PIPELINE_STALL_SECONDS
+# turgan hujjatlar beat orqali qayta navbatga qo'yiladi.
+PIPELINE_LEASE_SECONDS = env.int("PIPELINE_LEASE_SECONDS", default=900)
+PIPELINE_STALL_SECONDS = env.int("PIPELINE_STALL_SECONDS", default=3600)
 
 # Logging configuration
 LOGGING_CONFIG = None
@@ -182,6 +237,21 @@ WEBHOOK_URL = env.str("WEBHOOK_URL")
 CELERY_WEBHOOK = env.str("CELERY_WEBHOOK", default="False")
 BOT_TOKEN = env.str("BOT_TOKEN")
 FORCE_CHANNEL_USERNAME = env.str("FORCE_CHANNEL_USERNAME")
+# Bot API manzili: rasmiy bulut yoki o'zimizning telegram-bot-api server (--local).
+# Local rejimda fayllar yuklanmaydi - server ularni umumiy diskdan file:// orqali o'qiydi,
+# shuning uchun 50 MB o'rniga 2000 MB gacha fayllar yuboriladi.
+TELEGRAM_API_BASE_URL = env.str("TELEGRAM_API_BASE_URL", default="https://api.telegram.org").rstrip("/")
+TELEGRAM_LOCAL_MODE = env.bool("TELEGRAM_LOCAL_MODE", default=False)
+# MEDIA_ROOT Bot API server konteynerida qaysi yo'lda ko'rinadi
+TELEGRAM_LOCAL_MEDIA_ROOT = env.str("TELEGRAM_LOCAL_MEDIA_ROOT", default=str(MEDIA_ROOT))
+TELEGRAM_MAX_UPLOAD_BYTES = env.int("TELEGRAM_MAX_UPLOAD_BYTES",
+                                    default=(2000 if TELEGRAM_LOCAL_MODE else 50) * 1024 * 1024)
+TELEGRAM_UPLOAD_TIME_LIMIT = env.int("TELEGRAM_UPLOAD_TIME_LIMIT", default=1800)
+# Telegram yuborish limitlari - Redis'da, barcha worker'lar uchun umumiy (bot token + chat bo'yicha)
+TELEGRAM_CHAT_RATE_PER_MINUTE = env.int("TELEGRAM_CHAT_RATE_PER_MINUTE", default=20)
+TELEGRAM_BOT_RATE_PER_SECOND = env.int("TELEGRAM_BOT_RATE_PER_SECOND", default=30)
+# Shu soniyadan uzoq bo'lmagan slot oldindan band qilinadi (Redis visibility_timeout'dan kichik bo'lsin)
+TELEGRAM_RESERVE_AHEAD = env.int("TELEGRAM_RESERVE_AHEAD", default=60)
 
 # Elasticsearch configuration
 ELASTICSEARCH_DSL = {
@@ -192,9 +262,60 @@ ELASTICSEARCH_DSL = {
 
 ES_URL = env.str("ES_URL")
 ES_INDEX = env.str("ES_INDEX")
+# analysis-icu plagini o'rnatilgan bo'lsa icu_folding ishlatiladi
+ES_ICU_ANALYSIS = env.bool("ES_ICU_ANALYSIS", default=False)
+
+# Indekslanadigan matn: umumiy chegara va yuqoriroq og'irlikdagi boshlang'ich qism
+ES_CONTENT_MAX_CHARS = env.int("ES_CONTENT_MAX_CHARS", default=200_000)
+ES_CONTENT_HEAD_CHARS = env.int("ES_CONTENT_HEAD_CHARS", default=8 * 1024)
+
+# Bulk indexer: bufer hajmi yoki vaqt bo'yicha flush
+ES_BULK_BATCH_SIZE = env.int("ES_BULK_BATCH_SIZE", default=500)
+ES_BULK_FLUSH_INTERVAL = env.int("ES_BULK_FLUSH_INTERVAL", default=10)
+ES_BULK_MAX_ATTEMPTS = env.int("ES_BULK_MAX_ATTEMPTS", default=5)
+ES_BULK_FLUSH_TIME_LIMIT = env.int("ES_BULK_FLUSH_TIME_LIMIT", default=120)
+
+# Download engine: jarayon bo'yicha umumiy sessiya, katta chunk'lar va host limiti
+DOWNLOAD_CHUNK_SIZE = env.int("DOWNLOAD_CHUNK_SIZE", default=1024 * 1024)
+DOWNLOAD_POOL_SIZE = env.int("DOWNLOAD_POOL_SIZE", default=16)
+DOWNLOAD_PER_HOST_LIMIT = env.int("DOWNLOAD_PER_HOST_LIMIT", default=4)
+DOWNLOAD_RESUME_ATTEMPTS = env.int("DOWNLOAD_RESUME_ATTEMPTS", default=5)
+DOWNLOAD_TIME_LIMIT = env.int("DOWNLOAD_TIME_LIMIT", default=1800)
+
+# Katalog crawler: parallel sahifa yuklovchilar, token bucket tezligi va checkpoint fayli
+CRAWLER_WORKERS = env.int("CRAWLER_WORKERS", default=4)
+CRAWLER_RATE = env.float("CRAWLER_RATE", default=2.0)
+CRAWLER_CHECKPOINT_PATH = env.str("CRAWLER_CHECKPOINT_PATH", default=str(BASE_DIR / "parser_checkpoint.json"))
 
 # Tika configuration
 TIKA_URL = env.str("TIKA_URL")
+# Bir nechta Tika konteyneri: round-robin va sog'lomlik bo'yicha failover
+TIKA_URLS = env.list("TIKA_URLS", default=[TIKA_URL])
+TIKA_TIMEOUT_BASE = env.int("TIKA_TIMEOUT_BASE", default=30)
+TIKA_TIMEOUT_PER_MB = env.int("TIKA_TIMEOUT_PER_MB", default=5)
+TIKA_TIMEOUT_MAX = env.int("TIKA_TIMEOUT_MAX", default=480)
+TIKA_ENDPOINT_COOLDOWN = env.int("TIKA_ENDPOINT_COOLDOWN", default=30)
+
+# Mahalliy DOCX/PPTX/XLSX extractor'lari: bitta fayldan o'qiladigan XML'ning ochilgan hajmi chegarasi
+EXTRACTOR_MAX_XML_BYTES = env.int("EXTRACTOR_MAX_XML_BYTES", default=256 * 1024 * 1024)
+
+# Qisman parse: katta PDF'lardan faqat birinchi N sahifa, boshqalardan birinchi M belgi.
+# Kesilgan hujjatlar PARSE_FULL_TIER yoqilgan bo'lsa "parse_full" navbatida to'liq parse qilinadi.
+PARSE_MAX_PAGES = env.int("PARSE_MAX_PAGES", default=50)
+PARSE_MAX_CHARS = env.int("PARSE_MAX_CHARS", default=ES_CONTENT_MAX_CHARS)
+PARSE_POLICIES = {
+    ".pdf": {"max_pages": PARSE_MAX_PAGES, "max_chars": PARSE_MAX_CHARS},
+    "default": {"max_chars": PARSE_MAX_CHARS},
+}
+PARSE_FULL_TIER = env.bool("PARSE_FULL_TIER", default=False)
+# To'liq parse uchun Tika vaqti; vazifaning soft/hard limiti shundan 30/60 soniya ko'proq
+PARSE_FULL_TIME_LIMIT = env.int("PARSE_FULL_TIME_LIMIT", default=1800)
+
+# Parse qilingan matn DocumentContent jadvalida siqilgan holda saqlanadi: "zlib" yoki "zstd"
+# (zstd uchun "zstandard" paketi kerak, aks holda zlib ishlatiladi)
+CONTENT_COMPRESSION = env.str("CONTENT_COMPRESSION", default="zlib")
+CONTENT_COMPRESSION_LEVEL = env.int("CONTENT_COMPRESSION_LEVEL", default=6)
+
 TEMPLATES = [
     {
         "BACKEND": "django.template.backends.django.DjangoTemplates",